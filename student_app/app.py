@@ -1,12 +1,33 @@
 import os
 import json
-import time
+import base64
 import threading
-import requests
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from flask import Flask, request, jsonify
-from github import Github, GithubException
+from flask import Flask, Response, request, jsonify
+from github import GithubException, InputGitTreeElement
+from github.GitRef import GitRef
+from github.GitTree import GitTree
+from github.Repository import Repository
 from dotenv import load_dotenv
+from events import TooManyStreams, deployment_events
+from deploy_backends import DeploymentBackend, local_backend, repository_name, tree_digest
+from asset_optimizer import asset_optimizer
+from attachments import RequestTooLarge, RequestUnauthorized, ingest_request, load_attachments
+from classifier import create_classifier
+from executor import DEPLOY_WORKERS, DeploymentExecutor, QueueFullError
+from generation_cache import generation_cache, git_blob_sha, normalize_brief
+from generator_backends import GenerationError, LLMGenerator, TemplateGenerator
+from github_client import GITHUB_POOL_SIZE, github_clients
+from notifier import NotificationDispatcher
+from pages_tracker import PAGES_READY_TIMEOUT, PagesReadinessTracker
+from pushed_files import pushed_files
+from rate_limiter import github_scheduler
+from repo_pool import RepoPool
+from status_store import create_status_store
+from template_registry import SHARED_FILES, template_registry
+from template_repos import template_repositories, wait_for_ref
 
 # Load environment variables
 load_dotenv()
@@ -14,854 +35,582 @@ load_dotenv()
 app = Flask(__name__)
 
 # Configuration
+# 'github' (default), 'local-git' (bare repositories under DEPLOY_ROOT) or 'filesystem'
+DEPLOY_BACKEND = os.getenv('DEPLOY_BACKEND', 'github')
 APP_SECRET = os.getenv('APP_SECRET', 'default-secret-123')
 GITHUB_TOKEN = os.getenv('GITHUB_TOKEN')
-
-# In-memory storage for deployment status (in production, use a database)
-deployments = {}
+GITHUB_API_URL = os.getenv('GITHUB_API_URL', 'https://api.github.com')
+# 'git-data' pushes every file in one commit; 'contents' makes one commit per file
+GITHUB_PUSH_MODE = os.getenv('GITHUB_PUSH_MODE', 'git-data')
+GITHUB_BLOB_CONCURRENCY = int(os.getenv('GITHUB_BLOB_CONCURRENCY', '4'))
+INLINE_BLOB_LIMIT = 64 * 1024  # text files up to this size go inline in the tree request
+PAGES_URL_TEMPLATE = os.getenv('PAGES_URL_TEMPLATE', 'https://{login}.github.io/{repo}')
+# Hold the evaluation notification until the Pages site serves the pushed commit
+GATE_NOTIFICATION_ON_PAGES = os.getenv('GATE_NOTIFICATION_ON_PAGES', 'false').lower() == 'true'
+# Briefs whose best keyword score is lower than this get the default app
+GENERATOR_MIN_SCORE = float(os.getenv('GENERATOR_MIN_SCORE', '1.0'))
+# 'keywords' scores template keywords; 'similarity' ranks templates by TF-IDF similarity (needs NumPy)
+GENERATOR_SELECTOR = os.getenv('GENERATOR_SELECTOR', 'keywords')
+# 'template' renders the best-matching app template; 'llm' asks LLM_MODEL, falling back to templates
+GENERATOR_BACKEND = os.getenv('GENERATOR_BACKEND', 'template')
+# 'template' generates round-1 repos of static apps from per-generator template repositories
+ROUND1_PROVISIONING = os.getenv('ROUND1_PROVISIONING', 'create')
+# Longest GET /status?wait= a client may ask for; each waiting poll holds a gunicorn thread
+STATUS_MAX_WAIT = float(os.getenv('STATUS_MAX_WAIT', '60'))
+# Long-polls allowed to wait at once per process; beyond this they are answered straight away
+STATUS_MAX_WAITERS = int(os.getenv('STATUS_MAX_WAITERS', str(int(os.getenv('GUNICORN_THREADS', '32')) // 4)))
+
+# Deployment status shared by all worker processes (see STATUS_STORE)
+deployments = create_status_store()
+status_waiters = threading.BoundedSemaphore(STATUS_MAX_WAITERS)
 
 class AppGenerator:
     """Generates web applications based on task briefs"""
-    
-    @staticmethod
-    def generate_app(brief, attachments=None):
-        """Generate application code based on the brief"""
-        brief_lower = brief.lower()
-        
-        if any(word in brief_lower for word in ['calculator', 'calc', 'math']):
-            return AppGenerator._generate_calculator()
-        elif any(word in brief_lower for word in ['counter', 'count', 'increment']):
-            return AppGenerator._generate_counter()
-        elif any(word in brief_lower for word in ['todo', 'task', 'checklist']):
-            return AppGenerator._generate_todo()
-        elif any(word in brief_lower for word in ['timer', 'stopwatch', 'countdown']):
-            return AppGenerator._generate_timer()
-        elif any(word in brief_lower for word in ['markdown', 'md', 'convert']):
-            return AppGenerator._generate_markdown_editor()
-        elif any(word in brief_lower for word in ['github', 'user', 'profile']):
-            return AppGenerator._generate_github_lookup()
-        else:
-            return AppGenerator._generate_default_app(brief)
-
-    @staticmethod
-    def _generate_calculator():
-        return {
-            'index.html': '''<!DOCTYPE html>
-<html lang="en">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>Calculator App</title>
-    <link href="https://cdn.jsdelivr.net/npm/bootstrap@5.3.0/dist/css/bootstrap.min.css" rel="stylesheet">
-    <style>
-        .calculator { max-width: 400px; margin: 50px auto; }
-        .display { font-size: 2rem; text-align: right; padding: 20px; background: #f8f9fa; border: 1px solid #dee2e6; }
-        .btn { font-size: 1.2rem; padding: 15px; }
-    </style>
-</head>
-<body>
-    <div class="container">
-        <div class="calculator">
-            <h1 class="text-center mb-4">Calculator</h1>
-            <input type="text" class="form-control display mb-3" id="display" readonly>
-            <div class="row g-2">
-                <div class="col-3"><button class="btn btn-danger w-100" onclick="clearDisplay()">C</button></div>
-                <div class="col-3"><button class="btn btn-secondary w-100" onclick="appendToDisplay('/')">/</button></div>
-                <div class="col-3"><button class="btn btn-secondary w-100" onclick="appendToDisplay('*')">×</button></div>
-                <div class="col-3"><button class="btn btn-secondary w-100" onclick="appendToDisplay('-')">-</button></div>
-                
-                <div class="col-3"><button class="btn btn-outline-primary w-100" onclick="appendToDisplay('7')">7</button></div>
-                <div class="col-3"><button class="btn btn-outline-primary w-100" onclick="appendToDisplay('8')">8</button></div>
-                <div class="col-3"><button class="btn btn-outline-primary w-100" onclick="appendToDisplay('9')">9</button></div>
-                <div class="col-3"><button class="btn btn-secondary w-100" onclick="appendToDisplay('+')">+</button></div>
-                
-                <div class="col-3"><button class="btn btn-outline-primary w-100" onclick="appendToDisplay('4')">4</button></div>
-                <div class="col-3"><button class="btn btn-outline-primary w-100" onclick="appendToDisplay('5')">5</button></div>
-                <div class="col-3"><button class="btn btn-outline-primary w-100" onclick="appendToDisplay('6')">6</button></div>
-                <div class="col-3"><button class="btn btn-success w-100" onclick="calculate()" style="height: 100%">=</button></div>
-                
-                <div class="col-3"><button class="btn btn-outline-primary w-100" onclick="appendToDisplay('1')">1</button></div>
-                <div class="col-3"><button class="btn btn-outline-primary w-100" onclick="appendToDisplay('2')">2</button></div>
-                <div class="col-3"><button class="btn btn-outline-primary w-100" onclick="appendToDisplay('3')">3</button></div>
-                <div class="col-3"><button class="btn btn-outline-primary w-100" onclick="appendToDisplay('0')">0</button></div>
-                
-                <div class="col-6"><button class="btn btn-outline-primary w-100" onclick="appendToDisplay('00')">00</button></div>
-                <div class="col-6"><button class="btn btn-outline-primary w-100" onclick="appendToDisplay('.')">.</button></div>
-            </div>
-        </div>
-    </div>
-
-    <script>
-        const display = document.getElementById('display');
-        
-        function appendToDisplay(value) {
-            display.value += value;
-        }
-        
-        function clearDisplay() {
-            display.value = '';
-        }
-        
-        function calculate() {
-            try {
-                display.value = eval(display.value.replace('×', '*'));
-            } catch (error) {
-                display.value = 'Error';
-            }
-        }
-        
-        // Keyboard support
-        document.addEventListener('keydown', function(event) {
-            if (event.key >= '0' && event.key <= '9') appendToDisplay(event.key);
-            else if (['+', '-', '*', '/', '.'].includes(event.key)) appendToDisplay(event.key);
-            else if (event.key === 'Enter') calculate();
-            else if (event.key === 'Escape') clearDisplay();
-        });
-    </script>
-</body>
-</html>''',
-            'README.md': '''# Calculator App
-
-A responsive calculator web application built with Bootstrap.
-
-## Features
-- Basic arithmetic operations
-- Keyboard support
-- Responsive design
-- Error handling
-
-## Usage
-Click the buttons or use your keyboard to perform calculations.
-
-## License
-MIT License
-''',
-            'LICENSE': AppGenerator._get_mit_license()
-        }
-
-    @staticmethod
-    def _generate_counter():
-        return {
-            'index.html': '''<!DOCTYPE html>
-<html lang="en">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>Counter App</title>
-    <link href="https://cdn.jsdelivr.net/npm/bootstrap@5.3.0/dist/css/bootstrap.min.css" rel="stylesheet">
-    <style>
-        body { background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); min-height: 100vh; }
-        .counter { background: white; border-radius: 15px; box-shadow: 0 10px 30px rgba(0,0,0,0.2); }
-    </style>
-</head>
-<body class="d-flex align-items-center">
-    <div class="container">
-        <div class="counter text-center p-5">
-            <h1 class="mb-4">Counter App</h1>
-            <div class="display-1 fw-bold text-primary mb-4" id="count">0</div>
-            <div class="btn-group" role="group">
-                <button class="btn btn-danger btn-lg" onclick="changeCount(-1)">-1</button>
-                <button class="btn btn-secondary btn-lg" onclick="resetCount()">Reset</button>
-                <button class="btn btn-success btn-lg" onclick="changeCount(1)">+1</button>
-            </div>
-        </div>
-    </div>
-
-    <script>
-        let count = 0;
-        const countElement = document.getElementById('count');
-        
-        function updateDisplay() {
-            countElement.textContent = count;
-            document.title = `Counter: ${count}`;
-        }
-        
-        function changeCount(value) {
-            count += value;
-            updateDisplay();
-        }
-        
-        function resetCount() {
-            count = 0;
-            updateDisplay();
-        }
-        
-        updateDisplay();
-    </script>
-</body>
-</html>''',
-            'README.md': '''# Counter App
-
-A simple counter application with increment, decrement, and reset functionality.
-
-## Features
-- Beautiful gradient background
-- Responsive design
-- Real-time display updates
-
-## Usage
-Click the buttons to change the counter value.
-
-## License
-MIT License
-''',
-            'LICENSE': AppGenerator._get_mit_license()
-        }
 
-    @staticmethod
-    def _generate_todo():
-        return {
-            'index.html': '''<!DOCTYPE html>
-<html lang="en">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>Todo List</title>
-    <link href="https://cdn.jsdelivr.net/npm/bootstrap@5.3.0/dist/css/bootstrap.min.css" rel="stylesheet">
-    <style>
-        .completed { text-decoration: line-through; opacity: 0.6; }
-        .todo-item { transition: all 0.3s ease; }
-    </style>
-</head>
-<body>
-    <div class="container mt-5">
-        <div class="row justify-content-center">
-            <div class="col-md-6">
-                <h1 class="text-center mb-4">Todo List</h1>
-                <div class="input-group mb-3">
-                    <input type="text" class="form-control" id="todoInput" placeholder="Enter a new task...">
-                    <button class="btn btn-primary" onclick="addTodo()">Add Task</button>
-                </div>
-                <div id="todoList"></div>
-            </div>
-        </div>
-    </div>
-
-    <script>
-        let todos = JSON.parse(localStorage.getItem('todos')) || [];
-        
-        function renderTodos() {
-            const todoList = document.getElementById('todoList');
-            todoList.innerHTML = '';
-            
-            todos.forEach((todo, index) => {
-                const todoItem = document.createElement('div');
-                todoItem.className = 'todo-item d-flex justify-content-between align-items-center p-2 border-bottom';
-                todoItem.innerHTML = `
-                    <div class="form-check">
-                        <input class="form-check-input" type="checkbox" ${todo.completed ? 'checked' : ''} 
-                               onchange="toggleTodo(${index})" id="todo-${index}">
-                        <label class="form-check-label ${todo.completed ? 'completed' : ''}" for="todo-${index}">
-                            ${todo.text}
-                        </label>
-                    </div>
-                    <button class="btn btn-sm btn-outline-danger" onclick="deleteTodo(${index})">Delete</button>
-                `;
-                todoList.appendChild(todoItem);
-            });
-            
-            localStorage.setItem('todos', JSON.stringify(todos));
-        }
-        
-        function addTodo() {
-            const input = document.getElementById('todoInput');
-            const text = input.value.trim();
-            
-            if (text) {
-                todos.push({ text, completed: false });
-                input.value = '';
-                renderTodos();
-            }
-        }
-        
-        function toggleTodo(index) {
-            todos[index].completed = !todos[index].completed;
-            renderTodos();
-        }
-        
-        function deleteTodo(index) {
-            todos.splice(index, 1);
-            renderTodos();
-        }
-        
-        document.getElementById('todoInput').addEventListener('keypress', function(e) {
-            if (e.key === 'Enter') addTodo();
-        });
-        
-        renderTodos();
-    </script>
-</body>
-</html>''',
-            'README.md': '''# Todo List App
-
-A feature-rich todo list application with local storage persistence.
-
-## Features
-- Add, delete, and mark tasks as complete
-- Persistent storage using localStorage
-- Clean and modern interface
-- Keyboard support
-
-## Usage
-1. Type a task and press Enter or click "Add Task"
-2. Check tasks to mark as complete
-3. Click Delete to remove tasks
-
-## License
-MIT License
-''',
-            'LICENSE': AppGenerator._get_mit_license()
-        }
+    classifier = create_classifier(GENERATOR_SELECTOR, template_registry, default='default',
+                                   min_score=GENERATOR_MIN_SCORE)
 
-    @staticmethod
-    def _generate_timer():
-        return {
-            'index.html': '''<!DOCTYPE html>
-<html lang="en">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>Timer App</title>
-    <link href="https://cdn.jsdelivr.net/npm/bootstrap@5.3.0/dist/css/bootstrap.min.css" rel="stylesheet">
-    <style>
-        body { background: linear-gradient(135deg, #ff6b6b 0%, #feca57 100%); min-height: 100vh; }
-        .timer { background: white; border-radius: 15px; box-shadow: 0 10px 30px rgba(0,0,0,0.2); }
-        .time-display { font-family: 'Courier New', monospace; }
-    </style>
-</head>
-<body class="d-flex align-items-center">
-    <div class="container">
-        <div class="timer text-center p-5">
-            <h1 class="mb-4">Timer</h1>
-            <div class="time-display display-1 fw-bold mb-4" id="display">00:00</div>
-            
-            <div class="row mb-4">
-                <div class="col">
-                    <label class="form-label">Minutes</label>
-                    <input type="number" class="form-control text-center" id="minutes" value="1" min="0">
-                </div>
-                <div class="col">
-                    <label class="form-label">Seconds</label>
-                    <input type="number" class="form-control text-center" id="seconds" value="0" min="0" max="59">
-                </div>
-            </div>
-            
-            <div class="btn-group" role="group">
-                <button class="btn btn-success btn-lg" onclick="startTimer()">Start</button>
-                <button class="btn btn-warning btn-lg" onclick="pauseTimer()">Pause</button>
-                <button class="btn btn-danger btn-lg" onclick="resetTimer()">Reset</button>
-            </div>
-        </div>
-    </div>
-
-    <script>
-        let totalSeconds = 0;
-        let timerInterval = null;
-        let isRunning = false;
-        
-        const display = document.getElementById('display');
-        const minutesInput = document.getElementById('minutes');
-        const secondsInput = document.getElementById('seconds');
-        
-        function updateDisplay() {
-            const minutes = Math.floor(totalSeconds / 60);
-            const seconds = totalSeconds % 60;
-            display.textContent = `${minutes.toString().padStart(2, '0')}:${seconds.toString().padStart(2, '0')}`;
-            document.title = `Timer: ${display.textContent}`;
-        }
-        
-        function startTimer() {
-            if (isRunning) return;
-            
-            if (totalSeconds === 0) {
-                const minutes = parseInt(minutesInput.value) || 0;
-                const seconds = parseInt(secondsInput.value) || 0;
-                totalSeconds = minutes * 60 + seconds;
-            }
-            
-            if (totalSeconds > 0) {
-                isRunning = true;
-                timerInterval = setInterval(() => {
-                    totalSeconds--;
-                    updateDisplay();
-                    
-                    if (totalSeconds <= 0) {
-                        clearInterval(timerInterval);
-                        isRunning = false;
-                        alert('Timer finished!');
-                    }
-                }, 1000);
-            }
-        }
-        
-        function pauseTimer() {
-            if (isRunning) {
-                clearInterval(timerInterval);
-                isRunning = false;
-            }
-        }
-        
-        function resetTimer() {
-            clearInterval(timerInterval);
-            isRunning = false;
-            totalSeconds = 0;
-            updateDisplay();
-            minutesInput.value = 1;
-            secondsInput.value = 0;
-        }
-        
-        updateDisplay();
-    </script>
-</body>
-</html>''',
-            'README.md': '''# Timer App
-
-A countdown timer application with start, pause, and reset functionality.
-
-## Features
-- Customizable timer duration
-- Visual countdown display
-- Alert when timer completes
-- Beautiful gradient background
-
-## Usage
-1. Set minutes and seconds
-2. Click Start to begin countdown
-3. Use Pause to stop temporarily
-4. Use Reset to clear
-
-## License
-MIT License
-''',
-            'LICENSE': AppGenerator._get_mit_license()
-        }
+    # Part of every generation cache key: output changes whenever templates or scoring do
+    # (min_score is GENERATOR_MIN_SCORE or SIMILARITY_MIN_SCORE, whichever the selector uses)
+    VERSION = f"{template_registry.version}:{GENERATOR_SELECTOR}:{classifier.min_score}"
 
-    @staticmethod
-    def _generate_markdown_editor():
-        return {
-            'index.html': '''<!DOCTYPE html>
-<html lang="en">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>Markdown Editor</title>
-    <link href="https://cdn.jsdelivr.net/npm/bootstrap@5.3.0/dist/css/bootstrap.min.css" rel="stylesheet">
-    <script src="https://cdn.jsdelivr.net/npm/marked/marked.min.js"></script>
-    <script src="https://cdn.jsdelivr.net/npm/highlight.js@11.7.0/lib/highlight.min.js"></script>
-    <link rel="stylesheet" href="https://cdn.jsdelivr.net/npm/highlight.js@11.7.0/styles/github.min.css">
-    <style>
-        .editor-container { height: 400px; }
-        textarea, #preview { height: 100%; font-family: 'Monaco', 'Menlo', monospace; }
-        #preview { overflow-y: auto; padding: 15px; border: 1px solid #dee2e6; border-radius: 0.375rem; }
-    </style>
-</head>
-<body>
-    <div class="container mt-5">
-        <h1 class="text-center mb-4">Markdown Editor</h1>
-        <div class="row editor-container">
-            <div class="col-md-6">
-                <textarea class="form-control" id="markdown-input" placeholder="Enter your markdown here..."># Welcome
-**This is a markdown editor**
-
-- Feature 1
-- Feature 2
-- Feature 3
-
-`console.log("Hello World");`</textarea>
-            </div>
-            <div class="col-md-6">
-                <div id="preview"></div>
-            </div>
-        </div>
-    </div>
-
-    <script>
-        const input = document.getElementById('markdown-input');
-        const preview = document.getElementById('preview');
-        
-        function updatePreview() {
-            const markdown = input.value;
-            preview.innerHTML = marked.parse(markdown);
-            preview.querySelectorAll('pre code').forEach((block) => {
-                hljs.highlightElement(block);
-            });
-        }
-        
-        input.addEventListener('input', updatePreview);
-        updatePreview();
-    </script>
-</body>
-</html>''',
-            'README.md': '''# Markdown Editor
-
-A real-time Markdown editor with live preview and syntax highlighting.
-
-## Features
-- Live Markdown preview
-- Syntax highlighting for code blocks
-- Split-pane editor
-- Bootstrap styling
-
-## Usage
-Type Markdown in the left pane and see the rendered HTML in the right pane.
-
-## License
-MIT License
-''',
-            'LICENSE': AppGenerator._get_mit_license()
-        }
+    templates = TemplateGenerator(classifier, template_registry, VERSION)
+    llm = LLMGenerator()
 
     @staticmethod
-    def _generate_github_lookup():
-        return {
-            'index.html': '''<!DOCTYPE html>
-<html lang="en">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>GitHub User Lookup</title>
-    <link href="https://cdn.jsdelivr.net/npm/bootstrap@5.3.0/dist/css/bootstrap.min.css" rel="stylesheet">
-</head>
-<body>
-    <div class="container mt-5">
-        <h1 class="text-center mb-4">GitHub User Lookup</h1>
-        <div class="row justify-content-center">
-            <div class="col-md-6">
-                <form id="github-form" class="mb-4">
-                    <div class="input-group">
-                        <input type="text" class="form-control" id="username" placeholder="Enter GitHub username" required>
-                        <button type="submit" class="btn btn-primary">Search</button>
-                    </div>
-                </form>
-                <div id="result" class="text-center"></div>
-            </div>
-        </div>
-    </div>
-
-    <script>
-        const form = document.getElementById('github-form');
-        const result = document.getElementById('result');
-        
-        form.addEventListener('submit', async (e) => {
-            e.preventDefault();
-            const username = document.getElementById('username').value.trim();
-            
-            if (!username) return;
-            
-            result.innerHTML = '<div class="spinner-border" role="status"><span class="visually-hidden">Loading...</span></div>';
-            
-            try {
-                const response = await fetch(`https://api.github.com/users/${username}`);
-                if (!response.ok) throw new Error('User not found');
-                
-                const user = await response.json();
-                
-                result.innerHTML = `
-                    <div class="card">
-                        <div class="card-body">
-                            <img src="${user.avatar_url}" class="rounded-circle mb-3" width="100" height="100">
-                            <h3>${user.name || user.login}</h3>
-                            <p>${user.bio || 'No bio available'}</p>
-                            <div class="row text-center">
-                                <div class="col">
-                                    <strong>${user.public_repos}</strong><br>Repos
-                                </div>
-                                <div class="col">
-                                    <strong>${user.followers}</strong><br>Followers
-                                </div>
-                                <div class="col">
-                                    <strong>${user.following}</strong><br>Following
-                                </div>
-                            </div>
-                            <a href="${user.html_url}" target="_blank" class="btn btn-outline-primary mt-3">View Profile</a>
-                        </div>
-                    </div>
-                `;
-            } catch (error) {
-                result.innerHTML = `<div class="alert alert-danger">User not found. Please check the username.</div>`;
-            }
-        });
-    </script>
-</body>
-</html>''',
-            'README.md': '''# GitHub User Lookup
-
-A simple application to look up GitHub user profiles.
-
-## Features
-- Search GitHub users by username
-- Display user information and statistics
-- Responsive design with Bootstrap
-
-## Usage
-Enter a GitHub username and click Search to view profile information.
-
-## License
-MIT License
-''',
-            'LICENSE': AppGenerator._get_mit_license()
-        }
+    def generate_app(brief, attachments=None, on_file=None, previous=None):
+        """Generate application code based on the brief
+
+        ``previous`` ({path: text} pushed by the last round) lets backends
+        that can edit produce a revision instead of a fresh app. The returned
+        files carry ``metrics`` (backend, timings, tokens) for the deployment
+        record. With GENERATOR_BACKEND=llm, any LLM failure or timeout falls
+        back to the templates.
+        """
+        started = time.perf_counter()
+        brief = normalize_brief(brief)
+        names = [attachment.name for attachment in attachments or () if attachment.name]
+        files = fallback = None
+        if GENERATOR_BACKEND == 'llm':
+            try:
+                files = AppGenerator._generate(AppGenerator.llm, brief, names, on_file, previous)
+            except GenerationError as e:
+                print(f"⚠️  LLM generation failed, using templates: {str(e)}")
+                fallback = str(e)
+        if files is None:
+            files = AppGenerator._generate(AppGenerator.templates, brief, names, on_file, previous)
+            if GENERATOR_BACKEND == 'llm':
+                files.metrics['fallback'] = fallback
+        files.metrics['total_ms'] = round((time.perf_counter() - started) * 1000, 1)
+        if attachments:
+            AppGenerator._add_attachments(files, attachments)
+        return files
 
     @staticmethod
-    def _generate_default_app(brief):
-        return {
-            'index.html': f'''<!DOCTYPE html>
-<html lang="en">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>Generated App</title>
-    <link href="https://cdn.jsdelivr.net/npm/bootstrap@5.3.0/dist/css/bootstrap.min.css" rel="stylesheet">
-    <style>
-        body { background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); min-height: 100vh; }
-        .app-container {{ background: white; border-radius: 15px; box-shadow: 0 10px 30px rgba(0,0,0,0.2); }}
-    </style>
-</head>
-<body class="d-flex align-items-center">
-    <div class="container">
-        <div class="app-container text-center p-5">
-            <h1 class="mb-4">🚀 Your Generated App</h1>
-            <p class="lead mb-4">This application was automatically generated based on your request.</p>
-            
-            <div class="alert alert-info mb-4">
-                <strong>Original Request:</strong><br>
-                "{brief}"
-            </div>
-            
-            <div class="row text-start mb-4">
-                <div class="col-md-6">
-                    <h5>Features Included:</h5>
-                    <ul>
-                        <li>Responsive Design</li>
-                        <li>Modern UI/UX</li>
-                        <li>Bootstrap 5</li>
-                        <li>Cross-browser Compatible</li>
-                    </ul>
-                </div>
-                <div class="col-md-6">
-                    <h5>Next Steps:</h5>
-                    <ul>
-                        <li>Customize the code</li>
-                        <li>Add your features</li>
-                        <li>Deploy to your server</li>
-                    </ul>
-                </div>
-            </div>
-            
-            <button class="btn btn-primary btn-lg" onclick="showAlert()">Get Started</button>
-        </div>
-    </div>
-
-    <script>
-        function showAlert() {{
-            alert('Your app is ready! Feel free to customize it.');
-        }}
-    </script>
-</body>
-</html>''',
-            'README.md': f'''# Generated Application
-
-This application was automatically generated based on the request: "{brief}"
-
-## Features
-- Modern, responsive design
-- Bootstrap 5 integration
-- Clean and professional interface
-- Easy to customize
-
-## Getting Started
-Open `index.html` in your web browser to view the application.
-
-## Customization
-Feel free to modify the code to add your specific features and functionality.
-
-## License
-MIT License
-''',
-            'LICENSE': AppGenerator._get_mit_license()
-        }
+    def _generate(backend, brief, attachment_names, on_file, previous):
+        # Identical briefs (across tasks, or repeated in round 2) reuse one rendering
+        llm = backend is AppGenerator.llm
+        prompt = brief
+        if llm and attachment_names:
+            prompt += f"\0{'/'.join(attachment_names)}"
+        if llm and previous:
+            # Shared files (LICENSE) are added back afterwards; no need to send them to the model
+            previous = {path: content for path, content in previous.items() if path not in SHARED_FILES}
+            previous = asset_optimizer.restore(previous)  # the model edits the page, not its inlined CSS
+            prompt += f"\0{tree_digest(previous)}"
+        key = generation_cache.key(f"{backend.version}:{asset_optimizer.version}", prompt)
+        files = generation_cache.get(key)
+        if files is not None:
+            print("♻️  Reusing cached generation for this brief")
+            files.metrics = {'backend': backend.name, 'cached': True}
+            return files
+        if previous:
+            generated, generator, metrics = backend.revise(brief, previous, attachment_names, on_file)
+        else:
+            generated, generator, metrics = backend.generate(brief, attachment_names, on_file)
+        if llm:
+            for name, compiled in template_registry.get('default').files.items():
+                if name in SHARED_FILES and name not in generated:
+                    generated[name] = compiled.render({})
+        started = time.perf_counter()
+        generated = asset_optimizer.optimize(generated)
+        metrics = dict(metrics, optimize_ms=round((time.perf_counter() - started) * 1000, 2))
+        files = generation_cache.put(key, generated, generator)
+        files.metrics = metrics
+        return files
 
     @staticmethod
-    def _get_mit_license():
-        return '''MIT License
-
-Copyright (c) 2024 LLM Generated App
-
-Permission is hereby granted, free of charge, to any person obtaining a copy
-of this software and associated documentation files (the "Software"), to deal
-in the Software without restriction, including without limitation the rights
-to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
-copies of the Software, and to permit persons to whom the Software is
-furnished to do so, subject to the following conditions:
-
-The above copyright notice and this permission notice shall be included in all
-copies or substantial portions of the Software.
-
-THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
-IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
-FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
-AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
-LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
-OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
-SOFTWARE.'''
+    def _add_attachments(files, attachments):
+        """Ship attachments in the repo root as memory-mapped views of the spooled files"""
+        for i, attachment in enumerate(attachments):
+            name = ''.join(ch for ch in attachment.name or '' if ch.isprintable())  # no newlines in git paths
+            name = os.path.basename(name.replace('\\', '/')).lstrip('.') or f"attachment-{i + 1}"
+            if name in files:
+                print(f"⚠️  Attachment {name} would replace a generated file, skipping it")
+                continue
+            content = attachment.memoryview()
+            files[name] = content
+            files.blob_shas[name] = git_blob_sha(content)
+            files.attachments.add(name)
+            print(f"📎 Added attachment {name} ({attachment.size} bytes)")
+
+
+class GitHubManager(DeploymentBackend):
+    """Manages GitHub repository operations"""
 
+    name = 'github'
+    tracks_pages = True
 
-class GitHubManager:
-    """Manages GitHub repository operations"""
-    
     def __init__(self):
         self.github_token = os.getenv('GITHUB_TOKEN')
         if not self.github_token:
             raise ValueError("GitHub token not configured")
-        self.g = Github(self.github_token)
-        self.user = self.g.get_user()
+        # Shared per-process client; every worker thread and blob upload may hold a socket
+        pool_size = GITHUB_POOL_SIZE or DEPLOY_WORKERS * GITHUB_BLOB_CONCURRENCY
+        self.g = github_clients.client(self.github_token, GITHUB_API_URL, pool_size)
+        self.user = self.g.get_user()  # lazy: only fetched if an attribute is read
+        self._pool_size = pool_size
+
+    @property
+    def login(self):
+        return github_clients.login(self.github_token, GITHUB_API_URL, self._pool_size)
+
+    def pages_url(self, repo_name):
+        return PAGES_URL_TEMPLATE.format(login=self.login, repo=repo_name)
+
+    def get_latest_pages_build(self, repo_name):
+        """Latest Pages build for one of our repositories, or None if there is none yet"""
+        repo = self.g.get_repo(f"{self.login}/{repo_name}", lazy=True)
+        try:
+            _, build = repo._requester.requestJsonAndCheck("GET", f"{repo.url}/pages/builds/latest")
+        except GithubException as e:
+            if e.status == 404:
+                return None
+            raise
+        return build
 
     def create_repository(self, task_id, app_files, email):
         """Create a new repository and deploy app files"""
         try:
             # Create unique repo name
-            repo_name = f"llm-app-{task_id}".lower().replace('_', '-')
+            repo_name = repository_name(task_id)
             
-            # Create repository
-            repo = self.user.create_repo(
-                name=repo_name,
-                description=f"LLM-generated app for {task_id}",
-                private=False,
-                auto_init=False,
-                license_template="mit"
-            )
-            print(f"✅ Repository created: {repo.html_url}")
-
-            # Create files
+            description = f"LLM-generated app for {task_id}"
             commit_message = f"Initial commit for {task_id}"
-            for filename, content in app_files.items():
-                repo.create_file(filename, commit_message, content)
-                print(f"📁 Created file: {filename}")
 
-            # Enable GitHub Pages
-            try:
-                repo.create_pages_site(build_type="workflow", source={"branch": "main", "path": "/"})
-                print("🌐 GitHub Pages site created")
-                time.sleep(3)  # Wait for initial build
-            except GithubException as e:
-                print(f"⚠️  Pages setup might be delayed: {str(e)}")
+            # A pre-created repository (Pages already enabled) only needs renaming and one commit
+            pooled = None
+            if GITHUB_PUSH_MODE == 'git-data':
+                pooled = repo_pool.claim(lambda name, head_sha: self._adopt_pooled_repository(
+                    name, head_sha, repo_name, description))
+            template = None if pooled is not None else self._provisioning_template(app_files)
+            if pooled is not None:
+                repo, ref = pooled
+                deployment_events.publish(task_id, 'repo_created', repo_url=repo.html_url, provisioning='pool')
+                commit_sha, tree_sha = self._commit_files(repo, app_files, commit_message, ref=ref)
+            elif template is not None:
+                repo, commit_sha, tree_sha = self._generate_from_template(
+                    template, repo_name, description, app_files, commit_message
+                )
+                deployment_events.publish(task_id, 'repo_created', repo_url=repo.html_url, provisioning='template')
+            else:
+                # Create repository (the Git Data API refuses to work on an empty repository,
+                # so let GitHub make an initial commit that our commit then replaces)
+                repo = self.user.create_repo(
+                    name=repo_name,
+                    description=description,
+                    private=False,
+                    auto_init=GITHUB_PUSH_MODE == 'git-data',
+                    license_template="mit"
+                )
+                print(f"✅ Repository created: {repo.html_url}")
+                deployment_events.publish(task_id, 'repo_created', repo_url=repo.html_url, provisioning='create')
 
-            pages_url = f"https://{self.user.login}.github.io/{repo_name}"
-            commit_sha = repo.get_commits()[0].sha
+                # Create files
+                if GITHUB_PUSH_MODE == 'git-data':
+                    commit_sha, tree_sha = self._commit_files(repo, app_files, commit_message)
+                else:
+                    for filename, content in app_files.items():
+                        repo.create_file(filename, commit_message, as_file_content(content))
+                        print(f"📁 Created file: {filename}")
+                    commit_sha = repo.get_commits()[0].sha
+                    tree_sha = None
+
+            deployment_events.publish(task_id, 'files_pushed', commit_sha=commit_sha, files=len(app_files))
+
+            # Enable GitHub Pages (readiness is tracked in the background, see pages_tracker)
+            if pooled is None:
+                try:
+                    self._enable_pages(repo)
+                    print("🌐 GitHub Pages site created")
+                    deployment_events.publish(task_id, 'pages_enabled')
+                except GithubException as e:
+                    print(f"⚠️  Pages setup might be delayed: {str(e)}")
+            else:
+                deployment_events.publish(task_id, 'pages_enabled', pooled=True)
+
+            pages_url = self.pages_url(repo_name)
 
             return {
                 'success': True,
                 'repo_url': repo.html_url,
                 'pages_url': pages_url,
-                'commit_sha': commit_sha
+                'commit_sha': commit_sha,
+                'tree_sha': tree_sha
             }
 
         except GithubException as e:
+            if e.status == 422 and 'already exists' in str(e.data):
+                # A re-driven job whose earlier attempt created the repository: finish that deployment
+                print(f"♻️  Repository {repo_name} already exists, resuming its deployment")
+                return self._resume_repository(task_id, app_files, commit_message)
             error_msg = f"GitHub API error: {str(e)}"
             print(f"❌ {error_msg}")
             return {'success': False, 'error': error_msg}
 
-    def update_repository(self, task_id, brief, email):
-        """Update an existing repository"""
+    def _resume_repository(self, task_id, app_files, message):
+        """Push round 1 into the repository an earlier attempt created, and make sure Pages is on"""
+        result = self.update_repository(task_id, app_files, message)
+        if result['success']:
+            repo = self.g.get_repo(f"{self.login}/{repository_name(task_id)}", lazy=True)
+            try:
+                self._enable_pages(repo)
+                deployment_events.publish(task_id, 'pages_enabled')
+            except GithubException as e:
+                if e.status != 409:  # 409: Pages is already enabled
+                    print(f"⚠️  Pages setup might be delayed: {str(e)}")
+        return result
+
+    def provision_pool_repository(self, name):
+        """Create a placeholder repository with Pages enabled; returns its head commit SHA
+
+        Safe to retry with the same name: a repository an earlier attempt
+        created is finished instead of failing the pool row again.
+        """
         try:
-            repo_name = f"llm-app-{task_id}".lower().replace('_', '-')
-            repo = self.user.get_repo(repo_name)
-            print(f"📁 Found existing repository: {repo.html_url}")
+            repo = self.user.create_repo(
+                name=name,
+                description="Reserved for an upcoming LLM-generated app",
+                private=False,
+                auto_init=True,
+                license_template="mit"
+            )
+        except GithubException as e:
+            if e.status != 422 or 'already exists' not in str(e.data):
+                raise
+            repo = self.g.get_repo(f"{self.login}/{name}")
+        try:
+            self._enable_pages(repo)
+        except GithubException as e:
+            if e.status != 409:  # 409: Pages is already enabled
+                raise
+        return repo.get_git_ref(f"heads/{repo.default_branch or 'main'}").object.sha
+
+    def _adopt_pooled_repository(self, name, head_sha, repo_name, description):
+        """Rename a pooled repository for its task; returns (repo, default branch ref)"""
+        pool_repo = self.g.get_repo(f"{self.login}/{name}", lazy=True)
+        headers, data = pool_repo._requester.requestJsonAndCheck(
+            "PATCH", pool_repo.url, input={'name': repo_name, 'description': description}
+        )
+        repo = Repository(pool_repo._requester, headers, data, completed=True)
+        print(f"🏊 Claimed pooled repository {name} as {repo.html_url}")
+        # The pool recorded the head commit, so the ref needs no GET
+        return repo, self._branch_ref(repo, head_sha)
+
+    @staticmethod
+    def _branch_ref(repo, head_sha):
+        """Default branch ref at a head commit we already know, built without a GET"""
+        branch = repo.default_branch or 'main'
+        return GitRef(repo._requester, {}, {
+            'ref': f"refs/heads/{branch}",
+            'url': f"{repo.url}/git/refs/heads/{branch}",
+            'object': {'sha': head_sha, 'type': 'commit', 'url': f"{repo.url}/git/commits/{head_sha}"}
+        }, completed=True)
+
+    def _provisioning_template(self, app_files):
+        """Synced template repository to generate this app from, or None to create it directly"""
+        generator = getattr(app_files, 'generator', None)
+        if (ROUND1_PROVISIONING != 'template' or GITHUB_PUSH_MODE != 'git-data'
+                or not template_repositories.supports(generator)):
+            return None
+        try:
+            return template_repositories.get(self, generator)
+        except GithubException as e:
+            print(f"⚠️  Template repository for '{generator}' unavailable, creating directly: {str(e)}")
+            return None
+
+    def _generate_from_template(self, template, repo_name, description, files, message):
+        """Create a repository from a template, then commit only what differs from it
+
+        The generated repository starts with the template's exact tree, so the
+        static app files are already in place and only attachments (or other
+        per-task files) need a commit.
+        """
+        template_repo = self.g.get_repo(template.full_name, lazy=True)
+        # Posted directly: PyGithub 1.59's create_repo_from_template fetches both owners first
+        headers, data = template_repo._requester.requestJsonAndCheck(
+            "POST", f"{template_repo.url}/generate",
+            input={'owner': self.login, 'name': repo_name, 'description': description, 'private': False}
+        )
+        repo = Repository(template_repo._requester, headers, data, completed=True)
+        print(f"✅ Repository generated from {template.full_name}: {repo.html_url}")
+
+        ref = wait_for_ref(repo)
+        changed, deleted = self._diff_files(template.blobs, files)
+        if not changed and not deleted:
+            print(f"📁 Template provided all {len(files)} file(s) in {ref.object.sha[:7]}")
+            return repo, ref.object.sha, template.tree.sha
+        commit_sha, tree_sha = self._commit_files(repo, changed, message, ref=ref, base_tree=template.tree,
+                                                  deleted=deleted)
+        return repo, commit_sha, tree_sha
+
+    def _commit_files(self, repo, files, message, ref=None, base_tree=None, deleted=()):
+        """Push files as a single commit and fast-forward the default branch to it
+
+        Without base_tree the commit contains exactly ``files``; with it, the
+        files are layered over that tree and ``deleted`` paths are removed.
+        Returns (commit_sha, tree_sha).
+        """
+        if ref is None:
+            ref = repo.get_git_ref(f"heads/{repo.default_branch or 'main'}")
+        elements = self._tree_elements(repo, files)
+        elements.extend(InputGitTreeElement(path, '100644', 'blob', sha=None) for path in deleted)
+        if base_tree is None:
+            tree = repo.create_git_tree(elements)
+        else:
+            tree = repo.create_git_tree(elements, base_tree)
 
-            # Generate updated app
-            updated_files = AppGenerator.generate_app(brief)
-            commit_message = f"Round 2 update: {brief[:50]}..."
+        # Posted directly: PyGithub wants GitCommit objects for parents, which would cost a GET
+        _, commit = repo._requester.requestJsonAndCheck(
+            "POST", f"{repo.url}/git/commits",
+            input={'message': message, 'tree': tree.sha, 'parents': [ref.object.sha]}
+        )
+        ref.edit(commit['sha'])
+        print(f"📁 Committed {len(files)} file(s) in {commit['sha'][:7]}")
+        return commit['sha'], tree.sha
 
-            for filename, content in updated_files.items():
-                try:
-                    # Update existing file
-                    file_contents = repo.get_contents(filename)
-                    repo.update_file(filename, commit_message, content, file_contents.sha)
-                    print(f"📝 Updated file: {filename}")
-                except GithubException:
-                    # Create new file
-                    repo.create_file(filename, commit_message, content)
-                    print(f"📁 Created file: {filename}")
-
-            commit_sha = repo.get_commits()[0].sha
-            pages_url = f"https://{self.user.login}.github.io/{repo_name}"
+    @staticmethod
+    def _needs_upload(content):
+        return not isinstance(content, str) or len(content) > INLINE_BLOB_LIMIT
+
+    @staticmethod
+    def _tree_elements(repo, files):
+        """Build tree entries, inlining small text files and uploading the rest as blobs"""
+        elements = []
+        uploads = {}
+        for path, content in files.items():
+            if not GitHubManager._needs_upload(content):
+                elements.append(InputGitTreeElement(path, '100644', 'blob', content=content))
+            else:
+                uploads[path] = content
+
+        def upload(content):
+            if isinstance(content, str):
+                return repo.create_git_blob(content, 'utf-8').sha
+            return repo.create_git_blob(base64.b64encode(content).decode('ascii'), 'base64').sha
+
+        if uploads:
+            with ThreadPoolExecutor(max_workers=GITHUB_BLOB_CONCURRENCY) as pool:
+                for path, sha in zip(uploads, pool.map(upload, uploads.values())):
+                    elements.append(InputGitTreeElement(path, '100644', 'blob', sha=sha))
+        return elements
+
+    def publish(self, repo_name):
+        self._enable_pages(self.g.get_repo(f"{self.login}/{repo_name}", lazy=True))
+
+    @staticmethod
+    def _enable_pages(repo):
+        """Publish the default branch root with GitHub Pages"""
+        # PyGithub 1.59 has no wrapper for this endpoint
+        repo._requester.requestJsonAndCheck(
+            "POST", f"{repo.url}/pages",
+            input={'build_type': 'legacy', 'source': {'branch': repo.default_branch or 'main', 'path': '/'}}
+        )
+
+    def update_repository(self, task_id, app_files, message, base=None):
+        """Update an existing repository
+
+        With ``base`` (the pushed_files snapshot of our last push) the commit
+        is layered over the recorded tree and head, so nothing is read back
+        from GitHub; if the branch has moved since, the remote tree is
+        diffed instead. Only files the snapshot records as generated are
+        deleted when missing from app_files; attachments and anything pushed
+        by others stay.
+        """
+        try:
+            repo_name = repository_name(task_id)
+            repo = self.g.get_repo(f"{self.login}/{repo_name}")
+            print(f"📁 Found existing repository: {repo.html_url}")
+            tree_sha = None
+            owned = base.generated() if base is not None and base.backend == self.name else set()
+
+            if GITHUB_PUSH_MODE == 'git-data':
+                pushed = None
+                if base is not None and base.backend == self.name and base.tree_sha:
+                    try:
+                        pushed = self._commit_against_snapshot(repo, base, app_files, message)
+                    except GithubException as e:
+                        print(f"⚠️  Branch moved since our last push ({e.status}), diffing the remote tree")
+                if pushed is None:
+                    pushed = self._commit_changed_files(repo, app_files, message, owned)
+                commit_sha, tree_sha, api_calls = pushed
+            else:
+                for filename, content in app_files.items():
+                    try:
+                        # Update existing file
+                        file_contents = repo.get_contents(filename)
+                        repo.update_file(filename, message, as_file_content(content), file_contents.sha)
+                        print(f"📝 Updated file: {filename}")
+                    except GithubException:
+                        # Create new file
+                        repo.create_file(filename, message, as_file_content(content))
+                        print(f"📁 Created file: {filename}")
+                commit_sha = repo.get_commits()[0].sha
+                api_calls = 2 * len(app_files) + 1
+            deployment_events.publish(task_id, 'files_pushed', commit_sha=commit_sha, files=len(app_files))
+            pages_url = self.pages_url(repo_name)
 
             return {
                 'success': True,
                 'repo_url': repo.html_url,
                 'pages_url': pages_url,
-                'commit_sha': commit_sha
+                'commit_sha': commit_sha,
+                'tree_sha': tree_sha,
+                # Per-file updates cost a get_contents and an update_file each, plus get_commits
+                'api_calls': api_calls + 1,
+                'api_calls_saved': 2 * len(app_files) + 1 - api_calls
             }
 
         except GithubException as e:
             return {'success': False, 'error': f"GitHub error: {str(e)}"}
 
+    def _commit_changed_files(self, repo, files, message, owned=None):
+        """Commit only files whose content differs from the branch head
+
+        Compares locally computed blob SHAs against one recursive tree listing,
+        so unchanged files cost nothing and an identical app makes no commit.
+        Returns (commit_sha, tree_sha, api_calls) where the calls exclude get_repo.
+        """
+        ref = repo.get_git_ref(f"heads/{repo.default_branch or 'main'}")
+        head_tree = repo.get_git_tree(ref.object.sha, recursive=True)
+        api_calls = 2
+
+        remote = {item.path: item.sha for item in head_tree.tree if item.type == 'blob'}
+        commit_sha, tree_sha, calls = self._commit_delta(repo, ref, head_tree, remote, files, message, owned)
+        return commit_sha, tree_sha, api_calls + calls
+
+    def _commit_against_snapshot(self, repo, snapshot, files, message):
+        """Commit what differs from a pushed_files snapshot; (commit_sha, tree_sha, api_calls)"""
+        ref = self._branch_ref(repo, snapshot.commit_sha)
+        base_tree = GitTree(repo._requester, {}, {
+            'sha': snapshot.tree_sha, 'url': f"{repo.url}/git/trees/{snapshot.tree_sha}"
+        }, completed=True)
+        return self._commit_delta(repo, ref, base_tree, snapshot.blob_shas, files, message, snapshot.generated())
+
+    def _commit_delta(self, repo, ref, base_tree, remote, files, message, owned=None):
+        """Commit files that differ from remote {path: blob_sha} over base_tree"""
+        changed, deleted = self._diff_files(remote, files, owned)
+        if not changed and not deleted:
+            print("✅ Repository already up to date, nothing to commit")
+            return ref.object.sha, base_tree.sha, 0
+
+        api_calls = 3 + sum(1 for content in changed.values() if self._needs_upload(content))
+        commit_sha, tree_sha = self._commit_files(repo, changed, message, ref=ref, base_tree=base_tree,
+                                                  deleted=deleted)
+        print(f"📝 Changed {len(changed)} file(s), deleted {len(deleted)}, "
+              f"kept {len(files) - len(changed)} unchanged")
+        return commit_sha, tree_sha, api_calls
+
+    @staticmethod
+    def _diff_files(remote, files, owned=None):
+        """Split files against remote {path: blob_sha} into (changed, deleted paths)
+
+        Only remote paths in ``owned`` (all of them when None) are deleted.
+        """
+        local = getattr(files, 'blob_shas', {})  # precomputed by the generation cache
+        changed = {
+            path: content for path, content in files.items()
+            if remote.get(path) != (local.get(path) or git_blob_sha(content))
+        }
+        deleted = [path for path in remote if path not in files and (owned is None or path in owned)]
+        return changed, deleted
+
+
+def as_file_content(content):
+    """File content in a form PyGithub's contents API accepts (str or bytes)"""
+    return bytes(content) if isinstance(content, memoryview) else content
+
 
 class NotificationManager:
-    """Handles evaluation notifications with retry logic"""
+    """Queues evaluation notifications for the background dispatcher (see notifier)"""
     
     @staticmethod
-    def send_evaluation_notification(evaluation_url, data, max_retries=5):
-        """Send notification with exponential backoff"""
-        for attempt in range(max_retries):
-            try:
-                print(f"📤 Attempt {attempt + 1} to notify evaluation URL...")
-                
-                response = requests.post(
-                    evaluation_url,
-                    json=data,
-                    headers={'Content-Type': 'application/json'},
-                    timeout=30
-                )
-                
-                if response.status_code == 200:
-                    print("✅ Successfully notified evaluation URL")
-                    return True
-                else:
-                    print(f"⚠️  Evaluation URL returned status {response.status_code}")
-                    
-            except requests.exceptions.RequestException as e:
-                print(f"⚠️  Request failed (attempt {attempt + 1}): {str(e)}")
-            
-            # Exponential backoff
-            if attempt < max_retries - 1:
-                wait_time = 2 ** attempt
-                print(f"⏳ Waiting {wait_time} seconds before retry...")
-                time.sleep(wait_time)
-        
-        print("❌ Failed to notify evaluation URL after all retries")
-        return False
+    def key(data):
+        return f"{data['task']}:{data['round']}:{data['nonce']}"
+
+    @staticmethod
+    def send_evaluation_notification(evaluation_url, data, gate=None):
+        """Write the notification to the outbox; delivery and retries happen elsewhere
+
+        With ``gate`` ({repo_name, pages_url, commit_sha}) it is held in the
+        outbox until that Pages site serves the commit (see notification_gate_open).
+        """
+        queued = notification_dispatcher.enqueue(NotificationManager.key(data), data['task'], evaluation_url, data,
+                                                 gate=gate, hold=PAGES_READY_TIMEOUT)
+        if queued:
+            print("📬 Evaluation notification queued" + (" until Pages is live" if gate is not None else ""))
+        return queued
 
 
 def process_deployment(data):
-    """Process deployment in background thread"""
+    """Process deployment in background thread; returns the status record it stored"""
     task_id = data.get('task', 'unknown')
     round_number = data.get('round', 1)
     
     try:
         print(f"🚀 Starting deployment for task: {task_id}, round: {round_number}")
         print(f"📝 Brief: {data['brief']}")
+        deployment_events.publish(task_id, 'generating', round=round_number)
         
         # Generate app code
-        app_files = AppGenerator.generate_app(data['brief'], data.get('attachments'))
+        # Deploy (to GitHub unless DEPLOY_BACKEND says otherwise)
+        backend = deployment_backend()
+
+        # Later rounds revise what the last round pushed, as recorded locally
+        base = pushed_files.get(task_id, backend.name) if round_number != 1 else None
+        attachments = load_attachments(data.get('attachments'))
+        app_files = AppGenerator.generate_app(
+            data['brief'], attachments,
+            on_file=lambda path, content: deployment_events.publish(task_id, 'file_generated', path=path,
+                                                                    bytes=len(content)),
+            previous=pushed_files.contents(base) if base is not None else None
+        )
         print("✅ App code generated")
+        deployment_events.publish(task_id, 'generated', generator=getattr(app_files, 'generator', None),
+                                  files=len(app_files), metrics=app_files.metrics)
         
-        # Deploy to GitHub
-        github_manager = GitHubManager()
-        
+        deploy_started = time.perf_counter()
         if round_number == 1:
-            github_result = github_manager.create_repository(task_id, app_files, data['email'])
+            github_result = backend.create_repository(task_id, app_files, data['email'])
         else:
-            github_result = github_manager.update_repository(task_id, data['brief'], data['email'])
+            github_result = backend.update_repository(task_id, app_files, f"Round 2 update: {data['brief'][:50]}...",
+                                                      base=base)
+        deploy_ms = round((time.perf_counter() - deploy_started) * 1000, 1)
         
         if github_result['success']:
+            pushed_files.record(task_id, backend.name, app_files, github_result['commit_sha'],
+                                github_result.pop('tree_sha', None))
             # Store deployment info
-            deployments[task_id] = {
+            record = deployments[task_id] = {
                 'status': 'completed',
                 'round': round_number,
                 'github_result': github_result,
+                'generation': app_files.metrics,
+                'timings': {'generate_ms': app_files.metrics.get('total_ms'), 'deploy_ms': deploy_ms},
                 'timestamp': datetime.now().isoformat()
             }
+            deployment_events.publish(task_id, 'deployed', round=round_number, repo_url=github_result['repo_url'],
+                                      pages_url=github_result['pages_url'], commit_sha=github_result['commit_sha'])
             
             # Send evaluation notification
             evaluation_data = {
@@ -873,35 +622,99 @@ def process_deployment(data):
                 'commit_sha': github_result['commit_sha'],
                 'pages_url': github_result['pages_url']
             }
-            
-            if data.get('evaluation_url'):
-                print(f"📤 Sending evaluation notification to: {data['evaluation_url']}")
-                NotificationManager.send_evaluation_notification(data['evaluation_url'], evaluation_data)
+
+            def notify(gate=None):
+                if data.get('evaluation_url'):
+                    print(f"📤 Sending evaluation notification to: {data['evaluation_url']}")
+                    NotificationManager.send_evaluation_notification(data['evaluation_url'], evaluation_data, gate)
+                else:
+                    print("ℹ️  No evaluation URL provided, skipping notification")
+                    deployment_events.publish(task_id, 'notified', round=round_number, status='skipped')
+
+            repo_name = repository_name(task_id)
+            if not backend.tracks_pages:
+                # Published synchronously: the site is live once the backend returns
+                record_pages_status(task_id, {'status': 'live', 'commit_sha': github_result['commit_sha']})
+                notify()
+            elif GATE_NOTIFICATION_ON_PAGES:
+                # Held in the outbox rather than in memory, so a restart cannot lose it
+                notify(gate={'repo_name': repo_name, 'pages_url': github_result['pages_url'],
+                             'commit_sha': github_result['commit_sha']})
+                key = NotificationManager.key(evaluation_data)
+                pages_tracker.track(task_id, repo_name, github_result['pages_url'], github_result['commit_sha'],
+                                    on_ready=lambda live, seconds: notification_dispatcher.release(key))
             else:
-                print("ℹ️  No evaluation URL provided, skipping notification")
+                pages_tracker.track(task_id, repo_name, github_result['pages_url'], github_result['commit_sha'])
+                notify()
             
             print(f"✅ Deployment completed successfully!")
             print(f"🔗 Repository: {github_result['repo_url']}")
             print(f"🌐 Live URL: {github_result['pages_url']}")
             
         else:
-            deployments[task_id] = {
+            record = deployments[task_id] = {
                 'status': 'failed',
                 'round': round_number,
                 'error': github_result.get('error', 'Unknown error'),
                 'timestamp': datetime.now().isoformat()
             }
             print(f"❌ Deployment failed: {github_result.get('error')}")
+            deployment_events.publish(task_id, 'failed', round=round_number, error=record['error'])
             
     except Exception as e:
         error_msg = f"Deployment failed: {str(e)}"
         print(f"❌ {error_msg}")
-        deployments[task_id] = {
+        record = deployments[task_id] = {
             'status': 'failed',
             'round': round_number,
             'error': error_msg,
             'timestamp': datetime.now().isoformat()
         }
+        deployment_events.publish(task_id, 'failed', round=round_number, error=error_msg)
+
+    return record
+
+
+def deployment_backend():
+    """Backend for one deployment, per DEPLOY_BACKEND"""
+    if DEPLOY_BACKEND == 'github':
+        return GitHubManager()
+    return local_backend(DEPLOY_BACKEND)
+
+
+def record_pages_status(task_id, pages):
+    """Attach Pages readiness to the task's status record"""
+    deployments.update(task_id, {'pages': pages})
+    deployment_events.publish(task_id, 'pages', **pages)
+
+
+def record_notification_status(task_id, notification, payload):
+    """Attach evaluation notification delivery to the task's status record"""
+    deployments.update(task_id, {'notification': notification})
+    deployment_events.publish(task_id, 'notified', round=payload.get('round'), **notification)
+
+
+def notification_gate_open(task_id, gate):
+    """Gate check for held notifications: open once Pages serves the commit (or gave up waiting)"""
+    pages = (deployments.get(task_id) or {}).get('pages') or {}
+    if pages.get('commit_sha') == gate['commit_sha'] and pages.get('status') in ('live', 'timeout'):
+        return True
+    # Nothing is watching if the process that deployed it died; watch it from here
+    pages_tracker.track(task_id, gate['repo_name'], gate['pages_url'], gate['commit_sha'])
+    return False
+
+
+notification_dispatcher = NotificationDispatcher(on_result=record_notification_status,
+                                                 gate_check=notification_gate_open)
+notification_dispatcher.start()
+pages_tracker = PagesReadinessTracker(
+    lambda repo_name: GitHubManager().get_latest_pages_build(repo_name),
+    record_pages_status
+)
+repo_pool = RepoPool(lambda name: GitHubManager().provision_pool_repository(name))
+repo_pool.start()
+deployment_executor = DeploymentExecutor(process_deployment)
+deployment_executor.start()
 
 
 # Flask Routes
@@ -909,12 +722,12 @@ def process_deployment(data):
 def handle_deployment():
     """Main deployment endpoint"""
     try:
-        data = request.json
+        # Parsed incrementally: data-URI attachments are decoded straight to disk, and
+        # discarded before they are stored if the secret does not match
+        data = ingest_request(request.stream, request.content_length,
+                              authorize=lambda data: data.get('secret') == APP_SECRET)
         print(f"📥 Received deployment request: {data.get('task')}")
-        
-        # Verify secret
-        if data.get('secret') != APP_SECRET:
-            return jsonify({'error': 'Invalid secret'}), 401
+        repository_name(data.get('task'))  # task ids become paths; unsafe ones are rejected with 400 here
         
         # Send immediate response
         response = {
@@ -925,26 +738,113 @@ def handle_deployment():
             'timestamp': datetime.now().isoformat()
         }
         
-        # Process in background
-        thread = threading.Thread(target=process_deployment, args=(data,))
-        thread.daemon = True
-        thread.start()
+        # Process in background on the bounded worker pool
+        try:
+            submission = deployment_executor.submit(data)
+        except QueueFullError as e:
+            error_response = jsonify({
+                'error': 'Deployment queue is full, please retry later',
+                'task': data.get('task'),
+                'retry_after': e.retry_after
+            })
+            error_response.headers['Retry-After'] = str(e.retry_after)
+            return error_response, 503
+
+        if not submission.created:
+            # A retried (task, round, nonce): never deploy twice, report on the first submission
+            print(f"♻️  Duplicate submission of {data.get('task')} joined job {submission.job_id} ({submission.state})")
+            response['duplicate'] = True
+            response['job_state'] = submission.state
+            if submission.result is not None:
+                response['status'] = submission.result.get('status', 'completed')
+                response['message'] = 'Deployment already processed'
+                response['result'] = submission.result
+                return jsonify(response)
+            if submission.state == 'failed':
+                # Gave up after JOB_MAX_ATTEMPTS runs that never finished; resubmitting would only repeat that
+                response['status'] = 'failed'
+                response['message'] = 'Deployment failed'
+                response['error'] = submission.error
+                return jsonify(response)
+        response['queue_position'] = submission.position
+        if submission.created:
+            deployment_events.publish(data.get('task'), 'queued', round=response['round'],
+                                      position=submission.position)
         
         return jsonify(response)
     
+    except RequestUnauthorized:
+        return jsonify({'error': 'Invalid secret'}), 401
+    except RequestTooLarge as e:
+        return jsonify({'error': str(e)}), 413
     except Exception as e:
         return jsonify({'error': str(e)}), 400
 
 
 @app.route('/status/<task_id>', methods=['GET'])
 def get_status(task_id):
-    """Check deployment status"""
-    deployment = deployments.get(task_id)
-    if deployment:
-        return jsonify(deployment)
-    else:
+    """Check deployment status, optionally waiting for it to change
+
+    ``?wait=<seconds>&since=<version>`` long-polls: the request returns as soon
+    as the record's version differs from ``since`` (or it appears, for
+    ``since=0``), or when the wait runs out. The version comes back as the
+    ETag, so an unchanged If-None-Match poll is answered with 304. Once
+    STATUS_MAX_WAITERS polls are waiting, more are answered at once, so
+    pollers cannot take every thread from deployments and health checks.
+    """
+    etag = request.headers.get('If-None-Match', '')
+    etag = etag[2:] if etag.startswith('W/') else etag
+    etag = etag.strip('"') if etag.strip('"').isdigit() else None
+    try:
+        wait = min(float(request.args.get('wait', 0)), STATUS_MAX_WAIT)
+        since = int(request.args.get('since') or etag or -1)
+    except ValueError:
+        return jsonify({'error': 'wait must be seconds and since a status version'}), 400
+
+    # Forward the stored JSON as-is; this endpoint is polled hard
+    current = deployments.get_versioned(task_id)
+    if wait > 0 and (current[0] if current else 0) == since and status_waiters.acquire(blocking=False):
+        try:
+            current = deployments.wait_for_change(task_id, since, wait)
+        finally:
+            status_waiters.release()
+    if current is None:
         return jsonify({'error': 'Task not found'}), 404
 
+    version, deployment = current
+    headers = {'ETag': f'"{version}"', 'X-Status-Version': str(version), 'Cache-Control': 'no-cache'}
+    if etag == str(version):
+        return Response(status=304, headers=headers)
+    return Response(deployment, mimetype='application/json', headers=headers)
+
+
+@app.route('/status/<task_id>/events', methods=['GET'])
+def stream_status_events(task_id):
+    """Stream deployment stages as Server-Sent Events
+
+    Without Last-Event-ID the stream replays the latest round (or ``?round=``)
+    and ends when that round does.
+    """
+    # EventSource reconnects send Last-Event-ID; ?since= lets plain clients resume too
+    after = request.headers.get('Last-Event-ID') or request.args.get('since')
+    round_number = request.args.get('round')
+    try:
+        after = int(after) if after else None
+        round_number = int(round_number) if round_number else None
+    except ValueError:
+        return jsonify({'error': 'Last-Event-ID / since must be an event id and round a number'}), 400
+    if not deployment_events.known(task_id) and deployments.get_raw(task_id) is None:
+        return jsonify({'error': 'Task not found'}), 404
+    try:
+        events = deployment_events.open_stream(task_id, after, round_number)
+    except TooManyStreams:
+        return jsonify({'error': 'Too many open event streams; poll /status instead'}), 503, {'Retry-After': '5'}
+    return Response(
+        events,
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
 
 @app.route('/health', methods=['GET'])
 def health_check():
@@ -952,7 +852,15 @@ def health_check():
     return jsonify({
         'status': 'healthy',
         'timestamp': datetime.now().isoformat(),
-        'github_configured': bool(GITHUB_TOKEN)
+        'github_configured': bool(GITHUB_TOKEN),
+        'executor': deployment_executor.stats(),
+        'github_rate_limit': github_scheduler.stats(),
+        'notifications': notification_dispatcher.stats(),
+        'generation_cache': generation_cache.stats(),
+        'asset_optimizer': asset_optimizer.stats(),
+        'generator': {'backend': GENERATOR_BACKEND, 'llm': AppGenerator.llm.stats()},
+        'repo_pool': repo_pool.stats(),
+        'events': deployment_events.stats()
     })
 
 
@@ -964,6 +872,7 @@ def home():
         'endpoints': {
             'POST /': 'Submit deployment request',
             'GET /status/<task_id>': 'Check deployment status',
+            'GET /status/<task_id>/events': 'Stream deployment stages (Server-Sent Events)',
             'GET /health': 'Health check'
         },
         'github_configured': bool(GITHUB_TOKEN)
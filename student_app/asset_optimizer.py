@@ -0,0 +1,542 @@
+import argparse
+import base64
+import hashlib
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+
+from generation_cache import GeneratedFiles
+
+# Configuration
+ASSET_OPTIMIZATION = os.getenv('ASSET_OPTIMIZATION', 'true').lower() == 'true'
+# Vendored Bootstrap stylesheet the generated pages link to; purged per page and inlined, never fetched by pages
+ASSET_BOOTSTRAP_CSS = os.getenv('ASSET_BOOTSTRAP_CSS', os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), 'vendor', 'bootstrap-5.3.0.min.css'))
+# Download the pinned stylesheet (integrity-checked) into ASSET_BOOTSTRAP_CSS at startup when it is missing
+ASSET_BOOTSTRAP_FETCH = os.getenv('ASSET_BOOTSTRAP_FETCH', 'true').lower() == 'true'
+ASSET_CACHE_BYTES = int(os.getenv('ASSET_CACHE_BYTES', str(16 * 1024 * 1024)))
+
+# The stylesheet the templates link to, and its published Subresource Integrity hash
+BOOTSTRAP_URL = 'https://cdn.jsdelivr.net/npm/bootstrap@5.3.0/dist/css/bootstrap.min.css'
+BOOTSTRAP_INTEGRITY = 'sha384-9ndCyUaIbzAi2FUVXJi0CjmCapSmO7SnpJef0486qhLnuZ2cdeRhO02iuK6FUUVM'
+
+VERSION = '2'  # bump whenever a stage's output changes, so cached generations are redone
+BOOTSTRAP_HREF = re.compile(r'^https://cdn\.jsdelivr\.net/npm/bootstrap@5\.3\.0/dist/css/bootstrap(?:\.min)?\.css$')
+# Classes Bootstrap's own JavaScript adds at runtime, kept for pages that load it
+SAFELIST = frozenset(
+    'active show showing hiding collapsing fade disabled was-validated is-valid is-invalid modal-open '
+    'modal-backdrop offcanvas-backdrop modal-static tooltip tooltip-arrow tooltip-inner bs-tooltip-auto '
+    'popover popover-arrow popover-header popover-body bs-popover-auto carousel-item-next carousel-item-prev '
+    'carousel-item-start carousel-item-end'.split()
+)
+
+TOKEN = re.compile(r'[A-Za-z0-9_-]+')
+TAG = re.compile(r'<[^>"\']*(?:(?:"[^"]*"|\'[^\']*\')[^>"\']*)*>')
+TAG_NAME = re.compile(r'^\s*[\w-]+')
+ATTRIBUTE = re.compile(r'([^\s=/>]+)(?:\s*=\s*(?:"([^"]*)"|\'([^\']*)\'|([^\s>]+)))?')
+LINK = re.compile(r'<link\b' + TAG.pattern[1:], re.I)
+SCRIPT = re.compile(r'(<script\b[^>]*>)(.*?)</script\s*>', re.S | re.I)
+BOOTSTRAP_SCRIPT = re.compile(r'<script\b[^>]*\bsrc=["\']?[^"\'>]*bootstrap[^"\'>]*\.js', re.I)
+PURGED = re.compile(r'<style data-purged="([^"]+)">.*?</style>', re.S)
+# Raw-text blocks are minified by their own rules (or kept), comments dropped, tags kept, text whitespace collapsed
+HTML_PARTS = re.compile(
+    r'(<(script|style|pre|textarea)\b[^>]*>)(.*?)(</\2\s*>)|<!--(?!\[if).*?-->|(' + TAG.pattern + r')|(\s+)',
+    re.S | re.I
+)
+
+CSS_STRING = r'"(?:\\.|[^"\\])*"|\'(?:\\.|[^\'\\])*\''
+# Strings and /*! license banners */ are kept as written; other comments go
+CSS_KEPT = rf'{CSS_STRING}|/\*!.*?\*/'
+CSS_STRING_OR_COMMENT = re.compile(rf'({CSS_KEPT})|/\*.*?\*/', re.S)
+WHITESPACE = re.compile(r'\s+')
+CSS_PUNCTUATION = re.compile(r'\s*([{};,>])\s*')
+CSS_COLON = re.compile(r':\s+')
+BACKTICK = re.compile(r'(?<!\\)`')
+
+FUNCTIONAL_PSEUDO = re.compile(r':[\w-]+\(')
+PSEUDO = re.compile(r'::?[\w-]+')
+ATTRIBUTE_SELECTOR = re.compile(r'\[\s*([\w-]+)[^\]]*\]')
+CLASS_OR_ID = re.compile(r'[.#]([\w-]+)')
+TYPE_SELECTOR = re.compile(r'(?:^|[\s>+~])([a-zA-Z][\w-]*)')
+VAR_REFERENCE = re.compile(r'var\(\s*(--[\w-]+)')
+
+
+def _attributes(tag):
+    """{name: value} of a start tag, names lower-cased"""
+    inner = TAG_NAME.sub('', tag[1:-1].rstrip('/'), 1)
+    return {
+        m.group(1).lower(): next((g for g in m.groups()[1:] if g is not None), '')
+        for m in ATTRIBUTE.finditer(inner)
+    }
+
+
+def minify_css(text):
+    """Drop comments and the whitespace CSS does not need, leaving strings and ``/*!`` banners untouched"""
+    text = CSS_STRING_OR_COMMENT.sub(lambda m: m.group(1) or ' ', text)
+    out = []
+    for i, part in enumerate(re.split(f'({CSS_KEPT})', text, flags=re.S)):
+        if i % 2:
+            out.append(part)  # a string or a banner
+        else:
+            part = WHITESPACE.sub(' ', part)
+            out.append(CSS_COLON.sub(':', CSS_PUNCTUATION.sub(r'\1', part)))
+    return ''.join(out).replace(';}', '}').strip()
+
+
+def minify_js(text):
+    """Strip indentation, blank lines and whole-line ``//`` comments; never rewrites code
+
+    Lines are kept, so automatic semicolon insertion is unaffected, and lines
+    inside a multi-line template literal are left exactly as written.
+    """
+    lines = []
+    in_template = False
+    for line in text.split('\n'):
+        if in_template:
+            lines.append(line)
+        else:
+            stripped = line.strip()
+            if not stripped or stripped.startswith('//'):
+                continue
+            lines.append(line.lstrip() if len(BACKTICK.findall(line)) % 2 else stripped)
+        in_template ^= len(BACKTICK.findall(line)) % 2 == 1
+    return '\n'.join(lines)
+
+
+def _split_top(text, separator):
+    """Split text on separator outside parentheses, brackets and strings"""
+    parts, depth, quote, start = [], 0, None, 0
+    for i, ch in enumerate(text):
+        if quote:
+            if ch == quote and text[i - 1] != '\\':
+                quote = None
+        elif ch in '"\'':
+            quote = ch
+        elif ch in '([':
+            depth += 1
+        elif ch in ')]':
+            depth -= 1
+        elif ch == separator and depth == 0:
+            parts.append(text[start:i])
+            start = i + 1
+    parts.append(text[start:])
+    return [part.strip() for part in parts if part.strip()]
+
+
+def _block_end(css, start):
+    """Index of the ``}`` closing the block opened at css[start]"""
+    depth, quote = 0, None
+    for i in range(start, len(css)):
+        ch = css[i]
+        if quote:
+            if ch == quote and css[i - 1] != '\\':
+                quote = None
+        elif ch in '"\'':
+            quote = ch
+        elif ch == '{':
+            depth += 1
+        elif ch == '}':
+            depth -= 1
+            if depth == 0:
+                return i
+    return len(css)
+
+
+def _requirements(selector):
+    """Names (classes, ids, element and attribute names) a page must contain for selector to match"""
+    plain = []
+    i = 0
+    for m in FUNCTIONAL_PSEUDO.finditer(selector):
+        if m.start() < i:
+            continue  # nested inside an argument already skipped
+        plain.append(selector[i:m.start()])
+        depth, i = 1, m.end()
+        while i < len(selector) and depth:
+            depth += {'(': 1, ')': -1}.get(selector[i], 0)
+            i += 1
+    plain.append(selector[i:])
+    selector = ''.join(plain)
+    names = set(ATTRIBUTE_SELECTOR.findall(selector))
+    selector = PSEUDO.sub('', ATTRIBUTE_SELECTOR.sub('', selector))
+    names.update(CLASS_OR_ID.findall(selector))
+    names.update(TYPE_SELECTOR.findall(CLASS_OR_ID.sub('', selector)))
+    return frozenset(names)
+
+
+def _parse_css(css):
+    """Nodes of a stylesheet: ('rule', [(selector, requirements)], [declaration]),
+    ('group', prelude, nodes) for @media/@supports/..., ('keyframes', name, text) and ('raw', text)"""
+    nodes = []
+    i = 0
+    while i < len(css):
+        if css.startswith('/*', i):
+            end = css.find('*/', i + 2)
+            end = len(css) if end < 0 else end + 2
+            nodes.append(('raw', css[i:end]))  # a license banner minify_css kept
+            i = end
+            continue
+        brace = css.find('{', i)
+        if brace < 0:
+            break
+        semicolon = css.find(';', i, brace)
+        if semicolon >= 0 and css[i:semicolon].lstrip().startswith('@'):
+            nodes.append(('raw', css[i:semicolon + 1].strip()))  # @charset, @import
+            i = semicolon + 1
+            continue
+        prelude = css[i:brace].strip()
+        end = _block_end(css, brace)
+        body = css[brace + 1:end]
+        if prelude.startswith('@'):
+            keyword = re.match(r'@([\w-]+)', prelude).group(1).lower()
+            if keyword in ('media', 'supports', 'container', 'layer'):
+                nodes.append(('group', prelude, _parse_css(body)))
+            elif keyword.endswith('keyframes'):
+                nodes.append(('keyframes', prelude.split()[-1], f"{prelude}{{{body}}}"))
+            else:
+                nodes.append(('raw', f"{prelude}{{{body}}}"))
+        elif prelude:
+            selectors = [(selector, _requirements(selector)) for selector in _split_top(prelude, ',')]
+            nodes.append(('rule', selectors, _split_top(body, ';')))
+        i = end + 1
+    return nodes
+
+
+class CSSPurger:
+    """A stylesheet parsed once, emitted per page with only the rules the page can use
+
+    A selector is kept when every class, id, element and attribute name in
+    it (outside functional pseudo-classes such as ``:not()``) occurs as a
+    word somewhere in the page, scripts included, so class names built in
+    JavaScript strings survive. Custom properties no kept rule or page
+    references (directly or through other properties) are dropped, as are
+    unused ``@keyframes``. ``vocabulary`` is every name selectors mention,
+    so pages can be keyed by the few of them they use.
+    """
+
+    def __init__(self, css):
+        self.nodes = _parse_css(minify_css(css))
+        self.vocabulary = frozenset().union(*(req for _, selectors, _ in self._rules(self.nodes)
+                                              for _, req in selectors))
+
+    def _rules(self, nodes):
+        for node in nodes:
+            if node[0] == 'rule':
+                yield node
+            elif node[0] == 'group':
+                yield from self._rules(node[2])
+
+    def purge(self, names, variables=frozenset()):
+        """CSS for a page using ``names``; ``variables`` are custom properties the page references itself"""
+        kept = self._select(self.nodes, names)
+        declarations = [d for _, _, decls in self._rules(kept) for d in decls]
+        defined = {}
+        used = set(variables)
+        for declaration in declarations:
+            name, _, value = declaration.partition(':')
+            if name.startswith('--'):
+                defined.setdefault(name, []).append(value)
+            else:
+                used.update(VAR_REFERENCE.findall(value))
+        pending = list(used)
+        while pending:
+            for value in defined.get(pending.pop(), ()):
+                for name in VAR_REFERENCE.findall(value):
+                    if name not in used:
+                        used.add(name)
+                        pending.append(name)
+        properties = ' '.join(d for d in declarations if not d.startswith('--'))
+        return ''.join(self._emit(kept, used, properties))
+
+    def _select(self, nodes, names):
+        kept = []
+        for node in nodes:
+            if node[0] == 'rule':
+                selectors = [(s, req) for s, req in node[1] if req <= names]
+                if selectors:
+                    kept.append(('rule', selectors, node[2]))
+            elif node[0] == 'group':
+                children = self._select(node[2], names)
+                if children:
+                    kept.append(('group', node[1], children))
+            else:
+                kept.append(node)
+        return kept
+
+    def _emit(self, nodes, variables, properties):
+        for node in nodes:
+            if node[0] == 'rule':
+                body = ';'.join(d for d in node[2] if not d.startswith('--') or d.partition(':')[0] in variables)
+                if body:
+                    yield f"{','.join(s for s, _ in node[1])}{{{body}}}"
+            elif node[0] == 'group':
+                inner = ''.join(self._emit(node[2], variables, properties))
+                if inner:
+                    yield f"{node[1]}{{{inner}}}"
+            elif node[0] == 'keyframes':
+                if re.search(rf'(?<![\w-]){re.escape(node[1])}(?![\w-])', properties):
+                    yield node[2]
+            else:
+                yield node[1]
+
+
+class AssetOptimizer:
+    """Post-generation stage that makes generated pages cheap to render first
+
+    Before an app is cached and pushed, HTML has comments and redundant
+    whitespace removed (``pre``/``textarea`` left alone), inline and
+    standalone CSS and JS are minified, the Bootstrap stylesheet link is
+    replaced by an inline ``<style>`` holding only the rules the page uses
+    (purged from a vendored copy, no network), and external scripts stop
+    blocking rendering: they get ``defer``, or, when a later inline script
+    may depend on them, move down next to it so execution order is kept.
+    Results are cached by content hash, and purged CSS by the set of
+    Bootstrap names a page uses, which is the same for every brief rendered
+    from one template, so repeat templates cost a dictionary lookup.
+    """
+
+    def __init__(self, bootstrap_css=ASSET_BOOTSTRAP_CSS, enabled=ASSET_OPTIMIZATION, max_bytes=ASSET_CACHE_BYTES,
+                 fetch=ASSET_BOOTSTRAP_FETCH):
+        self.enabled = enabled
+        self.bootstrap_css = bootstrap_css
+        self.max_bytes = max_bytes
+        self._purger = None
+        self._purger_lock = threading.Lock()
+        self._results = OrderedDict()  # content hash -> (optimized text or None if unchanged, size)
+        self._purged = OrderedDict()  # (names, variables) -> (purged CSS, size)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.purging = enabled and os.path.exists(bootstrap_css)
+        digest = 'no-purge'
+        if self.purging:
+            with open(bootstrap_css, 'rb') as f:
+                digest = hashlib.sha1(f.read()).hexdigest()[:12]
+        elif enabled and fetch and self._fetch():
+            self.purging = True
+            with open(bootstrap_css, 'rb') as f:
+                digest = hashlib.sha1(f.read()).hexdigest()[:12]
+        elif enabled:
+            print(f"⚠️  Vendored Bootstrap CSS not found at {bootstrap_css}; pages keep the CDN stylesheet "
+                  f"(run python asset_optimizer.py --vendor)")
+        # Part of the generation cache key: output changes with the stages and the vendored CSS
+        self.version = f"{VERSION}:{digest}" if enabled else 'off'
+
+    def _fetch(self):
+        """Vendor the missing stylesheet now; False (logged) if it cannot be downloaded"""
+        try:
+            size = vendor_bootstrap(self.bootstrap_css)
+        except Exception as e:
+            print(f"⚠️  Could not download Bootstrap CSS: {str(e)}")
+            return False
+        print(f"🎨 Vendored Bootstrap CSS into {self.bootstrap_css} ({size / 1024:.1f} KiB, integrity verified)")
+        return True
+
+    def optimize(self, files):
+        """Optimized copy of {path: content}; unchanged files keep their known blob SHAs"""
+        if not self.enabled:
+            return files
+        known = getattr(files, 'blob_shas', {})
+        optimized, blob_shas = {}, {}
+        for path, content in files.items():
+            optimized[path] = self.optimize_file(path, content)
+            if optimized[path] is content and path in known:
+                blob_shas[path] = known[path]
+        return GeneratedFiles(optimized, blob_shas, getattr(files, 'generator', None))
+
+    def optimize_file(self, path, content):
+        """Optimized content of one file (the same object when nothing applies)"""
+        transform = {
+            '.html': self._optimize_html, '.htm': self._optimize_html, '.css': minify_css, '.js': minify_js
+        }.get(os.path.splitext(path)[1].lower())
+        if transform is None or not isinstance(content, str):
+            return content
+        key = hashlib.sha256(f"{transform.__name__}\0{content}".encode('utf-8')).digest()
+        with self._lock:
+            cached = self._results.get(key)
+            if cached is not None:
+                self._results.move_to_end(key)
+                self.hits += 1
+                return content if cached[0] is None else cached[0]
+            self.misses += 1
+        result = transform(content)
+        unchanged = result == content
+        with self._lock:
+            self.bytes_in += len(content)
+            self.bytes_out += len(result)
+            self._store(self._results, key, None if unchanged else result)
+        return content if unchanged else result
+
+    def restore(self, files):
+        """Undo CSS inlining in {path: content}, so revision prompts carry a link, not the purged CSS"""
+        return {
+            path: PURGED.sub(r'<link href="\1" rel="stylesheet">', content)
+            if isinstance(content, str) and path.endswith(('.html', '.htm')) else content
+            for path, content in files.items()
+        }
+
+    def stats(self):
+        with self._lock:
+            return {
+                'version': self.version,
+                'purging': self.purging,
+                'files': len(self._results),
+                'purged_sets': len(self._purged),
+                'bytes': self._bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'bytes_in': self.bytes_in,
+                'bytes_out': self.bytes_out
+            }
+
+    def _store(self, cache, key, value):
+        # Callers hold self._lock; both caches share one byte budget, optimized files evicted first
+        if key in cache:
+            return
+        size = len(value or '')
+        cache[key] = (value, size)
+        self._bytes += size
+        while self._bytes > self.max_bytes and (self._results or self._purged):
+            _, (_, old) = (self._results or self._purged).popitem(last=False)
+            self._bytes -= old
+
+    def _bootstrap(self):
+        """The parsed vendored Bootstrap, or None when it is not installed"""
+        if self._purger is None and self.purging:
+            with self._purger_lock:
+                if self._purger is None:
+                    started = time.perf_counter()
+                    with open(self.bootstrap_css, encoding='utf-8') as f:
+                        self._purger = CSSPurger(f.read())
+                    print(f"🎨 Parsed vendored Bootstrap CSS in {(time.perf_counter() - started) * 1000:.0f} ms")
+        return self._purger
+
+    def _purge(self, html):
+        purger = self._bootstrap()
+        words = set(TOKEN.findall(html))
+        words.update([word.lower() for word in words])
+        if BOOTSTRAP_SCRIPT.search(html):
+            words |= SAFELIST
+        names = frozenset(purger.vocabulary.intersection(words))
+        variables = frozenset(word for word in words if word.startswith('--'))
+        key = (names, variables)
+        with self._lock:
+            cached = self._purged.get(key)
+            if cached is not None:
+                self._purged.move_to_end(key)
+                return cached[0]
+        css = purger.purge(names, variables)
+        with self._lock:
+            self._store(self._purged, key, css)
+        return css
+
+    def _optimize_html(self, html):
+        purged = None
+
+        def inline_bootstrap(m):
+            nonlocal purged
+            attrs = _attributes(m.group(0))
+            if 'stylesheet' not in attrs.get('rel', '').lower().split() or attrs.get('media', 'all') not in ('all', ''):
+                return m.group(0)
+            href = attrs.get('href', '')
+            if not BOOTSTRAP_HREF.match(href) or not self.purging:
+                return m.group(0)
+            if purged is None:
+                purged = self._purge(html)
+            return f'<style data-purged="{href}">{purged}</style>'
+
+        html = LINK.sub(inline_bootstrap, html)
+        html = _defer_scripts(html)
+        return HTML_PARTS.sub(_minify_part, html)
+
+
+def _is_classic(attrs):
+    return attrs.get('type', 'text/javascript').lower() in ('', 'text/javascript', 'application/javascript')
+
+
+def _defer_scripts(html):
+    """Give blocking external scripts ``defer``, or move them to the inline script that follows them"""
+    scripts = [(m, _attributes(m.group(1))) for m in SCRIPT.finditer(html)]
+    body = re.search(r'<body\b', html, re.I)
+    body_start = body.start() if body else 0
+    moves = {}  # index of the inline script -> external script tags to put before it
+    edits = []  # (start, end, replacement)
+    for i, (m, attrs) in enumerate(scripts):
+        if 'src' not in attrs or not _is_classic(attrs) or 'async' in attrs or 'defer' in attrs:
+            continue
+        follower = next((j for j in range(i + 1, len(scripts))
+                         if 'src' not in scripts[j][1] and _is_classic(scripts[j][1])), None)
+        if follower is None:
+            edits.append((m.start(1), m.start(1) + len('<script'), '<script defer'))
+        elif scripts[follower][0].start() > body_start > m.start():
+            # A later inline script may use it: run it just before that script instead of in <head>
+            moves.setdefault(follower, []).append(m.group(0))
+            edits.append((m.start(), m.end(), ''))
+    for follower, tags in moves.items():
+        start = scripts[follower][0].start()
+        edits.append((start, start, ''.join(tags)))
+    out, position = [], 0
+    for start, end, replacement in sorted(edits, key=lambda e: (e[0], e[1])):
+        out.append(html[position:start])
+        out.append(replacement)
+        position = end
+    out.append(html[position:])
+    return ''.join(out)
+
+
+def _minify_part(m):
+    if m.group(1):
+        open_tag, name, content, close_tag = m.group(1), m.group(2).lower(), m.group(3), m.group(4)
+        if name == 'style':
+            content = minify_css(content)
+        elif name == 'script':
+            attrs = _attributes(open_tag)
+            if _is_classic(attrs) or attrs.get('type', '').lower() == 'module':
+                content = minify_js(content)
+        return f"{open_tag}{content}{close_tag}"
+    if m.group(5):
+        return m.group(5)  # a tag, attribute values and all
+    if m.group(6):
+        return '\n' if '\n' in m.group(6) else ' '
+    return ''  # a comment
+
+
+def vendor_bootstrap(path=ASSET_BOOTSTRAP_CSS):
+    """Download the pinned Bootstrap stylesheet to path, refusing it unless it matches BOOTSTRAP_INTEGRITY"""
+    import requests
+
+    response = requests.get(BOOTSTRAP_URL, timeout=10)
+    response.raise_for_status()
+    integrity = 'sha384-' + base64.b64encode(hashlib.sha384(response.content).digest()).decode('ascii')
+    if integrity != BOOTSTRAP_INTEGRITY:
+        raise ValueError(f"{BOOTSTRAP_URL} does not match its published integrity hash ({integrity})")
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    # Write beside the target and rename, so workers starting together never read half a file
+    tmp = f"{path}.tmp{os.getpid()}"
+    with open(tmp, 'wb') as f:
+        f.write(response.content)
+    os.replace(tmp, path)
+    return len(response.content)
+
+
+asset_optimizer = AssetOptimizer()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Vendor the Bootstrap stylesheet the asset optimizer purges from')
+    parser.add_argument('--vendor', action='store_true', help=f"download {BOOTSTRAP_URL}")
+    parser.add_argument('-o', '--output', default=ASSET_BOOTSTRAP_CSS)
+    args = parser.parse_args()
+    if not args.vendor:
+        parser.print_help()
+        return
+    size = vendor_bootstrap(args.output)
+    print(f"🎨 Vendored Bootstrap 5.3.0 into {args.output} ({size / 1024:.1f} KiB, integrity verified); commit it")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,421 @@
+import binascii
+import hashlib
+import json
+import mmap
+import os
+import re
+import tempfile
+import threading
+import time
+import urllib.parse
+
+from db import DATA_DIR
+
+# Configuration
+ATTACHMENTS_DIR = os.getenv('ATTACHMENTS_DIR', os.path.join(DATA_DIR, 'attachments'))
+ATTACHMENT_MAX_BYTES = int(os.getenv('ATTACHMENT_MAX_BYTES', str(10 * 1024 * 1024)))
+ATTACHMENTS_MAX_TOTAL = int(os.getenv('ATTACHMENTS_MAX_TOTAL', str(25 * 1024 * 1024)))
+ATTACHMENT_RETENTION = float(os.getenv('ATTACHMENT_RETENTION', str(24 * 3600)))
+
+CHUNK_SIZE = 64 * 1024
+MAX_FIELD_BYTES = 1024 * 1024  # any JSON string that is not an attachment
+# Base64 inflates by 4/3; leave room for the rest of the request
+REQUEST_MAX_BYTES = ATTACHMENTS_MAX_TOTAL * 4 // 3 + MAX_FIELD_BYTES
+
+WHITESPACE = b' \t\r\n'
+STRING_STOP = re.compile(rb'["\\]')
+SCALAR = re.compile(rb'[^,\]}\s]*')
+SHA256_HEX = re.compile(r'[0-9a-f]{64}')
+# Entry fields only the server sets, from the bytes it stored
+STORED_FIELDS = ('mime', 'size', 'sha256')
+
+
+class RequestTooLarge(ValueError):
+    """The request body, a field or an attachment is over its size limit"""
+
+
+class RequestUnauthorized(ValueError):
+    """The request failed its authorization check; none of its attachments were kept"""
+
+
+class Attachment:
+    """A decoded attachment stored on disk under its SHA-256"""
+
+    __slots__ = ('name', 'mime', 'size', 'sha256')
+
+    def __init__(self, name, mime, size, sha256):
+        self.name = name
+        self.mime = mime
+        self.size = size
+        self.sha256 = sha256
+
+    @classmethod
+    def from_dict(cls, data):
+        sha256 = data['sha256']
+        # The SHA-256 becomes a path under ATTACHMENTS_DIR; anything else could point outside it
+        if not isinstance(sha256, str) or not SHA256_HEX.fullmatch(sha256):
+            raise ValueError(f"Invalid attachment sha256: {sha256!r}")
+        return cls(data.get('name'), data.get('mime'), int(data['size']), sha256)
+
+    def to_dict(self):
+        return {'name': self.name, 'mime': self.mime, 'size': self.size, 'sha256': self.sha256}
+
+    @property
+    def path(self):
+        return os.path.join(ATTACHMENTS_DIR, self.sha256)
+
+    def open(self):
+        return open(self.path, 'rb')
+
+    def memoryview(self):
+        """Zero-copy view of the file contents (memory-mapped)"""
+        if self.size == 0:
+            return memoryview(b'')
+        with self.open() as f:
+            return memoryview(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+
+
+class DataURISink:
+    """Receives one JSON string in chunks; spools ``data:`` URIs to disk
+
+    The header up to the first comma decides the mode: base64 payloads are
+    decoded 4 characters at a time as chunks arrive, percent-encoded ones
+    are decoded at the end, and anything that is not a data URI (a plain
+    link) is kept as text. Limits are enforced on decoded bytes as they
+    are written, so an oversized attachment is rejected mid-stream.
+    """
+
+    def __init__(self, budget):
+        self.budget = budget
+        self.header = b''
+        self.mode = 'header'
+        self.mime = None
+        self.text = []
+        self.text_size = 0
+        self.carry = b''
+        self.size = 0
+        self.digest = hashlib.sha256()
+        self.file = None
+
+    def write(self, chunk):
+        if self.mode == 'header':
+            self.header += chunk
+            if not b'data:'.startswith(self.header[:5].lower()):
+                self._start('text')
+                return
+            comma = self.header.find(b',')
+            if comma < 0:
+                if len(self.header) > 1024:
+                    self._start('text')
+                return
+            params = self.header[5:comma].decode('ascii', 'replace').split(';')
+            self.mime = params[0] or 'text/plain'
+            self._start('base64' if 'base64' in params[1:] else 'percent', self.header[comma + 1:])
+        elif self.mode == 'base64':
+            data = self.carry + chunk.translate(None, WHITESPACE)
+            usable = len(data) - len(data) % 4
+            self.carry = data[usable:]
+            if usable:
+                self._store(binascii.a2b_base64(data[:usable]))
+        else:
+            self._keep(chunk)
+
+    def _start(self, mode, rest=b''):
+        self.mode = mode
+        if mode == 'text':
+            rest, self.header = self.header, b''
+        else:
+            os.makedirs(ATTACHMENTS_DIR, exist_ok=True)
+            self.file = tempfile.NamedTemporaryFile(dir=ATTACHMENTS_DIR, prefix='.incoming-', delete=False)
+        if rest:
+            self.write(rest)
+
+    def _keep(self, chunk):
+        self.text_size += len(chunk)
+        # Percent-encoding can triple the size of the data it carries
+        if self.text_size > (MAX_FIELD_BYTES if self.mode == 'text' else 3 * ATTACHMENT_MAX_BYTES):
+            raise RequestTooLarge('Attachment URL is too large')
+        self.text.append(chunk)
+
+    def _store(self, data):
+        self.size += len(data)
+        if self.size > ATTACHMENT_MAX_BYTES:
+            raise RequestTooLarge(f"Attachment exceeds {ATTACHMENT_MAX_BYTES} bytes")
+        self.budget.use(len(data))
+        self.digest.update(data)
+        self.file.write(data)
+
+    def close(self, name=None):
+        """Finish the string; returns an Attachment, or the text for non-data URIs"""
+        if self.mode == 'header':
+            self._start('text', b'')
+        if self.mode == 'text':
+            return b''.join(self.text).decode('utf-8')
+        if self.mode == 'percent':
+            self._store(urllib.parse.unquote_to_bytes(b''.join(self.text)))
+        elif self.carry:
+            self._store(binascii.a2b_base64(self.carry + b'=' * (-len(self.carry) % 4)))
+        self.file.close()
+        sha256 = self.digest.hexdigest()
+        target = os.path.join(ATTACHMENTS_DIR, sha256)
+        if os.path.exists(target):
+            os.unlink(self.file.name)
+            os.utime(target)  # keep a re-sent file from being pruned
+        else:
+            os.replace(self.file.name, target)
+        self.file = None
+        return Attachment(name, self.mime, self.size, sha256)
+
+    def abort(self):
+        if self.file is not None:
+            self.file.close()
+            os.unlink(self.file.name)
+            self.file = None
+
+
+class IngestBudget:
+    """Running totals for one request"""
+
+    def __init__(self, max_total=ATTACHMENTS_MAX_TOTAL):
+        self.max_total = max_total
+        self.used = 0
+
+    def use(self, size):
+        self.used += size
+        if self.used > self.max_total:
+            raise RequestTooLarge(f"Attachments exceed {self.max_total} bytes in total")
+
+    @staticmethod
+    def field(size):
+        if size > MAX_FIELD_BYTES:
+            raise RequestTooLarge(f"Field exceeds {MAX_FIELD_BYTES} bytes")
+
+
+class StreamingJSONParser:
+    """Pull parser for a JSON document read from a stream in fixed-size chunks
+
+    Strings are scanned for their closing quote with a regex over the
+    buffer, never character by character. ``sink_for(path)`` may return a
+    sink for any string value (path is a tuple of keys and indexes); the
+    sink gets the string's raw bytes chunk by chunk and is itself returned
+    as the value for the caller to close, so large strings are never held
+    in memory.
+    """
+
+    def __init__(self, stream, sink_for=None, chunk_size=CHUNK_SIZE):
+        self.stream = stream
+        self.sink_for = sink_for or (lambda path: None)
+        self.chunk_size = chunk_size
+        self.buf = b''
+        self.pos = 0
+        self.sinks = []
+
+    def parse(self):
+        try:
+            value = self._value(())
+            if self._peek(required=False) is not None:
+                raise ValueError('Unexpected data after JSON document')
+            return value
+        except Exception:
+            for sink in self.sinks:
+                sink.abort()
+            raise
+
+    def _fill(self):
+        data = self.stream.read(self.chunk_size)
+        if not data:
+            return False
+        self.buf = self.buf[self.pos:] + data
+        self.pos = 0
+        return True
+
+    def _peek(self, required=True):
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self._fill():
+                if required:
+                    raise ValueError('Unexpected end of JSON body')
+                return None
+
+    def _expect(self, char):
+        if self._peek() != ord(char):
+            raise ValueError(f"Expected {char!r} in JSON body")
+        self.pos += 1
+
+    def _value(self, path):
+        c = self._peek()
+        if c == ord('{'):
+            return self._object(path)
+        if c == ord('['):
+            return self._array(path)
+        if c == ord('"'):
+            return self._string(self.sink_for(path))
+        return self._scalar()
+
+    def _object(self, path):
+        self.pos += 1
+        result = {}
+        if self._peek() == ord('}'):
+            self.pos += 1
+            return result
+        while True:
+            if self._peek() != ord('"'):
+                raise ValueError('Expected property name in JSON body')
+            key = self._string(None)
+            self._expect(':')
+            result[key] = self._value(path + (key,))
+            c = self._peek()
+            self.pos += 1
+            if c == ord('}'):
+                return result
+            if c != ord(','):
+                raise ValueError("Expected ',' or '}' in JSON body")
+
+    def _array(self, path):
+        self.pos += 1
+        result = []
+        if self._peek() == ord(']'):
+            self.pos += 1
+            return result
+        while True:
+            result.append(self._value(path + (len(result),)))
+            c = self._peek()
+            self.pos += 1
+            if c == ord(']'):
+                return result
+            if c != ord(','):
+                raise ValueError("Expected ',' or ']' in JSON body")
+
+    def _scalar(self):
+        while True:
+            match = SCALAR.match(self.buf, self.pos)
+            if match.end() < len(self.buf) or not self._fill():
+                break
+        self.pos = match.end()
+        return json.loads(match.group())
+
+    def _string(self, sink):
+        self.pos += 1
+        if sink is not None:
+            self.sinks.append(sink)
+        parts = []
+        size = 0
+        while True:
+            match = STRING_STOP.search(self.buf, self.pos)
+            end = match.start() if match else len(self.buf)
+            if end > self.pos:
+                chunk = self.buf[self.pos:end]
+                self.pos = end
+                if sink is not None:
+                    sink.write(chunk)
+                else:
+                    size += len(chunk)
+                    IngestBudget.field(size)
+                    parts.append(chunk)
+            if match is None:
+                if not self._fill():
+                    raise ValueError('Unterminated string in JSON body')
+                continue
+            if self.buf[self.pos] == ord('"'):
+                self.pos += 1
+                break
+            chunk = self._escape()
+            if sink is not None:
+                sink.write(chunk)
+            else:
+                size += len(chunk)
+                parts.append(chunk)
+        if sink is not None:
+            return sink
+        return b''.join(parts).decode('utf-8')
+
+    def _escape(self):
+        while len(self.buf) - self.pos < 12 and self._fill():
+            pass
+        length = 6 if self.buf[self.pos + 1:self.pos + 2] == b'u' else 2
+        # A UTF-16 surrogate pair is two \u escapes that only decode together
+        if length == 6 and 0xD800 <= int(self.buf[self.pos + 2:self.pos + 6], 16) < 0xDC00:
+            length = 12
+        sequence = self.buf[self.pos:self.pos + length]
+        self.pos += length
+        return json.loads(b'"' + sequence + b'"').encode('utf-8')
+
+
+_last_prune = [0.0]
+_prune_lock = threading.Lock()
+
+
+def prune_attachments(max_age=ATTACHMENT_RETENTION):
+    """Delete stored attachments not written or re-sent within max_age seconds"""
+    cutoff = time.time() - max_age
+    removed = 0
+    try:
+        names = os.listdir(ATTACHMENTS_DIR)
+    except FileNotFoundError:
+        return 0
+    for name in names:
+        path = os.path.join(ATTACHMENTS_DIR, name)
+        try:
+            if os.path.getmtime(path) < cutoff:
+                os.unlink(path)
+                removed += 1
+        except FileNotFoundError:
+            pass
+    return removed
+
+
+def ingest_request(stream, content_length=None, authorize=None):
+    """Parse a deployment request body, spooling data-URI attachments to disk
+
+    Returns the request dict with ``attachments`` replaced by Attachment
+    dicts ({name, mime, size, sha256}); non-data URLs are left as they were.
+    ``authorize(data)`` runs before any attachment is stored (the secret may
+    follow them in the body); if it returns False the spooled files are
+    deleted and RequestUnauthorized is raised.
+    """
+    if content_length is not None and content_length > REQUEST_MAX_BYTES:
+        raise RequestTooLarge(f"Request body exceeds {REQUEST_MAX_BYTES} bytes")
+    budget = IngestBudget()
+
+    def sink_for(path):
+        if len(path) == 3 and path[0] == 'attachments' and path[2] == 'url':
+            return DataURISink(budget)
+        return None
+
+    parser = StreamingJSONParser(stream, sink_for)
+    data = parser.parse()
+    try:
+        if not isinstance(data, dict):
+            raise ValueError('Request body must be a JSON object')
+        if authorize is not None and not authorize(data):
+            raise RequestUnauthorized('Request is not authorized')
+        # Sinks are closed only now because an attachment's name may follow its url
+        for entry in data.get('attachments') or []:
+            if not isinstance(entry, dict):
+                continue
+            for field in STORED_FIELDS:
+                entry.pop(field, None)  # never trust a client's claim about what is on disk
+            if isinstance(entry.get('url'), DataURISink):
+                result = entry.pop('url').close(entry.get('name'))
+                if isinstance(result, Attachment):
+                    entry.update(result.to_dict())
+                else:
+                    entry['url'] = result
+    except Exception:
+        for sink in parser.sinks:
+            sink.abort()
+        raise
+
+    with _prune_lock:
+        if time.time() - _last_prune[0] > 3600:
+            _last_prune[0] = time.time()
+            prune_attachments()
+    return data
+
+
+def load_attachments(entries):
+    """Attachment objects for the stored entries of a request (skips plain links)"""
+    return [Attachment.from_dict(entry) for entry in entries or [] if isinstance(entry, dict) and 'sha256' in entry]
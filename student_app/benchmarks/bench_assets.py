@@ -0,0 +1,98 @@
+"""What the asset optimizer does to every app template's index.html: bytes
+(raw and gzipped) of the page and of the render-blocking stylesheets it needs
+before first paint, render-blocking requests, and optimizer time for a new
+template (cold), a new brief on a template seen before (warm) and a repeated
+page (cached).
+
+The Bootstrap purge needs the vendored stylesheet (ASSET_BOOTSTRAP_CSS or
+--css); without it only minification and script deferral are measured.
+
+    python benchmarks/bench_assets.py --briefs 200 --css vendor/bootstrap-5.3.0.min.css
+"""
+import argparse
+import os
+import re
+import sys
+import time
+import zlib
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from asset_optimizer import ASSET_BOOTSTRAP_CSS, BOOTSTRAP_HREF, LINK, SCRIPT, AssetOptimizer, _attributes  # noqa: E402
+from bench_load import percentile  # noqa: E402
+from template_registry import template_registry  # noqa: E402
+
+
+def gzipped(text):
+    return len(zlib.compress(text.encode('utf-8'), 6))
+
+
+def blocking(html, bootstrap):
+    """(render-blocking requests, gzipped bytes of those whose size is known) before the first paint"""
+    body = re.search(r'<body\b', html, re.I)
+    head = html[:body.start()] if body else html
+    requests, known = 0, 0
+    for m in LINK.finditer(head):
+        attrs = _attributes(m.group(0))
+        if 'stylesheet' in attrs.get('rel', '').split() and attrs.get('href', '').startswith('http'):
+            requests += 1
+            if BOOTSTRAP_HREF.match(attrs['href']) and bootstrap:
+                known += gzipped(bootstrap)
+    for m in SCRIPT.finditer(head):
+        attrs = _attributes(m.group(1))
+        if 'src' in attrs and 'defer' not in attrs and 'async' not in attrs and attrs.get('type') != 'module':
+            requests += 1
+    return requests, known
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--briefs', type=int, default=200, help='distinct briefs rendered per template')
+    parser.add_argument('--css', default=ASSET_BOOTSTRAP_CSS, help='vendored bootstrap.min.css')
+    args = parser.parse_args()
+
+    bootstrap = None
+    if os.path.exists(args.css):
+        with open(args.css, encoding='utf-8') as f:
+            bootstrap = f.read()
+        print(f"vendored Bootstrap: {args.css} ({len(bootstrap) / 1024:.1f} KiB, {gzipped(bootstrap) / 1024:.1f} KiB gzipped)")
+    else:
+        print(f"no vendored Bootstrap at {args.css}: purge skipped, measuring minification and script deferral only")
+
+    optimizer = AssetOptimizer(args.css, enabled=True)
+    started = time.perf_counter()
+    if optimizer.purging:
+        optimizer._bootstrap()
+        print(f"parsed Bootstrap once per process in {(time.perf_counter() - started) * 1000:.1f} ms")
+
+    print(f"{'template':>10} | {'page KiB':>17} | {'gz page + blocking CSS':>22} | {'blocking':>8} | "
+          f"{'cold':>8} {'warm p50':>8} {'cached':>8}")
+    for name in template_registry.templates:
+        template = template_registry.get(name)
+        page = template.render(brief='Build a tiny app #0')['index.html']
+        started = time.perf_counter()
+        optimized = optimizer.optimize_file('index.html', page)
+        cold = (time.perf_counter() - started) * 1e3
+
+        warm = []
+        for i in range(1, args.briefs):
+            html = template.render(brief=f"Build a tiny app #{i}")['index.html']
+            started = time.perf_counter()
+            optimizer.optimize_file('index.html', html)
+            warm.append((time.perf_counter() - started) * 1e3)
+        started = time.perf_counter()
+        optimizer.optimize_file('index.html', page)
+        cached = (time.perf_counter() - started) * 1e3
+
+        before_requests, before_css = blocking(page, bootstrap)
+        after_requests, after_css = blocking(optimized, bootstrap)
+        print(f"{name:>10} | {len(page) / 1024:6.1f} -> {len(optimized) / 1024:6.1f} | "
+              f"{(gzipped(page) + before_css) / 1024:8.1f} -> {(gzipped(optimized) + after_css) / 1024:8.1f} | "
+              f"{before_requests:>3} -> {after_requests:<2} | {cold:6.2f}ms {percentile(warm, 50) or 0:6.3f}ms "
+              f"{cached:6.3f}ms")
+    print(f"optimizer: {optimizer.stats()}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,63 @@
+"""Ingest a request carrying large base64 data-URI attachments, parsing the whole
+body as JSON and decoding in memory vs the streaming ingestion path, and report
+time and peak Python memory.
+
+    python benchmarks/bench_attachments.py --size-mb 8 --count 2
+"""
+import argparse
+import base64
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DATA_DIR', tempfile.mkdtemp(prefix='bench-attachments-'))
+
+
+def parse_in_memory(body):
+    """What request.json plus a decode per attachment costs"""
+    data = json.loads(body)
+    return [base64.b64decode(a['url'].split(',', 1)[1]) for a in data['attachments']]
+
+
+def measure(label, ingest, body):
+    stream = io.BytesIO(body)
+    tracemalloc.start()
+    started = time.perf_counter()
+    ingest(stream)
+    seconds = time.perf_counter() - started
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    print(f"{label:>10}: {seconds:6.2f}s  peak {peak / 1e6:7.1f} MB allocated "
+          f"(body {len(body) / 1e6:.1f} MB, not counted)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--size-mb', type=float, default=8)
+    parser.add_argument('--count', type=int, default=2)
+    args = parser.parse_args()
+
+    os.environ.setdefault('ATTACHMENT_MAX_BYTES', str(int(args.size_mb * 1024 * 1024) + 1))
+    os.environ.setdefault('ATTACHMENTS_MAX_TOTAL', str(int(args.size_mb * args.count * 1024 * 1024) + 1))
+    from attachments import ingest_request
+    body = json.dumps({
+        'task': 'bench',
+        'brief': 'Show the uploaded data',
+        'attachments': [
+            {'name': f"file{i}.bin", 'url': 'data:application/octet-stream;base64,' +
+             base64.b64encode(os.urandom(int(args.size_mb * 1024 * 1024))).decode()}
+            for i in range(args.count)
+        ]
+    }).encode()
+
+    measure('in memory', lambda stream: parse_in_memory(stream.getvalue()), body)
+    measure('streaming', lambda stream: ingest_request(stream, len(body)), body)
+
+
+if __name__ == '__main__':
+    main()
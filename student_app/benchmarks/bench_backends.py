@@ -0,0 +1,88 @@
+"""Run the deployment pipeline (generate, deploy, record status) against each
+deployment backend — GitHub via the local stand-in, bare local git and plain
+filesystem — and report throughput and per-deployment cost for round 1 and 2.
+
+    python benchmarks/bench_backends.py --deployments 500 --concurrency 8
+"""
+import argparse
+import contextlib
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('GITHUB_TOKEN', 'bench-token')
+os.environ.setdefault('DATA_DIR', tempfile.mkdtemp(prefix='bench-backends-'))
+os.environ.setdefault('GITHUB_WRITE_RATE', '100000')
+os.environ.setdefault('GITHUB_WRITE_BURST', '100000')
+
+from fake_github import FakeGitHub  # noqa: E402
+
+BRIEFS = ['Build a calculator', 'Make a todo checklist', 'A countdown timer', 'A markdown editor']
+
+
+def run_round(app_module, backend, round_number, count, concurrency):
+    """Deploy count tasks on concurrency threads; returns seconds taken"""
+    pending = list(range(count))
+    lock = threading.Lock()
+
+    def worker():
+        while True:
+            with lock:
+                if not pending:
+                    return
+                i = pending.pop()
+            app_module.process_deployment({
+                'task': f"{backend}-{i}",
+                'round': round_number,
+                'nonce': f"n{round_number}",
+                'email': 'bench@example.com',
+                'brief': BRIEFS[(i + round_number - 1) % len(BRIEFS)]
+            })
+
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    started = time.perf_counter()
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--deployments', type=int, default=500)
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--latency', type=float, default=0.0, help='fake GitHub seconds per call')
+    parser.add_argument('--backends', nargs='+', default=['github', 'local-git', 'filesystem'])
+    args = parser.parse_args()
+
+    # Rate limiting is bench_rate_limit's subject; here it would fail GitHub deployments the local backends never see
+    fake = FakeGitHub(latency=args.latency, rate_limit=10 ** 9)
+    os.environ['GITHUB_API_URL'] = fake.start()
+    import app as app_module
+    app_module.GITHUB_API_URL = os.environ['GITHUB_API_URL']
+    app_module.pages_tracker.track = lambda *a, **kw: None  # nothing to poll against the stand-in
+
+    failures = 0
+    for backend in args.backends:
+        app_module.DEPLOY_BACKEND = backend
+        for round_number in (1, 2):
+            seconds = run_round(app_module, backend, round_number, args.deployments, args.concurrency)
+            failed = sum(
+                1 for i in range(args.deployments)
+                if (app_module.deployments.get(f"{backend}-{i}") or {}).get('status') != 'completed'
+            )
+            print(f"{backend:>10} round {round_number}: {args.deployments / seconds * 60:8.0f} deployments/min, "
+                  f"{seconds / args.deployments * args.concurrency * 1000:6.1f} ms/deployment, {failed} failed")
+            failures += failed
+    fake.stop()
+    if failures:
+        sys.exit(f"{failures} deployments failed; the rows above do not compare like for like")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,104 @@
+"""Classify synthetic briefs of varying length with the old substring cascade and
+the compiled keyword classifier as the generator catalog grows, and report
+throughput and where the two disagree.
+
+    python benchmarks/bench_classifier.py --briefs 100000 --generators 6 50 200
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from collections import Counter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+FILLER = (
+    'build a simple page that shows the data with a clean layout and responsive design '
+    'use bootstrap make sure it works on mobile include a header footer and command bar '
+    'the app should load quickly handle errors gracefully and store settings locally '
+    'add accessibility labels for every control and document the usage in the readme'
+).split()
+KEYWORDS = [
+    'calculator', 'math', 'counter', 'increment', 'todo', 'tasks', 'checklist', 'timer',
+    'stopwatch', 'countdown', 'markdown', 'convert', 'github', 'user', 'profile', 'username'
+]
+
+LEGACY_RULES = [
+    ('calculator', ['calculator', 'calc', 'math']),
+    ('counter', ['counter', 'count', 'increment']),
+    ('todo', ['todo', 'task', 'checklist']),
+    ('timer', ['timer', 'stopwatch', 'countdown']),
+    ('markdown', ['markdown', 'md', 'convert']),
+    ('github', ['github', 'user', 'profile']),
+]
+
+
+def legacy_classify(brief, rules=LEGACY_RULES):
+    """The if/elif substring cascade generate_app used before the classifier"""
+    brief_lower = brief.lower()
+    for generator, words in rules:
+        if any(word in brief_lower for word in words):
+            return generator
+    return 'default'
+
+
+def extra_rules(count):
+    """Synthetic generators standing in for a larger template catalog"""
+    return [(f"extra{i}", 100 + i, {f"widget{i}": 2, f"gadget{i}": 1, f"gizmo{i}": 1}) for i in range(count)]
+
+
+def make_briefs(count, seed):
+    rng = random.Random(seed)
+    briefs = []
+    for _ in range(count):
+        words = [rng.choice(FILLER) for _ in range(rng.choice([8, 20, 60, 200, 600]))]
+        for _ in range(rng.randint(0, 3)):
+            words.insert(rng.randrange(len(words) + 1), rng.choice(KEYWORDS))
+        briefs.append(' '.join(words).capitalize())
+    return briefs
+
+
+def timed(classify, briefs):
+    started = time.perf_counter()
+    results = [classify(brief) for brief in briefs]
+    return results, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--briefs', type=int, default=100000)
+    parser.add_argument('--seed', type=int, default=7)
+    parser.add_argument('--generators', type=int, nargs='+', default=[6, 50, 200],
+                        help='catalog sizes to compare (extra generators are synthetic)')
+    args = parser.parse_args()
+
+    from classifier import KeywordClassifier
+    from template_registry import template_registry
+
+    rules = template_registry.rules()
+
+    briefs = make_briefs(args.briefs, args.seed)
+    total_chars = sum(len(b) for b in briefs)
+    print(f"{len(briefs)} briefs, {total_chars / len(briefs):.0f} chars on average")
+
+    for generators in args.generators:
+        extras = extra_rules(generators - len(rules))
+        classifier = KeywordClassifier(rules + extras, default='default')
+        cascade_rules = LEGACY_RULES + [(name, list(keywords)) for name, _, keywords in extras]
+        legacy, legacy_seconds = timed(lambda b: legacy_classify(b, cascade_rules), briefs)
+        compiled, compiled_seconds = timed(lambda b: classifier.classify(b).generator, briefs)
+        print(f"-- {len(classifier.priorities)} generators, {len(classifier.keywords)} keywords --")
+        for name, seconds in (('cascade', legacy_seconds), ('compiled', compiled_seconds)):
+            print(f"{name:>9}: {seconds:.2f}s  {len(briefs) / seconds:,.0f} briefs/s  "
+                  f"{total_chars / seconds / 1e6:.1f} MB/s")
+
+    changed = Counter((old, new) for old, new in zip(legacy, compiled) if old != new)
+    print(f"generator distribution (compiled): {dict(Counter(compiled))}")
+    print(f"disagreements with the cascade: {sum(changed.values())} ({sum(changed.values()) / len(briefs):.1%})")
+    for (old, new), count in changed.most_common(5):
+        print(f"  cascade={old:<10} compiled={new:<10} {count}")
+
+
+if __name__ == '__main__':
+    main()
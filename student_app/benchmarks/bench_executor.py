@@ -0,0 +1,140 @@
+"""Fire concurrent deployment submissions at the app and compare the legacy
+thread-per-request model with the bounded executor. Deployments push to the
+local GitHub stand-in (benchmarks/fake_github.py) and the executor runs with
+its default DEPLOY_QUEUE_SIZE, so submissions beyond the queue are refused
+with 503 + Retry-After and show up in the status codes.
+
+    python benchmarks/bench_executor.py --requests 500 --latency 0.05
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('GITHUB_TOKEN', 'bench-token')
+os.environ.setdefault('DATA_DIR', tempfile.mkdtemp(prefix='bench-executor-'))
+os.environ.setdefault('JOB_POLL_SECONDS', '0.05')
+# Pace nothing on our side; the fake's latency is the cost being measured
+os.environ.setdefault('GITHUB_WRITE_RATE', '100000')
+os.environ.setdefault('GITHUB_WRITE_BURST', '100000')
+
+from fake_github import FakeGitHub  # noqa: E402
+
+
+def rss_mb():
+    with open('/proc/self/status') as f:
+        for line in f:
+            if line.startswith('VmRSS:'):
+                return int(line.split()[1]) / 1024.0
+    return 0.0
+
+
+def run(mode, total, latency):
+    fake = FakeGitHub(latency=latency)
+    api_url = fake.start()
+    os.environ['GITHUB_API_URL'] = api_url
+    os.environ['PAGES_URL_TEMPLATE'] = api_url + '/_pages/{login}/{repo}'
+    import app as app_module
+    from job_queue import Enqueued
+
+    if mode == 'legacy':
+        def legacy_submit(data):
+            thread = threading.Thread(target=app_module.process_deployment, args=(data,))
+            thread.daemon = True
+            thread.start()
+            return Enqueued(0, 0, True, 'pending', None)
+        app_module.deployment_executor.submit = legacy_submit
+
+    client = app_module.app.test_client()
+    submitted = {}
+    statuses = {}
+    peak = {'threads': 0, 'rss': 0.0}
+    done = threading.Event()
+
+    def sample():
+        while not done.is_set():
+            peak['threads'] = max(peak['threads'], threading.active_count())
+            peak['rss'] = max(peak['rss'], rss_mb())
+            time.sleep(0.01)
+
+    def submit(i):
+        task = f"bench-{i}"
+        submitted[task] = time.monotonic()
+        response = client.post('/', json={
+            'secret': app_module.APP_SECRET,
+            'task': task,
+            'round': 1,
+            'nonce': str(i),
+            'email': 'bench@example.com',
+            'brief': 'Build a calculator',
+            'evaluation_url': api_url + '/_evaluate'
+        })
+        statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+    sampler = threading.Thread(target=sample, daemon=True)
+    sampler.start()
+    started = time.monotonic()
+    clients = [threading.Thread(target=submit, args=(i,)) for i in range(total)]
+    for t in clients:
+        t.start()
+    for t in clients:
+        t.join()
+    accept_time = time.monotonic() - started
+
+    accepted = statuses.get(200, 0)
+    while True:
+        finished = [t for t in submitted if t in app_module.deployments]
+        if len(finished) >= accepted:
+            break
+        time.sleep(0.01)
+    total_time = time.monotonic() - started
+    done.set()
+    sampler.join()
+    fake.stop()
+
+    return {
+        'mode': mode,
+        'requests': total,
+        'status_codes': statuses,
+        'peak_threads': peak['threads'],
+        'peak_rss_mb': round(peak['rss'], 1),
+        'accept_seconds': round(accept_time, 3),
+        'completion_seconds': round(total_time, 3)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--requests', type=int, default=500)
+    parser.add_argument('--latency', type=float, default=0.05, help='seconds added to every fake API call')
+    parser.add_argument('--mode', choices=['legacy', 'executor'])
+    args = parser.parse_args()
+
+    if args.mode:
+        # Silence the app's logging (background threads keep printing after the run) so only the result
+        # reaches stdout
+        sys.stdout = open(os.devnull, 'w')
+        result = run(args.mode, args.requests, args.latency)
+        print(json.dumps(result), file=sys.__stdout__, flush=True)
+        return
+
+    # Run each mode in a fresh interpreter so thread and RSS numbers don't bleed over
+    for mode in ('legacy', 'executor'):
+        output = subprocess.check_output([
+            sys.executable, __file__, '--mode', mode,
+            '--requests', str(args.requests), '--latency', str(args.latency)
+        ], env=dict(os.environ, DATA_DIR=tempfile.mkdtemp(prefix=f'bench-{mode}-')))
+        result = json.loads(output)
+        print(f"{mode:>9}: threads={result['peak_threads']:<5} rss={result['peak_rss_mb']}MB "
+              f"accept={result['accept_seconds']}s complete={result['completion_seconds']}s "
+              f"codes={result['status_codes']}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+"""Per-deployment GitHub latency and sockets opened: a fresh Github client per
+job (the old GitHubManager) vs the shared pooled client registry.
+
+    python benchmarks/bench_github_client.py --deployments 200 --concurrency 4
+"""
+import argparse
+import contextlib
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('GITHUB_TOKEN', 'bench-token')
+os.environ.setdefault('DATA_DIR', tempfile.mkdtemp(prefix='bench-client-'))
+
+from github import Github  # noqa: E402
+from github.Requester import Requester  # noqa: E402
+
+from fake_github import FakeGitHub  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--deployments', type=int, default=200)
+    parser.add_argument('--concurrency', type=int, default=4)
+    parser.add_argument('--latency', type=float, default=0.005)
+    args = parser.parse_args()
+
+    fake = FakeGitHub(latency=args.latency)
+    base_url = fake.start()
+    import app as app_module
+    app_module.GITHUB_API_URL = base_url
+
+    class FreshGitHubManager(app_module.GitHubManager):
+        """The pre-registry behaviour: new client and session, login fetched every job"""
+
+        def __init__(self):
+            self.github_token = os.environ['GITHUB_TOKEN']
+            self.g = Github(self.github_token, base_url=base_url)
+            self.user = self.g.get_user()
+
+        @property
+        def login(self):
+            return self.user.login
+
+    # Round 2 against existing repos exercises get_repo, ref and tree lookups per job
+    setup = app_module.GitHubManager()
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        setup.create_repository('bench', app_module.AppGenerator.generate_app('calculator'), 'e')
+
+    for mode, factory in (('fresh', FreshGitHubManager), ('pooled', app_module.GitHubManager)):
+        if mode == 'fresh':
+            Requester.resetConnectionClasses()
+        else:
+            app_module.github_clients.reset()
+        before_calls = fake.calls['total']
+        before_connections = fake.connections
+        latencies = []
+        lock = threading.Lock()
+
+        def worker(count):
+            for _ in range(count):
+                started = time.perf_counter()
+                result = factory().update_repository('bench', app_module.AppGenerator.generate_app('calculator'), 'update')
+                assert result['success'], result
+                with lock:
+                    latencies.append(time.perf_counter() - started)
+
+        threads = [threading.Thread(target=worker, args=(args.deployments // args.concurrency,))
+                   for _ in range(args.concurrency)]
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+
+        latencies.sort()
+        done = len(latencies)
+        print(f"{mode:>6}: {sum(latencies) / done * 1000:6.1f} ms/deployment "
+              f"(p95 {latencies[int(done * 0.95) - 1] * 1000:6.1f} ms), "
+              f"{(fake.calls['total'] - before_calls) / done:4.1f} API calls, "
+              f"{fake.connections - before_connections} sockets opened for {done} deployments")
+    fake.stop()
+
+
+if __name__ == '__main__':
+    main()
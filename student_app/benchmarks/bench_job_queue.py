@@ -0,0 +1,72 @@
+"""Measure enqueue and claim/ack throughput of the durable job queue.
+
+    python benchmarks/bench_job_queue.py --jobs 20000 --threads 4
+"""
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from db import Database  # noqa: E402
+from job_queue import JobQueue  # noqa: E402
+
+
+def payload(i):
+    return {
+        'task': f"bench-{i}",
+        'round': 1,
+        'nonce': str(i),
+        'email': 'bench@example.com',
+        'brief': 'Build a calculator with keyboard support',
+        'evaluation_url': 'http://127.0.0.1:9/notify'
+    }
+
+
+def timed(threads, count, fn):
+    per_thread = count // threads
+    workers = [threading.Thread(target=fn, args=(t * per_thread, per_thread)) for t in range(threads)]
+    started = time.perf_counter()
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    return per_thread * threads / (time.perf_counter() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--jobs', type=int, default=20000)
+    parser.add_argument('--threads', type=int, default=4)
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(prefix='bench-queue-'), 'queue.db')
+    job_queue = JobQueue(Database(path))
+
+    def enqueue(start, count):
+        for i in range(start, start + count):
+            data = payload(i)
+            job_queue.enqueue(f"{data['task']}:1:{data['nonce']}", data)
+
+    def drain(start, count):
+        owner = JobQueue.worker_id()
+        for _ in range(count):
+            claimed = job_queue.claim(owner)
+            if claimed is None:
+                return
+            job_queue.ack(claimed[0])
+
+    rate = timed(1, args.jobs, enqueue)
+    print(f"enqueue   1 thread : {rate:8.0f} jobs/s")
+    rate = timed(args.threads, args.jobs, lambda s, c: enqueue(s + args.jobs, c))
+    print(f"enqueue {args.threads:>3} threads: {rate:8.0f} jobs/s")
+    rate = timed(args.threads, args.jobs * 2, drain)
+    print(f"claim+ack {args.threads:>1} threads: {rate:8.0f} jobs/s")
+    print(f"final states: {job_queue.stats()}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,122 @@
+"""Generate and deploy apps with GENERATOR_BACKEND=llm against a local
+OpenAI-compatible stand-in (filesystem deployment backend), reporting model
+calls, peak concurrency, time to first token, tokens/s and generation
+latency for cold prompts, repeats served from the disk cache and an LLM too
+slow for LLM_TIMEOUT (falls back to templates), next to the template engine.
+
+    python benchmarks/bench_llm.py --deployments 40 --briefs 10 --concurrency 8 --llm-concurrency 4
+"""
+import argparse
+import contextlib
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('GITHUB_TOKEN', 'bench-token')
+os.environ.setdefault('DATA_DIR', tempfile.mkdtemp(prefix='bench-llm-'))
+os.environ['DEPLOY_BACKEND'] = 'filesystem'
+os.environ['GENERATOR_BACKEND'] = 'llm'
+
+from bench_load import percentile  # noqa: E402
+from fake_llm import FakeLLM  # noqa: E402
+
+TOPICS = ['calculator', 'todo checklist', 'countdown timer', 'markdown editor', 'unit converter',
+          'quiz game', 'color picker', 'expense tracker', 'weather card', 'pomodoro clock']
+
+
+def run(app_module, label, tasks, concurrency, fake):
+    """Deploy (task_id, brief) pairs on concurrency threads and print a summary line"""
+    fake.reset()
+    llm_before = app_module.AppGenerator.llm.stats()
+    pending = list(tasks)
+    lock = threading.Lock()
+    records = []
+    files_streamed = []
+
+    def worker():
+        while True:
+            with lock:
+                if not pending:
+                    return
+                task_id, brief = pending.pop()
+            records.append(app_module.process_deployment({
+                'task': task_id, 'round': 1, 'nonce': 'n', 'email': 'bench@example.com', 'brief': brief
+            }))
+
+    publish = app_module.deployment_events.publish
+
+    def counting_publish(task_id, stage, **data):
+        if stage == 'file_generated':
+            files_streamed.append(task_id)
+        return publish(task_id, stage, **data)
+
+    app_module.deployment_events.publish = counting_publish
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    started = time.perf_counter()
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+    seconds = time.perf_counter() - started
+    app_module.deployment_events.publish = publish
+
+    metrics = [r.get('generation', {}) for r in records]
+    generate_ms = [m['total_ms'] for m in metrics if m.get('total_ms') is not None]
+    first_token = [m['first_token_ms'] for m in metrics if m.get('first_token_ms') is not None]
+    rates = [m['tokens_per_second'] for m in metrics if m.get('tokens_per_second')]
+    llm_after = app_module.AppGenerator.llm.stats()
+    failed = sum(1 for r in records if r.get('status') != 'completed')
+    fallbacks = sum(1 for m in metrics if m.get('fallback'))
+    print(f"{label:>12}: {len(tasks) / seconds * 60:7.0f} deployments/min, {fake.stats()['calls']:3d} LLM calls "
+          f"(peak {fake.stats()['max_active']} concurrent), "
+          f"{llm_after['cache_hits'] - llm_before['cache_hits']} disk hits, "
+          f"{llm_after['coalesced'] - llm_before['coalesced']} coalesced, {fallbacks} fallbacks, "
+          f"{len(files_streamed)} files streamed, {failed} failed")
+    print(f"{'':>12}  generation p50 {percentile(generate_ms, 50) or 0:7.1f} ms, "
+          f"p95 {percentile(generate_ms, 95) or 0:7.1f} ms"
+          + (f", first token p50 {percentile(first_token, 50):.0f} ms" if first_token else '')
+          + (f", {percentile(rates, 50):.0f} tokens/s" if rates else ''))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--deployments', type=int, default=40)
+    parser.add_argument('--briefs', type=int, default=10, help='distinct briefs among the deployments')
+    parser.add_argument('--concurrency', type=int, default=8, help='deployments in parallel')
+    parser.add_argument('--llm-concurrency', type=int, default=4, help='LLM_CONCURRENCY')
+    parser.add_argument('--first-token', type=float, default=0.3, help='fake LLM seconds to first token')
+    parser.add_argument('--tokens-per-second', type=float, default=1000, help='fake LLM streaming rate')
+    args = parser.parse_args()
+
+    fake = FakeLLM(first_token=args.first_token, tokens_per_second=args.tokens_per_second)
+    os.environ['LLM_API_URL'] = fake.start()
+    os.environ['LLM_CONCURRENCY'] = str(args.llm_concurrency)
+    os.environ['LLM_TIMEOUT'] = '60'
+    import app as app_module
+    from generation_cache import GenerationCache
+
+    def tasks(prefix):
+        return [(f"{prefix}-{i}", f"Build a {TOPICS[i % args.briefs % len(TOPICS)]} #{i % args.briefs}")
+                for i in range(args.deployments)]
+
+    run(app_module, 'cold', tasks('cold'), args.concurrency, fake)
+    app_module.generation_cache = GenerationCache()  # as if in a fresh worker process
+    run(app_module, 'disk cache', tasks('warm'), args.concurrency, fake)
+
+    app_module.generation_cache = GenerationCache()
+    app_module.AppGenerator.llm.timeout = args.first_token / 2
+    run(app_module, 'llm timeout', [(t, f"{b} v2") for t, b in tasks('slow')], args.concurrency, fake)
+
+    app_module.generation_cache = GenerationCache()
+    app_module.GENERATOR_BACKEND = 'template'
+    run(app_module, 'templates', tasks('template'), args.concurrency, fake)
+    fake.stop()
+
+
+if __name__ == '__main__':
+    main()
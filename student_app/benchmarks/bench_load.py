@@ -0,0 +1,261 @@
+"""Replay deployment requests against app:app under gunicorn, backed by the fake
+GitHub and fake evaluator, and report accept latency, end-to-end deployment
+latency, GitHub calls per deployment and failure rates.
+
+    python benchmarks/bench_load.py --deployments 100 --concurrency 20 --latency 0.05
+    python benchmarks/bench_load.py --payloads ../requests.jsonl --error-rate 0.02
+
+Payload files are JSON lines. Lines that already look like deployment requests
+(with a ``brief``) are sent as they are; other lines (e.g. backlog entries with
+``title``/``body``) are turned into one. Task ids and nonces are made unique
+per submission, and ``evaluation_url`` always points at the fake evaluator.
+"""
+import argparse
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fake_github import FakeGitHub  # noqa: E402
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SECRET = 'bench-secret'
+SAMPLE_BRIEFS = [
+    'Build a calculator with basic arithmetic',
+    'Create a todo list app that saves tasks',
+    'Make a weather dashboard for any city',
+    'Portfolio page for a photographer',
+]
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a list of numbers"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(int(round(pct / 100.0 * len(ordered) + 0.5)) - 1, 0)
+    return ordered[min(rank, len(ordered) - 1)]
+
+
+def summarize(values):
+    return {f"p{pct}": round(percentile(values, pct), 3) if values else None for pct in (50, 95, 99)}
+
+
+def load_payloads(path):
+    if not path:
+        return [{'task': f"sample-{i}", 'brief': brief} for i, brief in enumerate(SAMPLE_BRIEFS)]
+    payloads = []
+    with open(path) as f:
+        for line in f:
+            if not line.strip():
+                continue
+            entry = json.loads(line)
+            if 'brief' not in entry:
+                entry = {
+                    'task': entry.get('request_id') or entry.get('task') or f"task-{len(payloads)}",
+                    'brief': ' '.join(filter(None, [entry.get('title'), entry.get('body')]))
+                }
+            payloads.append(entry)
+    return payloads
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def start_app(args, api_url, port, data_dir, log):
+    env = dict(
+        os.environ,
+        APP_SECRET=SECRET,
+        GITHUB_TOKEN='bench-token',
+        GITHUB_API_URL=api_url,
+        PAGES_URL_TEMPLATE=api_url + '/_pages/{login}/{repo}',
+        PAGES_POLL_INITIAL=os.getenv('PAGES_POLL_INITIAL', '0.5'),
+        JOB_POLL_SECONDS=os.getenv('JOB_POLL_SECONDS', '0.1'),
+        NOTIFY_BACKOFF_BASE=os.getenv('NOTIFY_BACKOFF_BASE', '0.2'),
+        DATA_DIR=data_dir,
+        DEPLOY_BACKEND=args.backend
+    )
+    if args.write_rate:
+        env['GITHUB_WRITE_RATE'] = str(args.write_rate)
+    process = subprocess.Popen([
+        sys.executable, '-m', 'gunicorn', '-c', 'gunicorn_config.py',
+        '--bind', f"127.0.0.1:{port}", '--workers', str(args.workers), 'app:app'
+    ], cwd=APP_DIR, env=env, stdout=log, stderr=subprocess.STDOUT)
+    base_url = f"http://127.0.0.1:{port}"
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"gunicorn exited with {process.returncode}, see {log.name}")
+        try:
+            requests.get(base_url + '/health', timeout=1)
+            return process, base_url
+        except requests.exceptions.RequestException:
+            time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError(f"gunicorn did not come up, see {log.name}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--payloads', help='JSON lines file of requests to replay (default: built-in briefs)')
+    parser.add_argument('--deployments', type=int, default=50)
+    parser.add_argument('--concurrency', type=int, default=10, help='parallel submitting clients')
+    parser.add_argument('--round2-ratio', type=float, default=0.0,
+                        help='fraction of deployments followed by a round-2 update')
+    parser.add_argument('--workers', type=int, default=2, help='gunicorn worker processes')
+    parser.add_argument('--backend', default='github', choices=['github', 'local-git', 'filesystem'],
+                        help='DEPLOY_BACKEND for the app (local backends need no fake GitHub calls)')
+    parser.add_argument('--latency', type=float, default=0.02, help='fake GitHub seconds per call')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='fraction of GitHub calls that return 502')
+    parser.add_argument('--evaluator-error-rate', type=float, default=0.0)
+    parser.add_argument('--rate-limit', type=int, default=5000)
+    parser.add_argument('--rate-window', type=int, default=3600)
+    parser.add_argument('--pages-delay', type=float, default=0.0)
+    parser.add_argument('--write-rate', type=float,
+                        help='override GITHUB_WRITE_RATE (the app paces content-creating calls, 1/s by default)')
+    parser.add_argument('--timeout', type=float, default=300, help='seconds to wait for deployments to finish')
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    fake = FakeGitHub(latency=args.latency, rate_limit=args.rate_limit, rate_window=args.rate_window,
+                      pages_delay=args.pages_delay, error_rate=args.error_rate,
+                      evaluator_error_rate=args.evaluator_error_rate, seed=args.seed)
+    api_url = fake.start()
+    data_dir = tempfile.mkdtemp(prefix='bench-load-')
+    log = open(os.path.join(data_dir, 'gunicorn.log'), 'w')
+    process, base_url = start_app(args, api_url, free_port(), data_dir, log)
+
+    payloads = load_payloads(args.payloads)
+    round1 = []
+    for i in range(args.deployments):
+        template = payloads[i % len(payloads)]
+        round1.append(dict(template, task=f"{template['task']}-{i}", nonce=f"n{i}", round=1,
+                           email=template.get('email', 'bench@example.com')))
+    round2 = [
+        dict(job, round=2, nonce=job['nonce'] + '-r2', brief=job['brief'] + ' Add a dark mode toggle.')
+        for job in round1[:int(args.deployments * args.round2_ratio)]
+    ]
+
+    print(f"🚚 Replaying {len(round1)} round-1 and {len(round2)} round-2 requests with "
+          f"{args.concurrency} clients against {args.workers} gunicorn workers")
+    try:
+        results = [replay(args, fake, base_url, api_url, round1)]
+        if round2:
+            # Round 2 needs the round-1 repository, so it starts once round 1 has settled
+            results.append(replay(args, fake, base_url, api_url, round2))
+        health = requests.get(base_url + '/health', timeout=10).json()
+    finally:
+        process.terminate()
+        process.wait()
+        log.close()
+
+    for result in results:
+        report(result)
+    calls = fake.calls
+    print(f"fake GitHub:             throttled={calls['throttled_primary'] + calls['throttled_secondary']} "
+          f"injected errors={calls['injected_errors']} connections={fake.connections}")
+    print(f"evaluator:               {len(fake.evaluations)} received, {calls['evaluator_errors']} rejected")
+    print(f"app health:              executor={health['executor']} notifications={health['notifications']}")
+    print(f"GitHub scheduler:        {health['github_rate_limit']} (last worker to answer)")
+    print(f"gunicorn log:            {log.name}")
+    fake.stop()
+
+
+def replay(args, fake, base_url, api_url, jobs):
+    """Submit jobs from concurrent clients and wait until each is notified or failed"""
+    submitted = {}
+    accept_latency = []
+    codes = {}
+    lock = threading.Lock()
+    pending = list(reversed(jobs))
+    calls_before = fake.calls['total']
+
+    def client():
+        session = requests.Session()
+        while True:
+            with lock:
+                if not pending:
+                    return
+                job = pending.pop()
+            body = dict(job, secret=SECRET, evaluation_url=api_url + '/_evaluate')
+            started = time.time()
+            try:
+                code = session.post(base_url + '/', json=body, timeout=30).status_code
+            except requests.exceptions.RequestException:
+                code = 'error'
+            elapsed = time.time() - started
+            with lock:
+                codes[code] = codes.get(code, 0) + 1
+                accept_latency.append(elapsed)
+                if code == 200:
+                    submitted[job['task']] = started
+
+    round_number = jobs[0]['round']
+    started = time.time()
+    clients = [threading.Thread(target=client) for _ in range(args.concurrency)]
+    for t in clients:
+        t.start()
+    for t in clients:
+        t.join()
+    accept_seconds = time.time() - started
+
+    # A deployment has finished once the evaluator heard about it or its status says failed
+    end_to_end = {}
+    failed = set()
+    session = requests.Session()
+    deadline = time.time() + args.timeout
+    while len(end_to_end) + len(failed) < len(submitted) and time.time() < deadline:
+        for evaluation in fake.list_evaluations()[1]:
+            task = evaluation['task']
+            if evaluation['round'] == round_number and task in submitted and task not in end_to_end:
+                end_to_end[task] = evaluation['received_at'] - submitted[task]
+        for task in submitted:
+            if task in end_to_end or task in failed:
+                continue
+            response = session.get(f"{base_url}/status/{task}", timeout=10)
+            if response.status_code == 200:
+                record = response.json()
+                if record.get('round') == round_number and record.get('status') == 'failed':
+                    failed.add(task)
+        time.sleep(0.2)
+
+    return {
+        'round': round_number,
+        'codes': codes,
+        'accept_latency': accept_latency,
+        'end_to_end': list(end_to_end.values()),
+        'accepted': len(submitted),
+        'failed': len(failed),
+        'accept_seconds': accept_seconds,
+        'total_seconds': time.time() - started,
+        'github_calls': fake.calls['total'] - calls_before
+    }
+
+
+def report(result):
+    accepted = result['accepted']
+    finished = len(result['end_to_end'])
+    print(f"-- round {result['round']} --")
+    print(f"accept latency (s):      {summarize(result['accept_latency'])} codes={result['codes']}")
+    print(f"end-to-end latency (s):  {summarize(result['end_to_end'])}")
+    print(f"deployments:             {finished}/{accepted} notified, {result['failed']} failed, "
+          f"{accepted - finished - result['failed']} unfinished")
+    print(f"failure rate:            {round((accepted - finished) / accepted, 3) if accepted else None}")
+    print(f"throughput:              {round(finished / result['total_seconds'], 2)} deployments/s "
+          f"(accepted in {result['accept_seconds']:.1f}s, settled in {result['total_seconds']:.1f}s)")
+    print(f"GitHub calls/deployment: {round(result['github_calls'] / accepted, 1) if accepted else None}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,115 @@
+"""Watch deployments to completion under gunicorn with plain GET /status/<task_id>
+polling vs long-polling (?wait=&since=): requests served per deployment and how
+long after the evaluation notification each client found out.
+
+    python benchmarks/bench_long_poll.py --deployments 20 --poll-interval 0.25 --latency 0.05
+"""
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_load import SECRET, free_port, percentile, start_app  # noqa: E402
+from fake_github import FakeGitHub  # noqa: E402
+
+
+def poll(base_url, task_id, interval, deadline):
+    """Poll until the notification is recorded; returns (requests made, not modified, seen at)"""
+    session = requests.Session()
+    count = 0
+    while time.time() < deadline:
+        count += 1
+        response = session.get(f"{base_url}/status/{task_id}", timeout=10)
+        if response.status_code == 200 and 'notification' in response.json():
+            return count, 0, time.time()
+        time.sleep(interval)
+    return count, 0, None
+
+
+def long_poll(base_url, task_id, wait, deadline):
+    """Long-poll with the last seen version until the notification is recorded"""
+    session = requests.Session()
+    count = not_modified = 0
+    version = 0  # wait for the record to appear
+    while time.time() < deadline:
+        count += 1
+        response = session.get(
+            f"{base_url}/status/{task_id}", params={'wait': wait, 'since': version},
+            headers={'If-None-Match': f'"{version}"'}, timeout=wait + 10
+        )
+        if response.status_code == 304:
+            not_modified += 1
+            continue
+        if response.status_code == 200:
+            version = int(response.headers['X-Status-Version'])
+            if 'notification' in response.json():
+                return count, not_modified, time.time()
+    return count, not_modified, None
+
+
+def run(mode, args, base_url, api_url, fake):
+    fake.reset()
+    deadline = time.time() + args.timeout
+    results = {}
+
+    def client(i):
+        task_id = f"{mode}-{i}"
+        requests.post(base_url + '/', json={
+            'email': 'student@example.com', 'secret': SECRET, 'task': task_id, 'round': 1,
+            'nonce': f"n-{i}", 'brief': 'Build a calculator', 'evaluation_url': api_url + '/_evaluate'
+        }, timeout=30)
+        if mode == 'poll':
+            results[task_id] = poll(base_url, task_id, args.poll_interval, deadline)
+        else:
+            results[task_id] = long_poll(base_url, task_id, args.wait, deadline)
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(args.deployments)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    notified_at = {e['task']: e['received_at'] for e in fake.evaluations}
+    lags = [seen - notified_at[task] for task, (_, _, seen) in results.items() if seen and task in notified_at]
+    status_requests = sum(count for count, _, _ in results.values())
+    not_modified = sum(n for _, n, _ in results.values())
+    print(f"{mode:>9}: {status_requests / args.deployments:6.1f} status requests/deployment "
+          f"({not_modified} answered 304), {len(lags)}/{args.deployments} observed, lag after notification "
+          f"p50 {percentile(lags, 50) * 1000 if lags else float('nan'):.0f} ms, "
+          f"p95 {percentile(lags, 95) * 1000 if lags else float('nan'):.0f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--deployments', type=int, default=20)
+    parser.add_argument('--poll-interval', type=float, default=0.25, help='seconds between status polls')
+    parser.add_argument('--wait', type=float, default=30, help='long-poll wait in seconds')
+    parser.add_argument('--workers', type=int, default=2, help='gunicorn worker processes')
+    parser.add_argument('--latency', type=float, default=0.05, help='fake GitHub seconds per call')
+    parser.add_argument('--timeout', type=float, default=120)
+    args = parser.parse_args()
+    args.backend = 'github'
+    args.write_rate = 1000
+
+    fake = FakeGitHub(latency=args.latency)
+    api_url = fake.start()
+    data_dir = tempfile.mkdtemp(prefix='bench-long-poll-')
+    log = open(os.path.join(data_dir, 'gunicorn.log'), 'w')
+    process, base_url = start_app(args, api_url, free_port(), data_dir, log)
+    try:
+        for mode in ('poll', 'long-poll'):
+            run(mode, args, base_url, api_url, fake)
+    finally:
+        process.terminate()
+        process.wait()
+        fake.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+"""Compare round-1 provisioning (create + auto_init + commit vs generate from a
+per-generator template repository) against the local GitHub stand-in: API calls
+and wall time per deployment, with and without an attachment.
+
+    python benchmarks/bench_provisioning.py --deployments 20 --latency 0.05 --template-delay 0.2
+"""
+import argparse
+import contextlib
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('GITHUB_TOKEN', 'bench-token')
+os.environ.setdefault('DATA_DIR', tempfile.mkdtemp(prefix='bench-provisioning-'))
+
+from fake_github import FakeGitHub  # noqa: E402
+
+BRIEFS = ['Build a calculator', 'Make a todo checklist', 'A countdown timer', 'A markdown editor']
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--deployments', type=int, default=20)
+    parser.add_argument('--latency', type=float, default=0.05, help='seconds added to every fake API call')
+    parser.add_argument('--template-delay', type=float, default=0.0,
+                        help='seconds before a generated repository has its content')
+    parser.add_argument('--write-rate', type=float, default=1000,
+                        help='GITHUB_WRITE_RATE for the run (the app paces content-creating calls, 1/s by default)')
+    args = parser.parse_args()
+
+    os.environ['GITHUB_WRITE_RATE'] = str(args.write_rate)
+    fake = FakeGitHub(latency=args.latency, template_delay=args.template_delay)
+    os.environ['GITHUB_API_URL'] = fake.start()
+    import app as app_module
+    from template_repos import template_repositories
+    app_module.GITHUB_API_URL = os.environ['GITHUB_API_URL']
+
+    for label, with_attachment in (('static app', False), ('with attachment', True)):
+        for mode in ('create', 'template'):
+            app_module.ROUND1_PROVISIONING = mode
+            fake.reset()
+            template_repositories._synced.clear()
+            elapsed = 0.0
+            calls = setup_calls = 0
+            for i in range(args.deployments):
+                app_files = app_module.AppGenerator.generate_app(BRIEFS[i % len(BRIEFS)])
+                if with_attachment:
+                    app_files['data.csv'] = f"id,value\n{i},42\n"
+                manager = app_module.GitHubManager()
+                # GitHubManager() itself costs one GET /user per deployment; count only provisioning
+                before = fake.calls['total'] - fake.calls['GET /user']
+                started = time.perf_counter()
+                with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+                    result = manager.create_repository(f"{mode}-{i}", app_files, 'bench@example.com')
+                seconds = time.perf_counter() - started
+                assert result['success'], result
+                used = fake.calls['total'] - fake.calls['GET /user'] - before
+                if i < len(BRIEFS):
+                    # First use of each generator syncs its template repository; reported separately
+                    setup_calls += used
+                else:
+                    calls += used
+                    elapsed += seconds
+            steady = args.deployments - len(BRIEFS)
+            print(f"{label:>15} {mode:>8}: {calls / steady:5.1f} API calls/deployment, "
+                  f"{elapsed / steady * 1000:7.1f} ms/deployment "
+                  f"(first {len(BRIEFS)} incl. template sync: {setup_calls} calls)")
+    fake.stop()
+
+
+if __name__ == '__main__':
+    main()
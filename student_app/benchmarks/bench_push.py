@@ -0,0 +1,78 @@
+"""Compare pushes (per-file Contents API vs single-commit Git Data API) for
+round 1 and round 2 against the local GitHub stand-in: API calls and wall time.
+
+    python benchmarks/bench_push.py --deployments 20 --latency 0.05
+"""
+import argparse
+import contextlib
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('GITHUB_TOKEN', 'bench-token')
+os.environ.setdefault('DATA_DIR', tempfile.mkdtemp(prefix='bench-push-'))
+# Measure the push itself, not the app's write pacing (GITHUB_WRITE_RATE, 1/s by default)
+os.environ.setdefault('GITHUB_WRITE_RATE', '100000')
+os.environ.setdefault('GITHUB_WRITE_BURST', '100000')
+
+from fake_github import FakeGitHub  # noqa: E402
+
+BRIEFS = ['Build a calculator', 'Make a todo checklist', 'A countdown timer', 'A markdown editor']
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--deployments', type=int, default=20)
+    parser.add_argument('--latency', type=float, default=0.05, help='seconds added to every fake API call')
+    parser.add_argument('--extra-files', type=int, default=0, help='additional asset files per app')
+    args = parser.parse_args()
+
+    fake = FakeGitHub(latency=args.latency)
+    os.environ['GITHUB_API_URL'] = fake.start()
+    import app as app_module
+    app_module.GITHUB_API_URL = os.environ['GITHUB_API_URL']
+
+    for mode in ('contents', 'git-data'):
+        app_module.GITHUB_PUSH_MODE = mode
+        fake.reset()
+        elapsed = 0.0
+        files = 0
+        for i in range(args.deployments):
+            with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+                app_files = app_module.AppGenerator.generate_app(BRIEFS[i % len(BRIEFS)])
+            for n in range(args.extra_files):
+                app_files[f"assets/extra-{n}.txt"] = f"asset {n}\n" * 100
+            files += len(app_files)
+            manager = app_module.GitHubManager()
+            started = time.perf_counter()
+            with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+                result = manager.create_repository(f"{mode}-{i}", app_files, 'bench@example.com')
+            elapsed += time.perf_counter() - started
+            assert result['success'], result
+        # The login behind pages_url is looked up once per process (GET /user); count only the push
+        calls = fake.calls['total'] - fake.calls['GET /user']
+        print(f"{mode:>9} round 1: {calls / args.deployments:5.1f} API calls/deployment "
+              f"({files / args.deployments:.1f} files), {elapsed / args.deployments * 1000:7.1f} ms/deployment")
+
+        # Round 2 with the same brief (nothing changes) and with a different one
+        for label, shift in (('same brief', 0), ('new brief', 1)):
+            before = fake.calls['total'] - fake.calls['GET /user']
+            started = time.perf_counter()
+            for i in range(args.deployments):
+                manager = app_module.GitHubManager()
+                with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+                    brief = BRIEFS[(i + shift) % len(BRIEFS)]
+                    result = manager.update_repository(
+                        f"{mode}-{i}", app_module.AppGenerator.generate_app(brief), f"Round 2 update: {brief}")
+                assert result['success'], result
+            elapsed = time.perf_counter() - started
+            calls = fake.calls['total'] - fake.calls['GET /user'] - before
+            print(f"{mode:>9} round 2 ({label}): {calls / args.deployments:5.1f} API calls/update, "
+                  f"{elapsed / args.deployments * 1000:7.1f} ms/update")
+    fake.stop()
+
+
+if __name__ == '__main__':
+    main()
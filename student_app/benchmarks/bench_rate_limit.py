@@ -0,0 +1,77 @@
+"""Run concurrent round-1 deployments against a fake GitHub with a tight primary
+budget and periodic secondary limits, with the scheduler queueing (default) or
+letting rate-limit errors through (--no-wait), and report outcomes.
+
+    python benchmarks/bench_rate_limit.py --deployments 20 --rate-limit 60 --rate-window 5
+"""
+import argparse
+import contextlib
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('GITHUB_TOKEN', 'bench-token')
+os.environ.setdefault('DATA_DIR', tempfile.mkdtemp(prefix='bench-ratelimit-'))
+
+from fake_github import FakeGitHub  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--deployments', type=int, default=20)
+    parser.add_argument('--concurrency', type=int, default=4)
+    parser.add_argument('--rate-limit', type=int, default=60)
+    parser.add_argument('--rate-window', type=int, default=5)
+    parser.add_argument('--secondary-every', type=int, default=15)
+    parser.add_argument('--no-wait', action='store_true', help='fail on rate limits instead of queueing')
+    args = parser.parse_args()
+
+    fake = FakeGitHub(rate_limit=args.rate_limit, rate_window=args.rate_window,
+                      secondary_every=args.secondary_every, retry_after=1)
+    base_url = fake.start()
+    import app as app_module
+    from rate_limiter import RateLimitScheduler
+    import github_client
+
+    app_module.GITHUB_API_URL = base_url
+    scheduler = RateLimitScheduler(reserve=2, write_rate=50, write_burst=10,
+                                   max_wait=0 if args.no_wait else 60)
+    github_client.github_scheduler = scheduler
+
+    results = []
+    lock = threading.Lock()
+    pending = list(range(args.deployments))
+
+    def worker():
+        while True:
+            with lock:
+                if not pending:
+                    return
+                i = pending.pop()
+            app_files = app_module.AppGenerator.generate_app('Build a calculator')
+            result = app_module.GitHubManager().create_repository(f"rl-{i}", app_files, 'e')
+            with lock:
+                results.append(result['success'])
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=worker) for _ in range(args.concurrency)]
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+    elapsed = time.perf_counter() - started
+
+    print(f"mode: {'fail-fast' if args.no_wait else 'queue'}")
+    print(f"deployments: {results.count(True)} succeeded, {results.count(False)} failed in {elapsed:.1f}s")
+    print(f"fake GitHub throttled: primary={fake.calls['throttled_primary']} "
+          f"secondary={fake.calls['throttled_secondary']}")
+    print(f"scheduler: {scheduler.stats()}")
+    fake.stop()
+
+
+if __name__ == '__main__':
+    main()
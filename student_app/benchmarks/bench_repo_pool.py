@@ -0,0 +1,72 @@
+"""Round-1 deployments against the local GitHub stand-in, creating each repository
+on the critical path vs claiming one from a pre-filled warm pool: wall time and
+API calls per deployment, pool hit rate and claim latency, and what keeping the
+pool full costs in the background.
+
+    python benchmarks/bench_repo_pool.py --deployments 20 --latency 0.3
+"""
+import argparse
+import contextlib
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('GITHUB_TOKEN', 'bench-token')
+os.environ.setdefault('DATA_DIR', tempfile.mkdtemp(prefix='bench-repo-pool-'))
+
+from fake_github import FakeGitHub  # noqa: E402
+
+BRIEFS = ['Build a calculator', 'Make a todo checklist', 'A countdown timer', 'A markdown editor']
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--deployments', type=int, default=20)
+    parser.add_argument('--latency', type=float, default=0.3, help='seconds added to every fake API call')
+    parser.add_argument('--write-rate', type=float, default=1000,
+                        help='GITHUB_WRITE_RATE for the run (the app paces content-creating calls, 1/s by default)')
+    args = parser.parse_args()
+
+    os.environ['GITHUB_WRITE_RATE'] = str(args.write_rate)
+    fake = FakeGitHub(latency=args.latency)
+    os.environ['GITHUB_API_URL'] = fake.start()
+    import app as app_module
+    from repo_pool import RepoPool
+    app_module.GITHUB_API_URL = os.environ['GITHUB_API_URL']
+
+    # Not started: the pool is filled explicitly between phases so fills never overlap deployments
+    pool = RepoPool(lambda name: app_module.GitHubManager().provision_pool_repository(name), size=args.deployments)
+    for label, warm in (('no pool', False), ('warm pool', True)):
+        fake.reset()
+        app_module.repo_pool = pool if warm else RepoPool(pool.provision, size=0)
+        fill_calls = 0
+        if warm:
+            with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+                pool.refill()
+            fill_calls = fake.calls['total'] - fake.calls['GET /user']
+        elapsed = 0.0
+        calls = 0
+        for i in range(args.deployments):
+            app_files = app_module.AppGenerator.generate_app(BRIEFS[i % len(BRIEFS)])
+            manager = app_module.GitHubManager()
+            # GitHubManager() itself costs one GET /user per deployment; count only provisioning
+            before = fake.calls['total'] - fake.calls['GET /user']
+            started = time.perf_counter()
+            with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+                result = manager.create_repository(f"{label.replace(' ', '-')}-{i}", app_files, 'bench@example.com')
+            elapsed += time.perf_counter() - started
+            calls += fake.calls['total'] - fake.calls['GET /user'] - before
+            assert result['success'], result
+        print(f"{label:>9}: {calls / args.deployments:4.1f} API calls/deployment, "
+              f"{elapsed / args.deployments * 1000:7.1f} ms/deployment")
+        if warm:
+            stats = pool.stats()
+            print(f"{'':>9}  hit rate {stats['hit_rate']}, claim p50 {stats['claim_ms_p50']} ms, "
+                  f"background fill {fill_calls / args.deployments:.1f} API calls/repository")
+    fake.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,86 @@
+"""Round-2 cost with and without the local record of pushed files: deploy
+round 1 for a batch of tasks against the local GitHub stand-in, then a
+small-tweak round-2 brief for each, and report GitHub calls, request bytes
+and (with --generator llm, against the fake LLM) completion tokens and
+generation time per round-2 deployment.
+
+    python benchmarks/bench_round2.py --deployments 50 --generator template
+    python benchmarks/bench_round2.py --deployments 20 --generator llm
+"""
+import argparse
+import contextlib
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('GITHUB_TOKEN', 'bench-token')
+os.environ.setdefault('DATA_DIR', tempfile.mkdtemp(prefix='bench-round2-'))
+os.environ.setdefault('GITHUB_WRITE_RATE', '100000')
+os.environ.setdefault('GITHUB_WRITE_BURST', '100000')
+
+from bench_load import percentile  # noqa: E402
+from fake_github import FakeGitHub  # noqa: E402
+from fake_llm import FakeLLM  # noqa: E402
+
+BRIEFS = ['Build a calculator', 'Make a todo checklist', 'A countdown timer', 'A markdown editor']
+TWEAK = 'and give the page a dark theme'
+
+
+def deploy(app_module, task_id, round_number, brief):
+    return app_module.process_deployment({
+        'task': task_id, 'round': round_number, 'nonce': f"n{round_number}",
+        'email': 'bench@example.com', 'brief': brief
+    })
+
+
+def run(app_module, mode, args, github):
+    snapshots = app_module.pushed_files.get
+    if mode == 'full':
+        app_module.pushed_files.get = lambda *a, **kw: None  # regenerate and diff the remote tree
+    tasks = [(f"{mode}-{i}", f"{BRIEFS[i % len(BRIEFS)]} #{i}") for i in range(args.deployments)]
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        for task_id, brief in tasks:
+            deploy(app_module, task_id, 1, brief)
+        calls, sent = github.calls['total'], github.calls['request_bytes']
+        tokens = app_module.AppGenerator.llm.stats()['completion_tokens']
+        records = [deploy(app_module, task_id, 2, f"{brief} {TWEAK}") for task_id, brief in tasks]
+    app_module.pushed_files.get = snapshots
+
+    n = args.deployments
+    generate_ms = [r['timings']['generate_ms'] for r in records if 'timings' in r]
+    deploy_ms = [r['timings']['deploy_ms'] for r in records if 'timings' in r]
+    failed = sum(1 for r in records if r.get('status') != 'completed')
+    print(f"{mode:>12}: {(github.calls['total'] - calls) / n:5.1f} GitHub calls, "
+          f"{(github.calls['request_bytes'] - sent) / n / 1024:6.1f} KiB sent, "
+          f"{(app_module.AppGenerator.llm.stats()['completion_tokens'] - tokens) / n:6.0f} completion tokens "
+          f"per round-2 deployment; generate p50 {percentile(generate_ms, 50) or 0:.1f} ms, "
+          f"deploy p50 {percentile(deploy_ms, 50) or 0:.1f} ms, {failed} failed")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--deployments', type=int, default=50)
+    parser.add_argument('--generator', choices=['template', 'llm'], default='template')
+    parser.add_argument('--latency', type=float, default=0.0, help='fake GitHub seconds per call')
+    parser.add_argument('--first-token', type=float, default=0.05, help='fake LLM seconds to first token')
+    parser.add_argument('--tokens-per-second', type=float, default=2000, help='fake LLM streaming rate')
+    args = parser.parse_args()
+
+    github = FakeGitHub(latency=args.latency)
+    os.environ['GITHUB_API_URL'] = github.start()
+    llm = FakeLLM(first_token=args.first_token, tokens_per_second=args.tokens_per_second)
+    os.environ['LLM_API_URL'] = llm.start()
+    os.environ['GENERATOR_BACKEND'] = args.generator
+    import app as app_module
+    app_module.pages_tracker.track = lambda *a, **kw: None  # nothing to poll against the stand-in
+
+    for mode in ('full', 'incremental'):
+        run(app_module, mode, args, github)
+    github.stop()
+    llm.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,115 @@
+"""Build the TF-IDF similarity index over a synthetic catalog of templates
+(default 10k) and report index build time and memory, per-brief selection
+latency and top-1/top-k accuracy, next to the keyword classifier on the same
+catalog.
+
+    python benchmarks/bench_similarity.py --templates 10000 --briefs 2000
+"""
+import argparse
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_load import percentile  # noqa: E402
+from classifier import KeywordClassifier  # noqa: E402
+from similarity import SimilarityClassifier  # noqa: E402
+
+FILLER = (
+    'please build a simple page that shows the data with a clean layout and responsive design '
+    'it should work on mobile include a header and footer load quickly handle errors gracefully '
+    'store settings locally add accessibility labels and document the usage in the readme'
+).split()
+
+
+def word(i, prefix=''):
+    """A distinct made-up word per number (letters only: digits break words)"""
+    letters = ''
+    while True:
+        i, digit = divmod(i, 26)
+        letters += 'abcdefghijklmnopqrstuvwxyz'[digit]
+        if not i:
+            return f"{prefix}{letters}o"
+
+
+def make_catalog(count, lexicon_size, rng):
+    """(documents, rules): descriptions drawn Zipf-like from a synthetic lexicon"""
+    lexicon = [word(i, 'w') for i in range(lexicon_size)]
+    ranks = [1.0 / (i + 1) for i in range(lexicon_size)]
+    documents, rules = [], []
+    for i in range(count):
+        description = ' '.join(rng.choices(lexicon, weights=ranks, k=rng.randint(12, 30)))
+        keywords = {word(i * 3 + j, 'k'): rng.choice([1, 2]) for j in range(3)}
+        documents.append((f"template{i}", i, description, keywords))
+        rules.append((f"template{i}", i, keywords))
+    return documents, rules
+
+
+def make_briefs(documents, count, rng):
+    """(brief, target template) pairs: some of the target's words plus filler"""
+    briefs = []
+    for _ in range(count):
+        name, _, description, keywords = rng.choice(documents)
+        words = rng.sample(description.split(), k=min(5, len(description.split())))
+        if rng.random() < 0.3:
+            words.append(rng.choice(list(keywords)))  # only some briefs name a keyword outright
+        words += rng.choices(FILLER, k=rng.randint(5, 20))
+        rng.shuffle(words)
+        briefs.append((' '.join(words), name))
+    return briefs
+
+
+def build(factory):
+    tracemalloc.start()
+    started = time.perf_counter()
+    classifier = factory()
+    seconds = time.perf_counter() - started
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return classifier, seconds, retained, peak
+
+
+def measure(label, classify, briefs, build_seconds, retained, peak):
+    latencies = []
+    correct = 0
+    for brief, target in briefs:
+        started = time.perf_counter()
+        generator = classify(brief)
+        latencies.append((time.perf_counter() - started) * 1e6)
+        correct += generator == target
+    print(f"{label:>10}: built in {build_seconds:.2f}s, {retained / 2 ** 20:6.1f} MiB retained "
+          f"(peak {peak / 2 ** 20:.1f} MiB); selection p50 {percentile(latencies, 50):7.1f} µs, "
+          f"p95 {percentile(latencies, 95):7.1f} µs; top-1 accuracy {correct / len(briefs):.1%}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--templates', type=int, default=10000)
+    parser.add_argument('--briefs', type=int, default=2000)
+    parser.add_argument('--lexicon', type=int, default=20000, help='distinct description words')
+    parser.add_argument('--top-k', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    documents, rules = make_catalog(args.templates, args.lexicon, rng)
+    briefs = make_briefs(documents, args.briefs, rng)
+    print(f"{args.templates} templates, {args.briefs} briefs")
+
+    similarity, seconds, retained, peak = build(lambda: SimilarityClassifier(documents, 'default', min_score=0.0,
+                                                                              top_k=args.top_k))
+    print(f"index: {similarity.stats()}")
+    measure('similarity', lambda b: similarity.classify(b).generator, briefs, seconds, retained, peak)
+    in_top_k = sum(target in [name for name, _ in similarity.rank(brief, args.top_k)] for brief, target in briefs)
+    print(f"{'':>10}  top-{args.top_k} accuracy {in_top_k / len(briefs):.1%}")
+
+    keywords, seconds, retained, peak = build(lambda: KeywordClassifier(rules, 'default', min_score=0.0))
+    measure('keywords', lambda b: keywords.classify(b).generator, briefs, seconds, retained, peak)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+"""Measure status read throughput per store backend and check cross-process visibility.
+
+    python benchmarks/bench_status_store.py --reads 200000
+"""
+import argparse
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DATA_DIR', tempfile.mkdtemp(prefix='bench-status-'))
+os.environ.setdefault('GITHUB_TOKEN', 'bench-token')
+
+from db import Database  # noqa: E402
+from status_store import MemoryStatusStore, SQLiteStatusStore  # noqa: E402
+
+
+def record(i, status='completed'):
+    return {
+        'status': status,
+        'round': 1,
+        'github_result': {
+            'success': True,
+            'repo_url': f"https://github.com/bench/llm-app-task-{i}",
+            'pages_url': f"https://bench.github.io/llm-app-task-{i}",
+            'commit_sha': f"{i:040x}"
+        },
+        'timestamp': '2024-01-01T00:00:00'
+    }
+
+
+def reads_per_second(store, tasks, reads):
+    started = time.perf_counter()
+    for i in range(reads):
+        store.get_raw(tasks[i % len(tasks)])
+    return reads / (time.perf_counter() - started)
+
+
+def write_from_child(path, task_id):
+    SQLiteStatusStore(Database(path)).set(task_id, record(0, status='failed'))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--reads', type=int, default=200000)
+    parser.add_argument('--tasks', type=int, default=1000)
+    args = parser.parse_args()
+
+    tasks = [f"task-{i}" for i in range(args.tasks)]
+    path = os.path.join(os.environ['DATA_DIR'], 'status.db')
+    stores = {'memory': MemoryStatusStore(), 'sqlite': SQLiteStatusStore(Database(path))}
+    for name, store in stores.items():
+        for i, task_id in enumerate(tasks):
+            store[task_id] = record(i)
+        print(f"{name:>6} store: {reads_per_second(store, tasks, args.reads):10.0f} reads/s")
+
+    # A write from another process must be visible on the next read here
+    sqlite_store = stores['sqlite']
+    sqlite_store.get_raw(tasks[0])
+    child = multiprocessing.Process(target=write_from_child, args=(path, tasks[0]))
+    child.start()
+    child.join()
+    print(f"cross-process read after child write: {sqlite_store.get(tasks[0])['status']}")
+
+    import app as app_module
+    app_module.deployments = sqlite_store
+    client = app_module.app.test_client()
+    count = min(args.reads, 20000)
+    started = time.perf_counter()
+    for i in range(count):
+        client.get(f"/status/{tasks[i % len(tasks)]}")
+    print(f"GET /status via Flask: {count / (time.perf_counter() - started):10.0f} req/s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,192 @@
+"""Load time and per-worker memory of a large template catalog (default 1k
+templates) held three ways: as string literals in a Python module (how the
+generators used to live in app.py), as a templates directory read by the
+registry, and as a memory-mapped template pack. Several worker processes load
+the catalog side by side and report RSS, PSS (shared pages split between the
+processes mapping them) and private memory after loading and again after
+rendering a sample of templates. Load time is the median over workers of
+reading the catalog (importing the module, for literals).
+
+    python benchmarks/bench_template_pack.py --templates 1000 --workers 4 --render 50
+"""
+import argparse
+import json
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+MODES = ('bare', 'literals', 'directory', 'pack')
+
+PAGE = '''<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="UTF-8">
+<title>{title}</title>
+<link href="https://cdn.jsdelivr.net/npm/bootstrap@5.3.0/dist/css/bootstrap.min.css" rel="stylesheet">
+</head>
+<body class="container py-5">
+<h1>{title}</h1>
+<p class="lead">{{{{ brief }}}}</p>
+{sections}
+<script src="app.js"></script>
+</body>
+</html>
+'''
+
+
+def make_catalog(directory, count, rng):
+    """Write count template directories of a few KB each, like app_templates/"""
+    shutil.copy(os.path.join(ROOT, 'app_templates', 'LICENSE'), directory)
+    words = 'list board timer chart note photo quiz recipe budget habit weather map poll chat'.split()
+    for i in range(count):
+        root = os.path.join(directory, f"template{i:04d}")
+        os.makedirs(root)
+        title = ' '.join(rng.sample(words, 3)).title()
+        sections = '\n'.join(
+            f'<section class="card mb-3"><div class="card-body" id="s{j}">'
+            f'<h2 class="h5">{rng.choice(words)} {j}</h2><p>{" ".join(rng.choices(words, k=40))}</p></div></section>'
+            for j in range(rng.randint(8, 16))
+        )
+        script = '\n'.join(
+            f"function step{j}(state) {{ return Object.assign({{}}, state, {{ {rng.choice(words)}: {j} }}); }}"
+            for j in range(rng.randint(60, 120))
+        )
+        files = {
+            'index.html': PAGE.format(title=title, sections=sections),
+            'app.js': script + '\n',
+            'README.md': f"# {title}\n\n## Summary\n{{{{ brief }}}}\n\n## Usage\nOpen index.html.\n",
+            'template.json': json.dumps({'priority': 100 + i, 'keywords': {f"kind{i}": 2},
+                                         'description': ' '.join(rng.sample(words, 5))})
+        }
+        for path, text in files.items():
+            with open(os.path.join(root, path), 'w', encoding='utf-8', newline='') as f:
+                f.write(text)
+
+
+def write_literals(registry, path):
+    """A Python module holding every template file as a string literal"""
+    from template_pack import _source
+
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('TEMPLATES = {\n')
+        for name, template in registry.templates.items():
+            files = {file_path: _source(compiled) for file_path, compiled in template.files.items()}
+            f.write(f"    {name!r}: {files!r},\n")
+        f.write('}\n')
+
+
+def memory():
+    """(rss, pss, private) of this process in bytes, from /proc"""
+    values = {}
+    with open('/proc/self/smaps_rollup') as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == 'kB':
+                values[parts[0].rstrip(':')] = int(parts[1]) * 1024
+    return values['Rss'], values['Pss'], values.get('Private_Clean', 0) + values.get('Private_Dirty', 0)
+
+
+def worker(mode, workdir, render, seed):
+    """Load the catalog one way, then report memory whenever the parent asks"""
+    names = []
+    if mode in ('directory', 'pack'):
+        from template_registry import TemplateRegistry  # module imports are not part of load time
+    started = time.perf_counter()
+    if mode == 'literals':
+        sys.path.insert(0, workdir)
+        import templates_literal
+        names = list(templates_literal.TEMPLATES)
+        registry = templates_literal.TEMPLATES
+    elif mode in ('directory', 'pack'):
+        if mode == 'pack':
+            registry = TemplateRegistry(pack=os.path.join(workdir, 'templates.pack'))
+        else:
+            registry = TemplateRegistry(os.path.join(workdir, 'catalog'))
+        names = list(registry.templates)
+    load_ms = (time.perf_counter() - started) * 1000
+
+    def report(stage, **extra):
+        rss, pss, private = memory()
+        print(json.dumps(dict(stage=stage, rss=rss, pss=pss, private=private, **extra)), flush=True)
+
+    sys.stdin.readline()
+    report('load', load_ms=load_ms)
+    kept = []
+    for name in random.Random(seed).sample(names, min(render, len(names))):
+        if mode == 'literals':
+            kept.append({path: text.replace('{{ brief }}', 'A brief') for path, text in registry[name].items()})
+        else:
+            kept.append(registry.render(name, brief='A brief'))
+    sys.stdin.readline()
+    report('render')
+
+
+def run(mode, args, workdir):
+    procs = [
+        subprocess.Popen([sys.executable, __file__, '--worker', mode, '--workdir', workdir,
+                          '--render', str(args.render), '--seed', str(i)],
+                         stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True, cwd=ROOT)
+        for i in range(args.workers)
+    ]
+    results = {}
+    for stage in ('load', 'render'):
+        # Measure only once every worker has loaded, so shared pages are split between all of them
+        for proc in procs:
+            proc.stdin.write('\n')
+            proc.stdin.flush()
+        results[stage] = [json.loads(proc.stdout.readline()) for proc in procs]
+    for proc in procs:
+        proc.stdin.close()
+        proc.wait()
+
+    load_ms = sorted(r['load_ms'] for r in results['load'])[len(procs) // 2]
+    line = f"{mode:>10}: load {load_ms:7.1f} ms"
+    for stage in ('load', 'render'):
+        rows = results[stage]
+        mib = [sum(r[key] for r in rows) / len(rows) / 2 ** 20 for key in ('rss', 'pss', 'private')]
+        line += f" | after {stage}: RSS {mib[0]:5.1f} PSS {mib[1]:5.1f} private {mib[2]:5.1f} MiB"
+    print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--templates', type=int, default=1000)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--render', type=int, default=50, help='templates each worker renders after loading')
+    parser.add_argument('--seed', type=int, default=7)
+    parser.add_argument('--worker', choices=MODES, help=argparse.SUPPRESS)
+    parser.add_argument('--workdir', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.worker:
+        return worker(args.worker, args.workdir, args.render, args.seed)
+
+    from template_pack import write_pack
+    from template_registry import TemplateRegistry
+
+    workdir = tempfile.mkdtemp(prefix='bench-template-pack-')
+    try:
+        catalog = os.path.join(workdir, 'catalog')
+        os.makedirs(catalog)
+        make_catalog(catalog, args.templates, random.Random(args.seed))
+        registry = TemplateRegistry(catalog)
+        started = time.perf_counter()
+        size = write_pack(registry, os.path.join(workdir, 'templates.pack'))
+        print(f"{args.templates} templates, {args.workers} workers; pack {size / 2 ** 20:.1f} MiB built in "
+              f"{time.perf_counter() - started:.2f}s")
+        write_literals(registry, os.path.join(workdir, 'templates_literal.py'))
+        subprocess.run([sys.executable, '-m', 'compileall', '-q', workdir], check=True)  # import from .pyc
+        for mode in MODES:
+            run(mode, args, workdir)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
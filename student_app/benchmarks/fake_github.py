@@ -0,0 +1,576 @@
+"""Local stand-in for the parts of the GitHub REST API that GitHubManager uses.
+
+Keeps repositories in memory with real git blob SHAs, counts every call per
+endpoint, sends X-RateLimit-* headers and can add latency, random 502s, a
+primary budget and periodic secondary limits, so pushes can be benchmarked
+without GitHub. It also stands in for the evaluator: notifications POSTed to
+/_evaluate are recorded with their arrival time and listed at /_evaluations.
+
+    python benchmarks/fake_github.py --port 8765 --latency 0.05
+    GITHUB_API_URL=http://127.0.0.1:8765 GITHUB_TOKEN=x \
+        PAGES_URL_TEMPLATE='http://127.0.0.1:8765/_pages/{login}/{repo}' python app.py
+"""
+import argparse
+import base64
+import hashlib
+import json
+import math
+import random
+import re
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+
+LOGIN = 'fake-user'
+MIT_LICENSE = 'MIT License\n\nCopyright (c) fake\n'
+
+
+def git_sha(kind, data):
+    return hashlib.sha1(f"{kind} {len(data)}\0".encode() + data).hexdigest()
+
+
+class FakeRepo:
+    def __init__(self, server, name, auto_init, license_template):
+        self.server = server
+        self.name = name
+        self.blobs = {}
+        self.trees = {}
+        self.commits = {}
+        self.refs = {}
+        self.pages = None
+        self.is_template = False
+        self.pending_copy = None  # (entries, ready_at) while a generate-from-template copy runs
+        self.pushed_at = time.time()
+        self.lock = threading.Lock()
+        if auto_init:
+            files = {'README.md': f"# {name}\n".encode()}
+            if license_template:
+                files['LICENSE'] = MIT_LICENSE.encode()
+            self.commit_files(files, 'Initial commit')
+
+    @property
+    def url(self):
+        return f"{self.server.base_url}/repos/{LOGIN}/{self.name}"
+
+    def to_json(self):
+        return {
+            'id': abs(hash(self.name)) % 10 ** 8,
+            'name': self.name,
+            'full_name': f"{LOGIN}/{self.name}",
+            'owner': {'login': LOGIN},
+            'private': False,
+            'html_url': f"https://github.com/{LOGIN}/{self.name}",
+            'url': self.url,
+            'default_branch': 'main',
+            'is_template': self.is_template
+        }
+
+    def add_blob(self, data):
+        sha = git_sha('blob', data)
+        self.blobs[sha] = data
+        return sha
+
+    def add_tree(self, entries):
+        # entries: {path: blob_sha}; the tree SHA only needs to be stable, not git-exact
+        data = json.dumps(sorted(entries.items())).encode()
+        sha = git_sha('tree', data)
+        self.trees[sha] = dict(entries)
+        return sha
+
+    def add_commit(self, tree_sha, parents, message):
+        data = json.dumps([tree_sha, parents, message, time.time()]).encode()
+        sha = git_sha('commit', data)
+        self.commits[sha] = {'tree': tree_sha, 'parents': parents, 'message': message}
+        return sha
+
+    def head_entries(self):
+        head = self.refs.get('heads/main')
+        return dict(self.trees[self.commits[head]['tree']]) if head else {}
+
+    def commit_files(self, files, message, deleted=()):
+        entries = self.head_entries()
+        for path, data in files.items():
+            entries[path] = self.add_blob(data)
+        for path in deleted:
+            entries.pop(path, None)
+        parents = [self.refs['heads/main']] if 'heads/main' in self.refs else []
+        sha = self.add_commit(self.add_tree(entries), parents, message)
+        self.refs['heads/main'] = sha
+        self.pushed_at = time.time()
+        return sha
+
+    def commit_json(self, sha):
+        commit = self.commits[sha]
+        return {
+            'sha': sha,
+            'url': f"{self.url}/git/commits/{sha}",
+            'message': commit['message'],
+            'tree': {'sha': commit['tree'], 'url': f"{self.url}/git/trees/{commit['tree']}"},
+            'parents': [{'sha': p, 'url': f"{self.url}/git/commits/{p}"} for p in commit['parents']]
+        }
+
+    def tree_json(self, sha):
+        return {
+            'sha': sha,
+            'url': f"{self.url}/git/trees/{sha}",
+            'truncated': False,
+            'tree': [
+                {'path': path, 'mode': '100644', 'type': 'blob', 'sha': blob,
+                 'size': len(self.blobs[blob]), 'url': f"{self.url}/git/blobs/{blob}"}
+                for path, blob in sorted(self.trees[sha].items())
+            ]
+        }
+
+    def ref_json(self, ref):
+        sha = self.refs[ref]
+        return {
+            'ref': f"refs/{ref}",
+            'url': f"{self.url}/git/refs/{ref}",
+            'object': {'sha': sha, 'type': 'commit', 'url': f"{self.url}/git/commits/{sha}"}
+        }
+
+    def content_json(self, path, blob):
+        return {
+            'type': 'file',
+            'name': path.rsplit('/', 1)[-1],
+            'path': path,
+            'sha': blob,
+            'size': len(self.blobs[blob]),
+            'encoding': 'base64',
+            'content': base64.b64encode(self.blobs[blob]).decode(),
+            'url': f"{self.url}/contents/{path}"
+        }
+
+
+class FakeGitHub:
+    """In-memory GitHub state plus per-endpoint call counters"""
+
+    def __init__(self, latency=0.0, rate_limit=5000, rate_window=3600, secondary_every=0, retry_after=1,
+                 pages_delay=0.0, error_rate=0.0, evaluator_error_rate=0.0, seed=None, template_delay=0.0):
+        self.latency = latency
+        self.template_delay = template_delay  # seconds until a repo generated from a template has content
+        self.error_rate = error_rate  # fraction of API calls answered with a 502
+        self.evaluator_error_rate = evaluator_error_rate  # fraction of notifications answered with a 503
+        self.random = random.Random(seed)
+        self.pages_delay = pages_delay  # seconds from a push until Pages reports it built
+        self.rate_limit = rate_limit
+        self.rate_window = rate_window
+        self.secondary_every = secondary_every  # every Nth write hits a secondary limit (0 = never)
+        self.retry_after = retry_after
+        self.window_start = time.time()
+        self.used = 0
+        self.writes = 0
+        self.repos = {}
+        self.evaluations = []
+        self.calls = Counter()
+        self.connections = 0
+        self.lock = threading.Lock()
+        self.base_url = None
+        self.httpd = None
+
+    # -- routing -------------------------------------------------------------
+
+    def routes(self):
+        repo = r'/repos/[^/]+/(?P<repo>[^/]+)'
+        return [
+            ('GET', r'/user', self.get_user),
+            ('POST', r'/user/repos', self.create_repo),
+            ('GET', repo, self.get_repo),
+            ('PATCH', repo, self.edit_repo),
+            ('POST', repo + r'/generate', self.generate_repo),
+            ('GET', repo + r'/contents/(?P<path>.+)', self.get_contents),
+            ('PUT', repo + r'/contents/(?P<path>.+)', self.put_contents),
+            ('GET', repo + r'/commits', self.list_commits),
+            ('POST', repo + r'/pages', self.create_pages),
+            ('GET', repo + r'/pages', self.get_pages),
+            ('GET', repo + r'/pages/builds/latest', self.latest_pages_build),
+            ('POST', repo + r'/git/blobs', self.create_blob),
+            ('POST', repo + r'/git/trees', self.create_tree),
+            ('GET', repo + r'/git/trees/(?P<sha>[^/]+)', self.get_tree),
+            ('POST', repo + r'/git/commits', self.create_commit),
+            ('GET', repo + r'/git/commits/(?P<sha>[^/]+)', self.get_commit),
+            ('GET', repo + r'/git/refs/(?P<ref>.+)', self.get_ref),
+            ('PATCH', repo + r'/git/refs/(?P<ref>.+)', self.update_ref),
+            ('GET', r'/_pages/[^/]+/(?P<repo>[^/]+)/?', self.serve_pages),
+            ('HEAD', r'/_pages/[^/]+/(?P<repo>[^/]+)/?', self.serve_pages),
+            ('POST', r'/_evaluate', self.evaluate),
+            ('GET', r'/_evaluations', self.list_evaluations),
+            ('GET', r'/_stats', self.stats),
+            ('POST', r'/_reset', self.reset),
+        ]
+
+    def _roll_window(self):
+        now = time.time()
+        if now >= self.window_start + self.rate_window:
+            self.window_start = now
+            self.used = 0
+
+    def rate_headers(self):
+        with self.lock:
+            self._roll_window()
+            return {
+                'X-RateLimit-Limit': str(self.rate_limit),
+                'X-RateLimit-Remaining': str(max(self.rate_limit - self.used, 0)),
+                'X-RateLimit-Reset': str(math.ceil(self.window_start + self.rate_window))
+            }
+
+    def throttle(self, method):
+        """Return a rate-limit error response for this call, or None to serve it"""
+        with self.lock:
+            self._roll_window()
+            if self.used >= self.rate_limit:
+                self.calls['throttled_primary'] += 1
+                return 403, {'message': 'API rate limit exceeded'}, {}
+            self.used += 1
+            if method in ('POST', 'PUT', 'PATCH', 'DELETE') and self.secondary_every:
+                self.writes += 1
+                if self.writes % self.secondary_every == 0:
+                    self.calls['throttled_secondary'] += 1
+                    return 403, {'message': 'You have exceeded a secondary rate limit'}, \
+                        {'Retry-After': str(self.retry_after)}
+        return None
+
+    def dispatch(self, method, path, query, body):
+        """Route a request; returns (status, payload, extra_headers)"""
+        for route_method, pattern, handler in self.routes():
+            match = re.fullmatch(pattern, path)
+            if route_method == method and match:
+                if path.startswith('/_'):
+                    return handler(body=body, query=query, **match.groupdict()) + ({},)
+                if self.latency:
+                    time.sleep(self.latency)
+                throttled = self.throttle(method)
+                if throttled:
+                    return throttled
+                if self.error_rate and self.random.random() < self.error_rate:
+                    with self.lock:
+                        self.calls['injected_errors'] += 1
+                    return 502, {'message': 'Server Error'}, {}
+                with self.lock:
+                    self.calls[f"{method} {pattern}"] += 1
+                    self.calls['total'] += 1
+                return handler(body=body, query=query, **match.groupdict()) + ({},)
+        return 404, {'message': 'Not Found'}, {}
+
+    def _repo(self, repo):
+        found = self.repos.get(repo)
+        if found is None:
+            raise LookupError(repo)
+        with found.lock:
+            if found.pending_copy and time.time() >= found.pending_copy[1]:
+                entries, _ = found.pending_copy
+                found.pending_copy = None
+                found.commit_files({path: found.server.blob_data(blob) for path, blob in entries.items()},
+                                   'Initial commit')
+        return found
+
+    def blob_data(self, sha):
+        for fake in list(self.repos.values()):
+            if sha in fake.blobs:
+                return fake.blobs[sha]
+        raise LookupError(sha)
+
+    # -- handlers ------------------------------------------------------------
+
+    def get_user(self, **_):
+        return 200, {'login': LOGIN, 'id': 1, 'url': f"{self.base_url}/users/{LOGIN}"}
+
+    def create_repo(self, body, **_):
+        name = body['name']
+        with self.lock:
+            if name in self.repos:
+                return 422, {'message': 'Repository creation failed.',
+                             'errors': [{'message': 'name already exists on this account'}]}
+            repo = self.repos[name] = FakeRepo(
+                self, name, body.get('auto_init', False), body.get('license_template'))
+        return 201, repo.to_json()
+
+    def get_repo(self, repo, **_):
+        return 200, self._repo(repo).to_json()
+
+    def edit_repo(self, repo, body, **_):
+        with self.lock:
+            fake = self._repo(repo)
+            if 'name' in body and body['name'] != repo:
+                if body['name'] in self.repos:
+                    return 422, {'message': 'name already exists on this account'}
+                self.repos[body['name']] = self.repos.pop(repo)
+                fake.name = body['name']
+            if 'is_template' in body:
+                fake.is_template = bool(body['is_template'])
+        return 200, fake.to_json()
+
+    def generate_repo(self, repo, body, **_):
+        """Create a repository from a template; its content appears after template_delay"""
+        template = self._repo(repo)
+        if not template.is_template:
+            return 422, {'message': 'Repository is not a template'}
+        name = body['name']
+        with self.lock:
+            if name in self.repos:
+                return 422, {'message': 'Repository creation failed.',
+                             'errors': [{'message': 'name already exists on this account'}]}
+            fake = self.repos[name] = FakeRepo(self, name, False, None)
+            fake.pending_copy = (template.head_entries(), time.time() + self.template_delay)
+        return 201, fake.to_json()
+
+    def get_contents(self, repo, path, **_):
+        fake = self._repo(repo)
+        blob = fake.head_entries().get(path)
+        if blob is None:
+            return 404, {'message': 'Not Found'}
+        return 200, fake.content_json(path, blob)
+
+    def put_contents(self, repo, path, body, **_):
+        fake = self._repo(repo)
+        with fake.lock:
+            current = fake.head_entries().get(path)
+            if current is not None and body.get('sha') != current:
+                return 409, {'message': f"{path} does not match {body.get('sha')}"}
+            sha = fake.commit_files({path: base64.b64decode(body['content'])}, body['message'])
+            blob = fake.head_entries()[path]
+        return (200 if current else 201), {
+            'content': fake.content_json(path, blob),
+            'commit': fake.commit_json(sha)
+        }
+
+    def list_commits(self, repo, **_):
+        fake = self._repo(repo)
+        commits = []
+        sha = fake.refs.get('heads/main')
+        while sha:
+            commits.append(dict(fake.commit_json(sha), commit={'message': fake.commits[sha]['message']}))
+            parents = fake.commits[sha]['parents']
+            sha = parents[0] if parents else None
+        if not commits:
+            return 409, {'message': 'Git Repository is empty.'}
+        return 200, commits
+
+    def create_pages(self, repo, body, **_):
+        fake = self._repo(repo)
+        fake.pages = {
+            'url': f"{fake.url}/pages",
+            'status': 'built',
+            'html_url': f"https://{LOGIN}.github.io/{repo}/",
+            'build_type': body.get('build_type', 'legacy'),
+            'source': body.get('source')
+        }
+        return 201, fake.pages
+
+    def get_pages(self, repo, **_):
+        fake = self._repo(repo)
+        if fake.pages is None:
+            return 404, {'message': 'Not Found'}
+        return 200, fake.pages
+
+    def _pages_built(self, fake):
+        return fake.pages is not None and time.time() - fake.pushed_at >= self.pages_delay
+
+    def latest_pages_build(self, repo, **_):
+        fake = self._repo(repo)
+        if fake.pages is None:
+            return 404, {'message': 'Not Found'}
+        return 200, {
+            'url': f"{fake.url}/pages/builds/latest",
+            'status': 'built' if self._pages_built(fake) else 'building',
+            'commit': fake.refs.get('heads/main'),
+            'error': {'message': None}
+        }
+
+    def serve_pages(self, repo, **_):
+        """The published site itself (point PAGES_URL_TEMPLATE at /_pages/{login}/{repo})"""
+        fake = self.repos.get(repo)
+        if fake is None or not self._pages_built(fake):
+            return 404, {'message': 'Site not found'}
+        return 200, {'index': fake.head_entries().get('index.html')}
+
+    def create_blob(self, repo, body, **_):
+        fake = self._repo(repo)
+        if not fake.refs:
+            return 409, {'message': 'Git Repository is empty.'}
+        if body.get('encoding') == 'base64':
+            data = base64.b64decode(body['content'])
+        else:
+            data = body['content'].encode()
+        sha = fake.add_blob(data)
+        return 201, {'sha': sha, 'url': f"{fake.url}/git/blobs/{sha}"}
+
+    def create_tree(self, repo, body, **_):
+        fake = self._repo(repo)
+        if not fake.refs:
+            return 409, {'message': 'Git Repository is empty.'}
+        entries = dict(fake.trees[body['base_tree']]) if body.get('base_tree') else {}
+        for item in body['tree']:
+            if 'content' in item:
+                entries[item['path']] = fake.add_blob(item['content'].encode())
+            elif item.get('sha') is None:
+                entries.pop(item['path'], None)
+            else:
+                entries[item['path']] = item['sha']
+        return 201, fake.tree_json(fake.add_tree(entries))
+
+    def get_tree(self, repo, sha, **_):
+        fake = self._repo(repo)
+        if sha in fake.commits:
+            sha = fake.commits[sha]['tree']
+        elif sha in fake.refs or f"heads/{sha}" in fake.refs:
+            sha = fake.commits[fake.refs.get(sha) or fake.refs[f"heads/{sha}"]]['tree']
+        if sha not in fake.trees:
+            return 404, {'message': 'Not Found'}
+        return 200, fake.tree_json(sha)
+
+    def create_commit(self, repo, body, **_):
+        fake = self._repo(repo)
+        sha = fake.add_commit(body['tree'], body.get('parents', []), body['message'])
+        return 201, fake.commit_json(sha)
+
+    def get_commit(self, repo, sha, **_):
+        fake = self._repo(repo)
+        if sha not in fake.commits:
+            return 404, {'message': 'Not Found'}
+        return 200, fake.commit_json(sha)
+
+    def get_ref(self, repo, ref, **_):
+        fake = self._repo(repo)
+        if ref not in fake.refs:
+            return 404, {'message': 'Not Found'}
+        return 200, fake.ref_json(ref)
+
+    def update_ref(self, repo, ref, body, **_):
+        fake = self._repo(repo)
+        with fake.lock:
+            current = fake.refs.get(ref)
+            if current and not body.get('force') and current not in fake.commits[body['sha']]['parents']:
+                return 422, {'message': 'Update is not a fast forward'}
+            fake.refs[ref] = body['sha']
+            fake.pushed_at = time.time()
+        return 200, fake.ref_json(ref)
+
+    def evaluate(self, body, **_):
+        """The evaluation endpoint deployments notify when they finish"""
+        with self.lock:
+            if self.evaluator_error_rate and self.random.random() < self.evaluator_error_rate:
+                self.calls['evaluator_errors'] += 1
+                return 503, {'message': 'Evaluator unavailable'}
+            self.evaluations.append(dict(body, received_at=time.time()))
+        return 200, {'status': 'received'}
+
+    def list_evaluations(self, **_):
+        with self.lock:
+            return 200, list(self.evaluations)
+
+    def stats(self, **_):
+        with self.lock:
+            return 200, dict(self.calls, connections=self.connections, evaluations=len(self.evaluations))
+
+    def reset(self, **_):
+        with self.lock:
+            self.calls.clear()
+            self.repos.clear()
+            self.evaluations = []
+            self.connections = 0
+            self.window_start = time.time()
+            self.used = 0
+            self.writes = 0
+        return 200, {}
+
+    # -- server --------------------------------------------------------------
+
+    def start(self, host='127.0.0.1', port=0):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            # Send headers and body in one segment; otherwise Nagle + delayed ACK add ~40ms per call
+            wbufsize = 64 * 1024
+            disable_nagle_algorithm = True
+
+            def setup(self):
+                super().setup()
+                with fake.lock:
+                    fake.connections += 1
+
+            def handle_one(self, method):
+                length = int(self.headers.get('Content-Length') or 0)
+                raw = self.rfile.read(length) if length else b''
+                parsed = urlparse(self.path)
+                if not parsed.path.startswith('/_'):
+                    with fake.lock:
+                        fake.calls['request_bytes'] += len(raw)
+                try:
+                    status, payload, headers = fake.dispatch(method, parsed.path, parsed.query,
+                                                             json.loads(raw) if raw else {})
+                except LookupError:
+                    status, payload, headers = 404, {'message': 'Not Found'}, {}
+                body = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                for name, value in dict(fake.rate_headers(), **headers).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                if method != 'HEAD':
+                    self.wfile.write(body)
+
+            def do_GET(self):
+                self.handle_one('GET')
+
+            def do_POST(self):
+                self.handle_one('POST')
+
+            def do_PUT(self):
+                self.handle_one('PUT')
+
+            def do_PATCH(self):
+                self.handle_one('PATCH')
+
+            def do_HEAD(self):
+                self.handle_one('HEAD')
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer((host, port), Handler)
+        self.httpd.daemon_threads = True
+        self.base_url = f"http://{host}:{self.httpd.server_address[1]}"
+        thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        thread.start()
+        return self.base_url
+
+    def stop(self):
+        if self.httpd:
+            self.httpd.shutdown()
+            self.httpd.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--latency', type=float, default=0.0)
+    parser.add_argument('--rate-limit', type=int, default=5000, help='primary requests per window')
+    parser.add_argument('--rate-window', type=int, default=3600, help='primary window in seconds')
+    parser.add_argument('--secondary-every', type=int, default=0, help='every Nth write gets a secondary limit')
+    parser.add_argument('--retry-after', type=int, default=1)
+    parser.add_argument('--pages-delay', type=float, default=0.0, help='seconds until a push shows as built')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='fraction of API calls that return 502')
+    parser.add_argument('--evaluator-error-rate', type=float, default=0.0,
+                        help='fraction of notifications that return 503')
+    parser.add_argument('--seed', type=int)
+    args = parser.parse_args()
+
+    fake = FakeGitHub(latency=args.latency, rate_limit=args.rate_limit, rate_window=args.rate_window,
+                      secondary_every=args.secondary_every, retry_after=args.retry_after,
+                      pages_delay=args.pages_delay, error_rate=args.error_rate,
+                      evaluator_error_rate=args.evaluator_error_rate, seed=args.seed)
+    print(f"Fake GitHub listening on {fake.start(args.host, args.port)}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        fake.stop()
+
+
+if __name__ == '__main__':
+    main()
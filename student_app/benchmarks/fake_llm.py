@@ -0,0 +1,183 @@
+"""Local stand-in for an OpenAI-compatible chat completions endpoint.
+
+Answers POST /v1/chat/completions (streamed or not) with a small app for the
+brief in the user message, in the file format generator_backends asks for;
+revision prompts get back just an edited index.html.
+Time to first token and tokens per second are configurable, every call is
+counted and the peak number of concurrent completions is recorded, so LLM
+generation can be benchmarked without a model.
+
+    python benchmarks/fake_llm.py --port 8766 --first-token 0.5 --tokens-per-second 200
+    GENERATOR_BACKEND=llm LLM_API_URL=http://127.0.0.1:8766/v1 python app.py
+"""
+import argparse
+import html
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+CHARS_PER_TOKEN = 4
+
+
+def app_reply(brief):
+    title = html.escape(brief[:60])
+    return (
+        "<<<FILE index.html>>>\n"
+        "```html\n"
+        "<!DOCTYPE html>\n"
+        f"<html lang=\"en\">\n<head>\n<meta charset=\"UTF-8\">\n<title>{title}</title>\n"
+        "<link href=\"https://cdn.jsdelivr.net/npm/bootstrap@5.3.0/dist/css/bootstrap.min.css\" rel=\"stylesheet\">\n"
+        "</head>\n<body class=\"container py-5\">\n"
+        f"<h1>{title}</h1>\n<p class=\"lead\">{html.escape(brief)}</p>\n"
+        "<button class=\"btn btn-primary\" id=\"go\">Go</button>\n<output id=\"out\"></output>\n"
+        "<script>\ndocument.getElementById('go').onclick = () => {\n"
+        "  document.getElementById('out').textContent = new Date().toLocaleString();\n};\n</script>\n"
+        "</body>\n</html>\n"
+        "```\n"
+        "<<<END>>>\n"
+        "<<<FILE README.md>>>\n"
+        f"# {brief[:60]}\n\n## Summary\n{brief}\n\n## Setup\nOpen index.html.\n\n"
+        "## Usage\nClick Go.\n\n## Code\nOne HTML page with inline script.\n\n## License\nMIT\n"
+        "<<<END>>>\n"
+    )
+
+
+class FakeLLM:
+    def __init__(self, first_token=0.0, tokens_per_second=0.0):
+        self.first_token = first_token
+        self.tokens_per_second = tokens_per_second
+        self.lock = threading.Lock()
+        self.httpd = None
+        self.base_url = None
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.calls = 0
+            self.active = 0
+            self.max_active = 0
+            self.prompts = []
+
+    def stats(self):
+        with self.lock:
+            return {'calls': self.calls, 'max_active': self.max_active}
+
+    def complete(self, body, write_chunk):
+        """Run one completion, calling write_chunk(text) per token chunk; returns (prompt, reply)"""
+        prompt = next((m['content'] for m in body.get('messages', []) if m.get('role') == 'user'), '')
+        if '\nRevision brief: ' in prompt:
+            # A revision: send back only the edited index.html
+            brief = prompt.rsplit('\nRevision brief: ', 1)[1].split('\n\n')[0]
+            reply = app_reply(brief).split('<<<FILE README.md>>>')[0]
+        else:
+            brief = prompt.split('\n\n')[0].replace('Brief: ', '', 1)
+            reply = app_reply(brief)
+        with self.lock:
+            self.calls += 1
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+            self.prompts.append(prompt)
+        try:
+            time.sleep(self.first_token)
+            for i in range(0, len(reply), CHARS_PER_TOKEN):
+                write_chunk(reply[i:i + CHARS_PER_TOKEN])
+                if self.tokens_per_second:
+                    time.sleep(1 / self.tokens_per_second)
+        finally:
+            with self.lock:
+                self.active -= 1
+        return prompt, reply
+
+    def start(self, host='127.0.0.1', port=0):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_POST(self):
+                length = int(self.headers.get('Content-Length') or 0)
+                body = json.loads(self.rfile.read(length) or b'{}')
+                if self.path.rstrip('/') != '/v1/chat/completions':
+                    return self.send_json(404, {'error': {'message': 'Not Found'}})
+                if body.get('stream'):
+                    self.stream(body)
+                else:
+                    chunks = []
+                    prompt, reply = fake.complete(body, chunks.append)
+                    self.send_json(200, {
+                        'object': 'chat.completion',
+                        'choices': [{'index': 0, 'message': {'role': 'assistant', 'content': reply},
+                                     'finish_reason': 'stop'}],
+                        'usage': {'prompt_tokens': len(prompt) // CHARS_PER_TOKEN, 'completion_tokens': len(chunks)}
+                    })
+
+            def stream(self, body):
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/event-stream')
+                self.send_header('Transfer-Encoding', 'chunked')
+                self.end_headers()
+                chunks = []
+
+                def send(payload):
+                    data = f"data: {payload}\n\n".encode()
+                    self.wfile.write(b'%x\r\n%s\r\n' % (len(data), data))
+                    self.wfile.flush()
+
+                def token(text):
+                    chunks.append(text)
+                    send(json.dumps({'object': 'chat.completion.chunk',
+                                     'choices': [{'index': 0, 'delta': {'content': text}}]}))
+
+                try:
+                    prompt, _ = fake.complete(body, token)
+                    if (body.get('stream_options') or {}).get('include_usage'):
+                        send(json.dumps({'object': 'chat.completion.chunk', 'choices': [], 'usage': {
+                            'prompt_tokens': len(prompt) // CHARS_PER_TOKEN, 'completion_tokens': len(chunks)}}))
+                    send('[DONE]')
+                    self.wfile.write(b'0\r\n\r\n')
+                except (BrokenPipeError, ConnectionResetError):
+                    pass  # client gave up (timeout)
+
+            def send_json(self, status, payload):
+                data = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer((host, port), Handler)
+        self.httpd.daemon_threads = True
+        self.base_url = f"http://{host}:{self.httpd.server_address[1]}/v1"
+        thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        thread.start()
+        return self.base_url
+
+    def stop(self):
+        if self.httpd:
+            self.httpd.shutdown()
+            self.httpd.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8766)
+    parser.add_argument('--first-token', type=float, default=0.5, help='seconds before the first token')
+    parser.add_argument('--tokens-per-second', type=float, default=200, help='0 = as fast as possible')
+    args = parser.parse_args()
+
+    fake = FakeLLM(first_token=args.first_token, tokens_per_second=args.tokens_per_second)
+    print(f"Fake LLM listening on {fake.start(args.host, args.port)}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        fake.stop()
+
+
+if __name__ == '__main__':
+    main()
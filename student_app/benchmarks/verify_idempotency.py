@@ -0,0 +1,108 @@
+"""Submit one deployment payload many times concurrently to app:app under
+gunicorn (several worker processes) and check it was deployed and notified
+exactly once, then that a late retry gets the finished result straight away.
+
+    python benchmarks/verify_idempotency.py --submissions 50 --workers 2
+
+Exits non-zero if any check fails.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_load import SECRET, free_port, start_app  # noqa: E402
+from fake_github import FakeGitHub  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--submissions', type=int, default=50)
+    parser.add_argument('--workers', type=int, default=2, help='gunicorn worker processes')
+    parser.add_argument('--latency', type=float, default=0.05, help='fake GitHub seconds per call')
+    parser.add_argument('--timeout', type=float, default=60)
+    args = parser.parse_args()
+    args.backend = 'github'
+    args.write_rate = 1000
+
+    fake = FakeGitHub(latency=args.latency)
+    api_url = fake.start()
+    data_dir = tempfile.mkdtemp(prefix='verify-idempotency-')
+    log = open(os.path.join(data_dir, 'gunicorn.log'), 'w')
+    process, base_url = start_app(args, api_url, free_port(), data_dir, log)
+    payload = {
+        'email': 'student@example.com',
+        'secret': SECRET,
+        'task': 'idempotency-check',
+        'round': 1,
+        'nonce': 'same-nonce',
+        'brief': 'Build a calculator',
+        'evaluation_url': api_url + '/_evaluate'
+    }
+    failures = []
+
+    def check(ok, message):
+        print(f"{'✅' if ok else '❌'} {message}")
+        if not ok:
+            failures.append(message)
+
+    try:
+        fake.reset()
+        responses = []
+        barrier = threading.Barrier(args.submissions)
+
+        def submit():
+            barrier.wait()
+            response = requests.post(base_url + '/', json=payload, timeout=30)
+            responses.append((response.status_code, response.json()))
+
+        threads = [threading.Thread(target=submit) for _ in range(args.submissions)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        check(all(code == 200 for code, _ in responses), f"all {len(responses)} submissions answered 200")
+        check(sum(1 for _, body in responses if not body.get('duplicate')) == 1,
+              "exactly one submission queued a job, the rest joined it")
+
+        deadline = time.time() + args.timeout
+        status = {}
+        while time.time() < deadline:
+            status = requests.get(f"{base_url}/status/{payload['task']}", timeout=5).json()
+            if status.get('status') in ('completed', 'failed') and fake.evaluations:
+                break
+            time.sleep(0.2)
+        time.sleep(1)  # give any duplicate work a chance to show up
+
+        check(status.get('status') == 'completed', f"deployment completed (status {status.get('status')})")
+        check(fake.calls['POST /user/repos'] == 1, f"one repository created ({fake.calls['POST /user/repos']})")
+        commits = sum(n for key, n in fake.calls.items() if key.startswith('POST ') and key.endswith('/git/commits'))
+        check(commits == 1, f"one commit pushed ({commits})")
+        check(len(fake.evaluations) == 1, f"one evaluation notification ({len(fake.evaluations)})")
+
+        started = time.perf_counter()
+        response = requests.post(base_url + '/', json=payload, timeout=30)
+        code, body = response.status_code, response.json()
+        elapsed = (time.perf_counter() - started) * 1000
+        check(code == 200 and body.get('duplicate') and body.get('status') == 'completed'
+              and body.get('result', {}).get('github_result', {}).get('commit_sha'),
+              f"late retry returned the cached result in {elapsed:.0f} ms")
+    finally:
+        process.terminate()
+        process.wait()
+        fake.stop()
+
+    if failures:
+        print(f"{len(failures)} check(s) failed, see {log.name}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,66 @@
+import string
+from collections import namedtuple
+
+Classification = namedtuple('Classification', ['generator', 'score', 'confidence', 'matches'])
+
+# Inflections accepted after every keyword ("task" also matches "tasks")
+SUFFIXES = ('', 's', 'es')
+# Punctuation and digits separate words; hyphens stay so 'to-do' is one word
+WORD_BREAKS = str.maketrans({ch: ' ' for ch in string.punctuation.replace('-', '') + string.digits})
+
+
+class KeywordClassifier:
+    """Scores every generator against a brief in a single pass over its words
+
+    ``rules`` is a list of ``(generator, priority, {keyword: weight})``. All
+    keywords (and their plural forms) are compiled into one hashed vocabulary,
+    and a brief is classified by intersecting its words with it, so matches
+    are whole words only ('md' no longer matches "command") and the cost does
+    not grow with the number of generators. Each keyword found adds its weight
+    once; the highest score wins and ties go to the lower priority number.
+    Briefs scoring below ``min_score`` fall back to ``default``.
+    """
+
+    def __init__(self, rules, default, min_score=1.0):
+        self.default = default
+        self.min_score = min_score
+        self.priorities = {}
+        self.keywords = {}  # keyword -> [(generator, weight)]
+        self.forms = {}  # word as written in a brief -> keyword
+        for generator, priority, keywords in rules:
+            self.priorities[generator] = priority
+            for keyword, weight in keywords.items():
+                keyword = keyword.lower()
+                if len(keyword.split()) != 1:
+                    raise ValueError(f"Keyword must be a single word: {keyword!r}")
+                self.keywords.setdefault(keyword, []).append((generator, weight))
+                for suffix in SUFFIXES:
+                    self.forms.setdefault(keyword + suffix, keyword)
+        self.vocabulary = frozenset(self.forms)
+
+    def classify(self, brief):
+        """Return the best Classification for a brief"""
+        words = self.vocabulary.intersection((brief or '').lower().translate(WORD_BREAKS).split())
+        matches = sorted({self.forms[word] for word in words})
+        scores = {}
+        for keyword in matches:
+            for generator, weight in self.keywords[keyword]:
+                scores[generator] = scores.get(generator, 0.0) + weight
+
+        if not scores:
+            return Classification(self.default, 0.0, 0.0, [])
+        generator = min(scores, key=lambda name: (-scores[name], self.priorities[name]))
+        score = scores[generator]
+        if score < self.min_score:
+            return Classification(self.default, score, 0.0, matches)
+        return Classification(generator, score, round(score / sum(scores.values()), 3), matches)
+
+
+def create_classifier(kind, registry, default, min_score=1.0):
+    """Brief classifier for GENERATOR_SELECTOR: 'keywords' or 'similarity' (needs NumPy)"""
+    if kind == 'keywords':
+        return KeywordClassifier(registry.rules(), default=default, min_score=min_score)
+    if kind == 'similarity':
+        from similarity import SimilarityClassifier  # NumPy is only needed for this selector
+        return SimilarityClassifier(registry.documents(), default=default)
+    raise ValueError(f"Unknown GENERATOR_SELECTOR: {kind}")
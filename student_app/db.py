@@ -0,0 +1,71 @@
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+# Configuration
+DATA_DIR = os.getenv('DATA_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data'))
+DATABASE_PATH = os.getenv('DATABASE_PATH', os.path.join(DATA_DIR, 'deployments.db'))
+
+
+class Database:
+    """SQLite database in WAL mode with one connection per thread and process"""
+
+    def __init__(self, path=DATABASE_PATH):
+        self.path = path
+        self._local = threading.local()
+        # Serialize writers within the process; SQLite's busy handler backs off far too coarsely
+        self._write_lock = threading.Lock()
+        if path != ':memory:':
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+    def register_schema(self, statements):
+        """Create tables and indexes (statements must be idempotent)"""
+        self.connection().executescript(statements)
+
+    def add_column(self, table, column, definition):
+        """Add a column to a table created by an older schema (idempotent, safe across processes)"""
+        with self.transaction() as conn:
+            columns = {row['name'] for row in conn.execute(f"PRAGMA table_info({table})")}
+            if column not in columns:
+                conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+
+    def connection(self):
+        local = self._local
+        # Connections must not cross a fork, so key them by pid as well as thread
+        if getattr(local, 'pid', None) != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.execute('PRAGMA busy_timeout=30000')
+            local.conn = conn
+            local.pid = os.getpid()
+        return local.conn
+
+    @contextmanager
+    def transaction(self):
+        """Run a block inside BEGIN IMMEDIATE so concurrent writers serialize cleanly"""
+        conn = self.connection()
+        with self._write_lock:
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                yield conn
+            except BaseException:
+                conn.execute('ROLLBACK')
+                raise
+            else:
+                conn.execute('COMMIT')
+
+
+_databases = {}
+_databases_lock = threading.Lock()
+
+
+def get_database(path=DATABASE_PATH):
+    """Return the shared Database for a path"""
+    with _databases_lock:
+        database = _databases.get(path)
+        if database is None:
+            database = _databases[path] = Database(path)
+        return database
@@ -0,0 +1,312 @@
+import hashlib
+import io
+import os
+import re
+import shutil
+import subprocess
+import tarfile
+import tempfile
+import threading
+import time
+
+from db import DATA_DIR
+from events import deployment_events
+from generation_cache import git_blob_sha
+
+# Configuration
+DEPLOY_ROOT = os.getenv('DEPLOY_ROOT', os.path.join(DATA_DIR, 'deploy'))
+# Published site URL for the local backends; serve the sites directory with any static server
+DEPLOY_SITE_URL = os.getenv('DEPLOY_SITE_URL', 'http://localhost:8000/{repo}/')
+GIT_BINARY = os.getenv('GIT_BINARY', 'git')
+
+REPO_NAME_UNSAFE = re.compile(r'[^a-z0-9-]')
+# fast-import reads paths to the end of the line and treats a leading quote as C-style quoting
+FAST_IMPORT_UNSAFE = re.compile(r'[\x00-\x1f\x7f]|^"')
+
+
+def repository_name(task_id):
+    """Repository name for a task, also used as a directory name; ValueError unless it is [a-z0-9-]"""
+    name = f"llm-app-{task_id}".lower().replace('_', '-')
+    if REPO_NAME_UNSAFE.search(name):
+        raise ValueError(f"Invalid task id {task_id!r}: use letters, digits, '-' and '_'")
+    return name
+
+
+class DeploymentBackend:
+    """Where generated apps are stored and published
+
+    ``create_repository`` handles round 1 and ``update_repository`` later
+    rounds; both return the result dict process_deployment records
+    (``success``, ``repo_url``, ``pages_url``, ``commit_sha`` or ``error``).
+    ``update_repository`` may get ``base``, the pushed_files snapshot of the
+    last push, to work out the delta without reading the repository back.
+    ``publish`` makes a repository's site live and ``pages_url`` resolves
+    where it is served. Backends whose sites go live asynchronously set
+    ``tracks_pages`` and answer ``get_latest_pages_build`` for the tracker.
+    """
+
+    name = None
+    tracks_pages = False
+
+    def create_repository(self, task_id, app_files, email):
+        raise NotImplementedError
+
+    def update_repository(self, task_id, app_files, message, base=None):
+        raise NotImplementedError
+
+    def publish(self, repo_name):
+        raise NotImplementedError
+
+    def pages_url(self, repo_name):
+        raise NotImplementedError
+
+    def get_latest_pages_build(self, repo_name):
+        return None
+
+
+class LocalBackend(DeploymentBackend):
+    """Shared plumbing for backends that publish sites into DEPLOY_ROOT/sites"""
+
+    def __init__(self, root=DEPLOY_ROOT):
+        self.root = root
+        self.sites_dir = os.path.join(root, 'sites')
+        os.makedirs(self.sites_dir, exist_ok=True)
+        self._locks = {}
+        self._locks_lock = threading.Lock()
+
+    def _lock(self, repo_name):
+        with self._locks_lock:
+            return self._locks.setdefault(repo_name, threading.Lock())
+
+    def pages_url(self, repo_name):
+        return DEPLOY_SITE_URL.format(repo=repo_name)
+
+    def _replace_site(self, repo_name, fill):
+        """Build a site in a temporary directory with fill(path), then swap it in"""
+        staging = tempfile.mkdtemp(prefix=f".{repo_name}-", dir=self.sites_dir)
+        fill(staging)
+        os.chmod(staging, 0o755)
+        site = os.path.join(self.sites_dir, repo_name)
+        retired = None
+        if os.path.exists(site):
+            retired = f"{staging}.old"
+            os.rename(site, retired)
+        os.rename(staging, site)
+        if retired:
+            shutil.rmtree(retired, ignore_errors=True)
+
+    def _result(self, repo_name, repo_url, commit_sha):
+        return {
+            'success': True,
+            'repo_url': repo_url,
+            'pages_url': self.pages_url(repo_name),
+            'commit_sha': commit_sha
+        }
+
+
+def write_files(directory, files):
+    for path, content in files.items():
+        target = os.path.join(directory, *path.split('/'))
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        with open(target, 'wb') as f:
+            f.write(content.encode('utf-8') if isinstance(content, str) else content)
+
+
+def site_files(directory):
+    """Relative '/'-separated paths of the files under directory (none if it does not exist)"""
+    paths = []
+    for root, _, names in os.walk(directory):
+        for name in names:
+            paths.append(os.path.relpath(os.path.join(root, name), directory).replace(os.sep, '/'))
+    return paths
+
+
+def tree_digest(files):
+    """Stable ID for a file set, from its paths and git blob SHAs"""
+    shas = getattr(files, 'blob_shas', {})
+    digest = hashlib.sha1()
+    for path in sorted(files):
+        digest.update(f"{path}\0{shas.get(path) or git_blob_sha(files[path])}\n".encode('utf-8'))
+    return digest.hexdigest()
+
+
+class FilesystemBackend(LocalBackend):
+    """Writes each app straight into its site directory; no history is kept"""
+
+    name = 'filesystem'
+
+    def create_repository(self, task_id, app_files, email):
+        return self.update_repository(task_id, app_files, f"Initial commit for {task_id}")
+
+    def update_repository(self, task_id, app_files, message, base=None):
+        repo_name = repository_name(task_id)
+        site = os.path.join(self.sites_dir, repo_name)
+        owned = base.generated() if base is not None and base.backend == self.name else set()
+
+        def fill(staging):
+            write_files(staging, app_files)
+            # Files of the old site the generator does not own (attachments of earlier rounds) stay
+            kept = [path for path in site_files(site) if path not in app_files and path not in owned]
+            for path in kept:
+                target = os.path.join(staging, *path.split('/'))
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                shutil.copy2(os.path.join(site, *path.split('/')), target)
+
+        with self._lock(repo_name):
+            self._replace_site(repo_name, fill)
+        commit_sha = tree_digest(app_files)
+        deployment_events.publish(task_id, 'files_pushed', commit_sha=commit_sha, files=len(app_files))
+        deployment_events.publish(task_id, 'pages_enabled')
+        return self._result(repo_name, f"file://{site}", commit_sha)
+
+    def publish(self, repo_name):
+        pass  # the site directory is the repository
+
+
+class LocalGitBackend(LocalBackend):
+    """Bare git repositories under DEPLOY_ROOT/repos, one commit per deployment
+
+    Each deployment is streamed into ``git fast-import`` as one commit on
+    ``main`` (blobs, tree, commit and ref update in a single process, the
+    local equivalent of one push), then published by extracting
+    ``git archive`` of the branch into the site directory.
+    """
+
+    name = 'local-git'
+
+    def __init__(self, root=DEPLOY_ROOT):
+        super().__init__(root)
+        self.repos_dir = os.path.join(root, 'repos')
+        os.makedirs(self.repos_dir, exist_ok=True)
+
+    def _git(self, git_dir, *args, stdin=None):
+        result = subprocess.run(
+            [GIT_BINARY, f"--git-dir={git_dir}", *args],
+            input=stdin, stdout=subprocess.PIPE, stderr=subprocess.PIPE
+        )
+        if result.returncode != 0:
+            raise RuntimeError(f"git {args[0]} failed: {result.stderr.decode(errors='replace').strip()}")
+        return result.stdout
+
+    def _git_dir(self, repo_name):
+        return os.path.join(self.repos_dir, f"{repo_name}.git")
+
+    def _head(self, git_dir):
+        """Commit SHA of main, or None before the first commit"""
+        try:
+            return self._git(git_dir, 'rev-parse', '--verify', '--quiet', 'main').decode().strip()
+        except RuntimeError:
+            return None
+
+    def create_repository(self, task_id, app_files, email):
+        repo_name = repository_name(task_id)
+        git_dir = self._git_dir(repo_name)
+        message = f"Initial commit for {task_id}"
+        with self._lock(repo_name):
+            # A re-driven job may find the repository its earlier attempt created
+            head = self._head(git_dir) if os.path.exists(git_dir) else None
+            if head is None:
+                if not os.path.exists(git_dir):
+                    # No --template: sample hooks are never run here and copying them is half the init time
+                    self._git(git_dir, '-c', 'init.defaultBranch=main', 'init', '--bare', '--quiet', '--template=')
+                deployment_events.publish(task_id, 'repo_created', repo_url=f"file://{git_dir}",
+                                          provisioning='create')
+                commit_sha = self._commit(git_dir, app_files, message, parent=False)
+                deployment_events.publish(task_id, 'files_pushed', commit_sha=commit_sha, files=len(app_files))
+                self.publish(repo_name)
+                deployment_events.publish(task_id, 'pages_enabled')
+        if head is not None:
+            print(f"♻️  Repository {repo_name} already exists, resuming its deployment")
+            result = self.update_repository(task_id, app_files, message)
+            if result['success']:
+                with self._lock(repo_name):
+                    self.publish(repo_name)  # the earlier attempt may have died before publishing
+            return result
+        print(f"✅ Local repository created: {git_dir}")
+        return self._result(repo_name, f"file://{git_dir}", commit_sha)
+
+    def update_repository(self, task_id, app_files, message, base=None):
+        repo_name = repository_name(task_id)
+        git_dir = self._git_dir(repo_name)
+        if not os.path.exists(git_dir):
+            return {'success': False, 'error': f"Repository {repo_name} not found"}
+        with self._lock(repo_name):
+            head = self._git(git_dir, 'rev-parse', 'main').decode().strip()
+            if base is not None and base.backend == self.name and base.commit_sha == head:
+                current = base.blob_shas  # the snapshot is of this very commit
+            else:
+                listing = self._git(git_dir, 'ls-tree', '-r', '-z', 'main').decode('utf-8')
+                # ls-tree -z entries are "<mode> blob <sha>\t<path>\0"
+                current = {entry.split('\t', 1)[1]: entry.split()[2] for entry in listing.split('\0') if entry}
+            shas = getattr(app_files, 'blob_shas', {})
+            wanted = {path: shas.get(path) or git_blob_sha(content) for path, content in app_files.items()}
+            changed = {path: app_files[path] for path, sha in wanted.items() if current.get(path) != sha}
+            # Only files an earlier round generated are removed; attachments stay
+            owned = base.generated() if base is not None and base.backend == self.name else set()
+            deleted = [path for path in current if path not in wanted and path in owned]
+            if not changed and not deleted:
+                print("✅ Repository already up to date, nothing to commit")
+                return self._result(repo_name, f"file://{git_dir}", head)
+            commit_sha = self._commit(git_dir, changed, message, parent=True, deleted=deleted)
+            print(f"📝 Changed {len(changed)} file(s), deleted {len(deleted)}, "
+                  f"kept {len(app_files) - len(changed)} unchanged")
+            deployment_events.publish(task_id, 'files_pushed', commit_sha=commit_sha, files=len(app_files))
+            self.publish(repo_name)
+        return self._result(repo_name, f"file://{git_dir}", commit_sha)
+
+    def _commit(self, git_dir, files, message, parent, deleted=None):
+        """Write files as the complete tree of a new commit on main
+
+        With ``deleted`` (a list of paths), files are layered over the
+        parent's tree instead and those paths are removed.
+        """
+        for path in list(deleted or ()) + list(files):
+            if FAST_IMPORT_UNSAFE.search(path):
+                raise ValueError(f"Path cannot be committed: {path!r}")
+        stream = io.BytesIO()
+        message = message.encode('utf-8')
+        stream.write(b'commit refs/heads/main\nmark :1\n')
+        stream.write(b'committer LLM Deployer <deployer@localhost> %d +0000\n' % int(time.time()))
+        stream.write(b'data %d\n%s\n' % (len(message), message))
+        if parent:
+            stream.write(b'from refs/heads/main^0\n')
+        if deleted is None:
+            stream.write(b'deleteall\n')
+        for path in deleted or ():
+            stream.write(b'D %s\n' % path.encode('utf-8'))
+        for path, content in files.items():
+            data = content.encode('utf-8') if isinstance(content, str) else content
+            stream.write(b'M 100644 inline %s\ndata %d\n' % (path.encode('utf-8'), len(data)))
+            stream.write(data)
+            stream.write(b'\n')
+        stream.write(b'get-mark :1\n')
+        out = self._git(git_dir, 'fast-import', '--quiet', '--force', stdin=stream.getvalue())
+        return out.decode().split()[-1]
+
+    def publish(self, repo_name):
+        archive = self._git(self._git_dir(repo_name), 'archive', '--format=tar', 'main')
+
+        def extract(staging):
+            with tarfile.open(fileobj=io.BytesIO(archive)) as tar:
+                tar.extractall(staging)
+
+        self._replace_site(repo_name, extract)
+
+
+_local_backends = {}
+_local_backends_lock = threading.Lock()
+
+
+def local_backend(kind):
+    """Shared local backend ('local-git' or 'filesystem')"""
+    with _local_backends_lock:
+        backend = _local_backends.get(kind)
+        if backend is None:
+            if kind == 'local-git':
+                backend = LocalGitBackend()
+            elif kind == 'filesystem':
+                backend = FilesystemBackend()
+            else:
+                raise ValueError(f"Unknown deployment backend: {kind}")
+            _local_backends[kind] = backend
+        return backend
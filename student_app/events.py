@@ -0,0 +1,278 @@
+import json
+import os
+import threading
+import time
+from collections import deque
+
+from db import get_database
+
+# Configuration
+EVENTS_POLL_SECONDS = float(os.getenv('EVENTS_POLL_SECONDS', '0.25'))
+SSE_HEARTBEAT_SECONDS = float(os.getenv('SSE_HEARTBEAT_SECONDS', '15'))
+SSE_MAX_SECONDS = float(os.getenv('SSE_MAX_SECONDS', '600'))
+# Each open stream holds a gunicorn thread for up to SSE_MAX_SECONDS; this caps them, it does not make them free
+SSE_MAX_STREAMS = int(os.getenv('SSE_MAX_STREAMS', str(int(os.getenv('GUNICORN_THREADS', '32')) // 2)))
+EVENTS_RETENTION = float(os.getenv('EVENTS_RETENTION', str(7 * 24 * 3600)))
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS deployment_events (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    task_id TEXT NOT NULL,
+    stage TEXT NOT NULL,
+    data TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS deployment_events_task ON deployment_events (task_id, id);
+'''
+
+# Stages after which a deployment round has nothing more to report
+TERMINAL_STAGES = ('notified', 'failed')
+
+
+class TooManyStreams(Exception):
+    """This process already holds SSE_MAX_STREAMS open streams"""
+
+
+class Subscription:
+    """Events for one task, buffered until the stream that owns it reads them"""
+
+    def __init__(self, task_id):
+        self.task_id = task_id
+        self.events = deque()
+        self.cond = threading.Condition()
+
+    def push(self, event):
+        with self.cond:
+            self.events.append(event)
+            self.cond.notify()
+
+    def next(self, timeout):
+        """Oldest unread event, or None after timeout"""
+        with self.cond:
+            if not self.events:
+                self.cond.wait(timeout)
+            return self.events.popleft() if self.events else None
+
+
+class HeldStream:
+    """Response iterable that calls ``release`` once the server closes it
+
+    A generator's ``finally`` never runs if the client leaves before the first
+    chunk, so the stream slot is released from ``close`` instead.
+    """
+
+    def __init__(self, events, release):
+        self.events = events
+        self.release = release
+        self.closed = False
+
+    def __iter__(self):
+        return self.events
+
+    def close(self):
+        if not self.closed:
+            self.closed = True
+            self.events.close()
+            self.release()
+
+
+class EventBroker:
+    """Deployment stage events: appended to SQLite, fanned out to SSE streams
+
+    ``publish`` inserts a row, so events written by any worker process reach
+    every stream. One broker thread per process (started with the first
+    subscriber) notices new rows through ``PRAGMA data_version``, reads them
+    with a single query and pushes each to the subscriptions for its task, so
+    many open streams cost one poll, not one per client. Publishes in the
+    same process wake the thread immediately.
+    """
+
+    def __init__(self, db=None):
+        self.db = db or get_database()
+        self.db.register_schema(SCHEMA)
+        self._subscriptions = {}
+        self._lock = threading.Condition()
+        self._pid = None
+        self._last_id = 0
+        self._pruned_at = 0.0
+        self._streams = threading.BoundedSemaphore(SSE_MAX_STREAMS)
+        self._open_streams = 0
+
+    def _ensure_thread(self):
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._subscriptions = {}
+            self._last_id = self.db.connection().execute(
+                'SELECT COALESCE(MAX(id), 0) FROM deployment_events'
+            ).fetchone()[0]
+            worker = threading.Thread(target=self._run, name='event-broker')
+            worker.daemon = True
+            worker.start()
+            self._pid = os.getpid()
+
+    def publish(self, task_id, stage, **data):
+        now = time.time()
+        with self.db.transaction() as conn:
+            conn.execute(
+                'INSERT INTO deployment_events (task_id, stage, data, created_at) VALUES (?, ?, ?, ?)',
+                (task_id, stage, json.dumps(data), now)
+            )
+            if now - self._pruned_at > 3600:
+                self._pruned_at = now
+                conn.execute('DELETE FROM deployment_events WHERE created_at < ?', (now - EVENTS_RETENTION,))
+        with self._lock:
+            self._lock.notify()
+
+    def history(self, task_id, after=0):
+        rows = self.db.connection().execute(
+            'SELECT id, stage, data, created_at FROM deployment_events WHERE task_id = ? AND id > ? ORDER BY id',
+            (task_id, after)
+        ).fetchall()
+        return [self._event(row) for row in rows]
+
+    def known(self, task_id):
+        return self.db.connection().execute(
+            'SELECT 1 FROM deployment_events WHERE task_id = ? LIMIT 1', (task_id,)
+        ).fetchone() is not None
+
+    @staticmethod
+    def _event(row):
+        return {'id': row['id'], 'stage': row['stage'], 'at': row['created_at'], **json.loads(row['data'])}
+
+    def subscribe(self, task_id):
+        self._ensure_thread()
+        subscription = Subscription(task_id)
+        with self._lock:
+            if not self._subscriptions:
+                # Nothing was read while nobody listened; callers replay history for themselves
+                self._last_id = self.db.connection().execute(
+                    'SELECT COALESCE(MAX(id), 0) FROM deployment_events'
+                ).fetchone()[0]
+            self._subscriptions.setdefault(task_id, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscribers = self._subscriptions.get(subscription.task_id)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscriptions[subscription.task_id]
+
+    def _run(self):
+        conn = self.db.connection()
+        data_version = None
+        while True:
+            with self._lock:
+                self._lock.wait(EVENTS_POLL_SECONDS)
+                if not self._subscriptions:
+                    continue
+            try:
+                version = conn.execute('PRAGMA data_version').fetchone()[0]
+                if version == data_version:
+                    continue
+                data_version = version
+                rows = conn.execute(
+                    'SELECT id, task_id, stage, data, created_at FROM deployment_events WHERE id > ? ORDER BY id',
+                    (self._last_id,)
+                ).fetchall()
+            except Exception as e:
+                print(f"⚠️  Event broker poll failed: {str(e)}")
+                continue
+            for row in rows:
+                self._last_id = row['id']
+                with self._lock:
+                    subscribers = list(self._subscriptions.get(row['task_id'], ()))
+                if subscribers:
+                    event = self._event(row)
+                    for subscription in subscribers:
+                        subscription.push(event)
+
+    def open_stream(self, task_id, after=None, round_number=None):
+        """SSE stream for a task, holding one of SSE_MAX_STREAMS slots until it closes
+
+        Each open stream pins a server thread, so past the cap this raises
+        TooManyStreams instead of starving ordinary requests.
+        """
+        if not self._streams.acquire(blocking=False):
+            raise TooManyStreams()
+        with self._lock:
+            self._open_streams += 1
+        return HeldStream(self.stream(task_id, after, round_number), self._release_stream)
+
+    def _release_stream(self):
+        with self._lock:
+            self._open_streams -= 1
+        self._streams.release()
+
+    def _start(self, task_id, round_number):
+        """(watched round, event id to replay after) when the client sent no Last-Event-ID
+
+        The backlog starts at the watched round's first event (the latest round
+        by default), so a round 2 subscriber never sees round 1 end. A round
+        with no events yet replays nothing older.
+        """
+        history = self.history(task_id)
+        if round_number is None:
+            rounds = [event['round'] for event in history if event.get('round') is not None]
+            if not rounds:
+                return None, 0
+            round_number = rounds[-1]
+        def ids(stage):
+            return [event['id'] for event in history if event['stage'] == stage and event.get('round') == round_number]
+
+        # The latest submission of the round: a failed round that was resubmitted is queued again
+        starts = ids('queued')[-1:] or ids('generating')[:1]
+        if starts:
+            return round_number, starts[0] - 1
+        return round_number, history[-1]['id'] if history else 0
+
+    def stream(self, task_id, after=None, round_number=None):
+        """Server-Sent Events for a task: history after ``after``, then live events
+
+        Without ``after`` the history starts at the watched round (``round_number``,
+        default the latest). Ends after a terminal stage of that round was sent,
+        after SSE_MAX_SECONDS (clients reconnect with Last-Event-ID) or when the
+        client goes away.
+        """
+        subscription = self.subscribe(task_id)
+        try:
+            yield 'retry: 2000\n\n'
+            if after is None:
+                round_number, after = self._start(task_id, round_number)
+            elif round_number is None:
+                rounds = [event['round'] for event in self.history(task_id) if event.get('round') is not None]
+                round_number = rounds[-1] if rounds else None
+            sent = after
+            deadline = time.monotonic() + SSE_MAX_SECONDS
+            backlog = deque(self.history(task_id, after))
+            while time.monotonic() < deadline:
+                event = backlog.popleft() if backlog else subscription.next(SSE_HEARTBEAT_SECONDS)
+                if event is None:
+                    yield ': keep-alive\n\n'
+                    continue
+                if event['id'] <= sent:
+                    continue  # already replayed from history
+                sent = event['id']
+                yield f"id: {event['id']}\nevent: {event['stage']}\ndata: {json.dumps(event)}\n\n"
+                if round_number is None and event.get('round') is not None:
+                    round_number = event['round']
+                if event['stage'] in TERMINAL_STAGES and event.get('round', round_number) == round_number:
+                    return
+        finally:
+            self.unsubscribe(subscription)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'subscribers': sum(len(s) for s in self._subscriptions.values()),
+                'tasks_watched': len(self._subscriptions),
+                'open_streams': self._open_streams,
+                'last_event_id': self._last_id
+            }
+
+
+deployment_events = EventBroker()
@@ -0,0 +1,187 @@
+import math
+import os
+import threading
+import time
+
+from job_queue import JobQueue, job_key
+
+# Configuration
+DEPLOY_WORKERS = int(os.getenv('DEPLOY_WORKERS', '4'))
+DEPLOY_QUEUE_SIZE = int(os.getenv('DEPLOY_QUEUE_SIZE', '100'))
+JOB_POLL_SECONDS = float(os.getenv('JOB_POLL_SECONDS', '1.0'))
+
+ERROR_BACKOFF_MAX = 30.0  # seconds a worker waits after repeated database errors
+SETTLE_ATTEMPTS = 5  # tries to record a finished job before leaving it to lease expiry
+
+
+class QueueFullError(Exception):
+    """Raised when the executor cannot accept another job"""
+
+    def __init__(self, retry_after):
+        super().__init__(f"Deployment queue is full, retry in {retry_after}s")
+        self.retry_after = retry_after
+
+
+class DeploymentExecutor:
+    """Runs deployment jobs from the durable job queue on a fixed pool of worker threads
+
+    Every gunicorn worker process runs its own pool; all pools claim from the
+    same SQLite queue, so the queue depth limit applies service-wide.
+    """
+
+    def __init__(self, handler, max_workers=DEPLOY_WORKERS, max_queue=DEPLOY_QUEUE_SIZE, job_queue=None):
+        self.handler = handler
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self._job_queue = job_queue
+        self._lock = threading.Lock()
+        self._wakeup = threading.Condition(self._lock)
+        self._workers = []
+        self._running = {}
+        self._pid = None
+        self._completed = 0
+        self._rejected = 0
+        self._avg_duration = 10.0  # seconds, smoothed job duration used for Retry-After
+
+    @property
+    def job_queue(self):
+        if self._job_queue is None:
+            self._job_queue = JobQueue()
+        return self._job_queue
+
+    def _ensure_workers(self):
+        """Start worker threads lazily, and again after a fork (threads don't survive it)"""
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._running = {}
+            self._workers = []
+            # Anything a previous process left half-done is picked up again
+            self.job_queue.requeue_expired()
+            for i in range(self.max_workers):
+                worker = threading.Thread(target=self._run, name=f"deploy-worker-{i}")
+                worker.daemon = True
+                worker.start()
+                self._workers.append(worker)
+            heartbeat = threading.Thread(target=self._heartbeat, name='deploy-heartbeat')
+            heartbeat.daemon = True
+            heartbeat.start()
+            self._pid = os.getpid()
+
+    def start(self):
+        """Start workers now so jobs persisted before a restart are re-driven without waiting for a request"""
+        self._ensure_workers()
+
+    def _run(self):
+        owner = JobQueue.worker_id()
+        errors = 0
+        while True:
+            try:
+                self._run_one(owner)
+                errors = 0
+            except Exception as e:
+                # A busy or briefly unavailable database must not cost the pool a worker
+                errors += 1
+                delay = min(JOB_POLL_SECONDS * 2 ** (errors - 1), ERROR_BACKOFF_MAX)
+                print(f"⚠️  Deployment worker error, retrying in {delay:.1f}s: {str(e)}")
+                time.sleep(delay)
+
+    def _run_one(self, owner):
+        claimed = self.job_queue.claim(owner)
+        if claimed is None:
+            # Other processes enqueue too, so poll as well as waiting for a local wakeup
+            with self._wakeup:
+                self._wakeup.wait(JOB_POLL_SECONDS)
+            return
+
+        job_id, data = claimed
+        with self._lock:
+            self._running[job_id] = owner
+        started = time.monotonic()
+        try:
+            try:
+                result = self.handler(data)
+            except Exception as e:
+                print(f"❌ Unhandled error in deployment worker: {str(e)}")
+                error = str(e)
+                self._settle(job_id, lambda: self.job_queue.fail(job_id, error))
+            else:
+                self._settle(job_id, lambda: self.job_queue.ack(job_id, result))
+        finally:
+            duration = time.monotonic() - started
+            with self._lock:
+                self._running.pop(job_id, None)
+                self._completed += 1
+                self._avg_duration = 0.8 * self._avg_duration + 0.2 * duration
+
+    def _settle(self, job_id, record):
+        """Record a finished job's outcome, retrying while the database is busy
+
+        The job stays in ``_running`` meanwhile, so the heartbeat keeps its
+        lease; if every attempt fails the lease runs out and it is re-driven.
+        """
+        for attempt in range(1, SETTLE_ATTEMPTS + 1):
+            try:
+                record()
+                return
+            except Exception as e:
+                if attempt == SETTLE_ATTEMPTS:
+                    raise
+                delay = min(JOB_POLL_SECONDS * 2 ** (attempt - 1), ERROR_BACKOFF_MAX)
+                print(f"⚠️  Recording job {job_id} failed, retrying in {delay:.1f}s: {str(e)}")
+                time.sleep(delay)
+
+    def _heartbeat(self):
+        interval = max(self.job_queue.lease_seconds / 3.0, 1.0)
+        while True:
+            time.sleep(interval)
+            try:
+                with self._lock:
+                    running = list(self._running.items())
+                for job_id, owner in running:
+                    self.job_queue.extend_lease([job_id], owner)
+                self.job_queue.requeue_expired()
+            except Exception as e:
+                print(f"⚠️  Job heartbeat failed: {str(e)}")
+
+    def retry_after(self):
+        """Estimate seconds until a queue slot frees up"""
+        with self._lock:
+            # With every worker busy a job finishes roughly every avg/workers seconds
+            estimate = self._avg_duration / max(self.max_workers, 1)
+        return max(1, int(math.ceil(estimate)))
+
+    def submit(self, data):
+        """Persist a job and return its Enqueued record, or raise QueueFullError
+
+        Resubmitting the same (task, round, nonce), from any worker process,
+        returns the existing job (``created`` False) instead of queueing it
+        twice; once that job is done its ``result`` is the handler's return value.
+        """
+        self._ensure_workers()
+        # The shared secret has no business sitting in the queue database
+        payload = {k: v for k, v in data.items() if k != 'secret'}
+        queued = self.job_queue.enqueue(job_key(data), payload, max_pending=self.max_queue)
+        if queued is None:
+            with self._lock:
+                self._rejected += 1
+            raise QueueFullError(self.retry_after())
+        if queued.created:
+            with self._wakeup:
+                self._wakeup.notify()
+        return queued
+
+    def stats(self):
+        counts = self.job_queue.stats()
+        with self._lock:
+            return {
+                'workers': self.max_workers,
+                'queue_size': self.max_queue,
+                'queued': counts.get('pending', 0),
+                'active': len(self._running),
+                'completed': self._completed,
+                'rejected': self._rejected,
+                'jobs': counts
+            }
@@ -0,0 +1,135 @@
+import hashlib
+import os
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+
+# Configuration
+GENERATION_CACHE_BYTES = int(os.getenv('GENERATION_CACHE_BYTES', str(64 * 1024 * 1024)))
+GENERATION_CACHE_TTL = float(os.getenv('GENERATION_CACHE_TTL', '3600'))
+
+
+def normalize_brief(brief):
+    """Canonical form of a brief: NFC, whitespace runs collapsed, trimmed"""
+    return ' '.join(unicodedata.normalize('NFC', brief or '').split())
+
+
+def git_blob_sha(content):
+    """SHA git assigns to a blob with this content"""
+    if isinstance(content, str):
+        content = content.encode('utf-8')
+    digest = hashlib.sha1(b'blob %d\0' % len(content))
+    digest.update(content)  # no concatenation: content may be a large memory-mapped view
+    return digest.hexdigest()
+
+
+class GeneratedFiles(dict):
+    """Generated app files ({path: content}) carrying each file's git blob SHA
+
+    ``blob_shas`` is computed once when the output is cached, so push and
+    diff code can compare against remote trees without hashing again.
+    ``generator`` names the template the files were rendered from and
+    ``metrics`` holds how the generator produced them for this caller.
+    ``attachments`` names the paths shipped from the request's attachments
+    rather than generated.
+    """
+
+    def __init__(self, files, blob_shas, generator=None):
+        super().__init__(files)
+        self.blob_shas = dict(blob_shas)
+        self.generator = generator
+        self.metrics = {}
+        self.attachments = set()
+
+
+class CacheEntry:
+    __slots__ = ('files', 'blob_shas', 'generator', 'size', 'expires')
+
+    def __init__(self, files, blob_shas, generator, size, expires):
+        self.files = files
+        self.blob_shas = blob_shas
+        self.generator = generator
+        self.size = size
+        self.expires = expires
+
+
+class GenerationCache:
+    """Per-process LRU + TTL cache of generated apps, bounded by total bytes
+
+    Keys combine the generator version with a hash of the normalized brief,
+    so identical briefs across tasks and round-2 repeats reuse one
+    rendering, and a template change never serves stale output.
+    """
+
+    def __init__(self, max_bytes=GENERATION_CACHE_BYTES, ttl=GENERATION_CACHE_TTL):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    @staticmethod
+    def key(version, brief):
+        return hashlib.sha256(f"{version}\0{normalize_brief(brief)}".encode('utf-8')).hexdigest()
+
+    def get(self, key):
+        """Cached GeneratedFiles for key, or None"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.expires <= time.monotonic():
+                self._remove(key)
+                self.expirations += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+        # A fresh dict per caller; the strings themselves are shared
+        return GeneratedFiles(entry.files, entry.blob_shas, entry.generator)
+
+    def put(self, key, files, generator=None):
+        """Hash and store generated files; returns them as GeneratedFiles"""
+        known = getattr(files, 'blob_shas', {})  # precomputed for static template files
+        blob_shas = {}
+        size = 0
+        for path, content in files.items():
+            data = content.encode('utf-8') if isinstance(content, str) else content
+            blob_shas[path] = known.get(path) or git_blob_sha(data)
+            size += len(path) + len(data)
+        generated = GeneratedFiles(files, blob_shas, generator)
+        if size > self.max_bytes:
+            return generated
+
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = CacheEntry(dict(files), blob_shas, generator, size, time.monotonic() + self.ttl)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+        return generated
+
+    def _remove(self, key):
+        self._bytes -= self._entries.pop(key).size
+
+    def stats(self):
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'expirations': self.expirations
+            }
+
+
+generation_cache = GenerationCache()
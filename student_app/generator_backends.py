@@ -0,0 +1,405 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+
+import requests
+
+from db import DATA_DIR
+
+# Configuration
+LLM_API_URL = os.getenv('LLM_API_URL', 'https://api.openai.com/v1')
+LLM_API_KEY = os.getenv('LLM_API_KEY', '')
+LLM_MODEL = os.getenv('LLM_MODEL', 'gpt-4o-mini')
+LLM_MAX_TOKENS = int(os.getenv('LLM_MAX_TOKENS', '4096'))
+LLM_TEMPERATURE = float(os.getenv('LLM_TEMPERATURE', '0'))
+# Whole-generation budget; past it the deployment falls back to the template engine
+LLM_TIMEOUT = float(os.getenv('LLM_TIMEOUT', '60'))
+LLM_CONCURRENCY = int(os.getenv('LLM_CONCURRENCY', '4'))
+LLM_CACHE_DIR = os.getenv('LLM_CACHE_DIR', os.path.join(DATA_DIR, 'llm-cache'))
+
+FILE_START = '<<<FILE '
+FILE_END = '<<<END>>>'
+FILE_DELETE = '<<<DELETE '
+
+SYSTEM_PROMPT = f'''You build small single-page web apps hosted on GitHub Pages.
+Reply with the app's files only, each one written as
+
+{FILE_START}path>>>
+file contents
+{FILE_END}
+
+Always write index.html (self-contained; CDN links are fine) and README.md
+(summary, setup, usage, code explanation, license: MIT). Do not write LICENSE.'''
+
+REVISION_PROMPT = f'''You revise small single-page web apps hosted on GitHub Pages.
+You get the app's current files and a revision brief. Reply with only the
+files you change, each written out in full as
+
+{FILE_START}path>>>
+file contents
+{FILE_END}
+
+Leave unchanged files out. To remove a file write {FILE_DELETE}path>>>
+on its own line. Keep README.md in step with the changes.'''
+
+
+class GenerationError(Exception):
+    """The backend could not produce an app; callers fall back to the template engine"""
+
+
+class GeneratorBackend:
+    """Turns a brief into app files
+
+    ``generate`` returns ``(files, generator, metrics)``: ``{path: content}``,
+    the name recorded as the app's generator and a dict of timings for the
+    deployment record. ``version`` goes into generation cache keys, so
+    output from different models or prompts is never mixed up. ``on_file``
+    is called with ``(path, content)`` as each file is finished, for
+    backends that produce files one at a time.
+
+    ``revise`` makes a later round from the files pushed before
+    (``{path: text}``); it returns the same triple with the complete new file
+    set. Backends that cannot edit simply generate from the new brief.
+    """
+
+    name = None
+    version = None
+
+    def generate(self, brief, attachments=(), on_file=None):
+        raise NotImplementedError
+
+    def revise(self, brief, previous, attachments=(), on_file=None):
+        return self.generate(brief, attachments, on_file)
+
+
+class TemplateGenerator(GeneratorBackend):
+    """Renders the template whose keywords best match the brief"""
+
+    name = 'template'
+
+    def __init__(self, classifier, registry, version):
+        self.classifier = classifier
+        self.registry = registry
+        self.version = version
+
+    def generate(self, brief, attachments=(), on_file=None):
+        started = time.perf_counter()
+        match = self.classifier.classify(brief)
+        print(f"🧭 Brief matched '{match.generator}' (score {match.score}, confidence {match.confidence})")
+        files = self.registry.render(match.generator, brief=brief)
+        return files, match.generator, {'backend': self.name, 'total_ms': _ms_since(started)}
+
+
+class FileStreamParser:
+    """Splits streamed model output into files as their end markers arrive"""
+
+    def __init__(self, on_file=None):
+        self.on_file = on_file
+        self.files = {}
+        self.deleted = []
+        self._buffer = ''
+        self._path = None
+        self._lines = []
+
+    def feed(self, text):
+        self._buffer += text
+        *lines, self._buffer = self._buffer.split('\n')
+        for line in lines:
+            self._line(line)
+
+    def close(self):
+        if self._buffer:
+            self._line(self._buffer)
+            self._buffer = ''
+        return self.files
+
+    def _line(self, line):
+        stripped = line.strip()
+        if self._path is None:
+            if stripped.startswith(FILE_START) and stripped.endswith('>>>'):
+                self._path = self._clean(stripped[len(FILE_START):-3])
+                self._lines = []
+            elif stripped.startswith(FILE_DELETE) and stripped.endswith('>>>'):
+                path = self._clean(stripped[len(FILE_DELETE):-3])
+                if path:
+                    self.deleted.append(path)
+        elif stripped == FILE_END:
+            lines = self._lines
+            if len(lines) >= 2 and lines[0].startswith('```') and lines[-1].strip() == '```':
+                lines = lines[1:-1]  # models like to fence code even when told not to
+            content = '\n'.join(lines) + '\n'
+            if self._path:
+                self.files[self._path] = content
+                if self.on_file:
+                    self.on_file(self._path, content)
+            self._path = None
+        else:
+            self._lines.append(line)
+
+    @staticmethod
+    def _clean(path):
+        """Site-relative path from a marker, or '' (the block is dropped) if it could leave the site directory"""
+        marker = path.strip()
+        path = marker[2:] if marker.startswith('./') else marker
+        if '\\' in path or ':' in path or any(part in ('', '.', '..') for part in path.split('/')):
+            print(f"⚠️  Dropping generated file with unsafe path: {marker!r}")
+            return ''
+        return path
+
+
+class _Flight:
+    """One completion in progress; identical prompts wait for it instead of calling again"""
+
+    __slots__ = ('done', 'result', 'error')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class LLMGenerator(GeneratorBackend):
+    """Generates apps with an OpenAI-compatible chat completions endpoint
+
+    Completions are streamed, so ``on_file`` fires as each file is finished
+    and time to first token is measured. Finished completions are cached on
+    disk by prompt hash, shared by every worker process. Calls from all
+    deployments share LLM_CONCURRENCY slots, and a deployment whose prompt
+    is already being generated waits for that completion rather than
+    paying for a second one. Anything that goes wrong, including running
+    past LLM_TIMEOUT, raises GenerationError.
+    """
+
+    name = 'llm'
+
+    def __init__(self, api_url=LLM_API_URL, api_key=LLM_API_KEY, model=LLM_MODEL, cache_dir=LLM_CACHE_DIR,
+                 concurrency=LLM_CONCURRENCY, timeout=LLM_TIMEOUT):
+        self.api_url = api_url.rstrip('/')
+        self.api_key = api_key
+        self.model = model
+        self.cache_dir = cache_dir
+        self.timeout = timeout
+        prompts = f"{SYSTEM_PROMPT}\0{REVISION_PROMPT}".encode('utf-8')
+        self.version = f"llm:{model}:{hashlib.sha256(prompts).hexdigest()[:12]}"
+        self._slots = threading.BoundedSemaphore(concurrency)
+        self._session = requests.Session()
+        self._session.mount(self.api_url, requests.adapters.HTTPAdapter(pool_maxsize=concurrency))
+        self._flights = {}
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.cache_hits = 0
+        self.coalesced = 0
+        self.failures = 0
+        self.in_flight = 0
+        self.completion_tokens = 0
+        self.stream_seconds = 0.0
+
+    def _request(self, system, prompt, attachments):
+        if attachments:
+            prompt += f"\n\nThese files are shipped next to index.html: {', '.join(attachments)}"
+        return {
+            'model': self.model,
+            'messages': [{'role': 'system', 'content': system}, {'role': 'user', 'content': prompt}],
+            'max_tokens': LLM_MAX_TOKENS,
+            'temperature': LLM_TEMPERATURE
+        }
+
+    def generate(self, brief, attachments=(), on_file=None):
+        def check(files, deleted):
+            if 'index.html' not in files:
+                return f"LLM reply had no index.html (got {', '.join(sorted(files)) or 'no files'})"
+
+        body = self._request(SYSTEM_PROMPT, f"Brief: {brief}", attachments)
+        files, _, metrics = self._completion(body, on_file, check)
+        return files, self.name, metrics
+
+    def revise(self, brief, previous, attachments=(), on_file=None):
+        """Ask for only the files the revision changes and apply them to the previous round's"""
+        def check(edits, deleted):
+            if 'index.html' in deleted or ('index.html' not in previous and 'index.html' not in edits):
+                return "LLM revision left the app without index.html"
+
+        current = []
+        for path in sorted(previous):
+            content = previous[path] if previous[path].endswith('\n') else previous[path] + '\n'
+            current.append(f"{FILE_START}{path}>>>\n{content}{FILE_END}\n")
+        body = self._request(REVISION_PROMPT, f"Current files:\n\n{''.join(current)}\nRevision brief: {brief}",
+                             attachments)
+        edits, deleted, metrics = self._completion(body, on_file, check)
+        files = {path: content for path, content in previous.items() if path not in deleted}
+        files.update(edits)
+        return files, self.name, dict(metrics, edited=len(edits), deleted=len(deleted))
+
+    def _completion(self, body, on_file, check):
+        """(files, deleted paths, metrics) for a request: from disk, a coalesced call or a new one"""
+        started = time.perf_counter()
+        key = hashlib.sha256(json.dumps(body, sort_keys=True).encode('utf-8')).hexdigest()
+
+        cached = self._cache_get(key)
+        if cached is not None:
+            with self._lock:
+                self.cache_hits += 1
+            print("♻️  Reusing cached LLM completion for this prompt")
+            return cached['files'], cached.get('deleted', []), self._reused(started, cached=True)
+
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+            else:
+                self.coalesced += 1
+        if not leader:
+            print("⏳ Same prompt is already being generated, waiting for it")
+            if not flight.done.wait(self.timeout):
+                raise GenerationError(f"LLM generation took longer than {self.timeout:g}s")
+            if flight.error is not None:
+                raise flight.error
+            files, deleted, _ = flight.result
+            return dict(files), list(deleted), self._reused(started, coalesced=True)
+
+        try:
+            flight.result = self._generate(key, body, started, on_file, check)
+            files, deleted, metrics = flight.result
+            return dict(files), list(deleted), metrics
+        except GenerationError as e:
+            flight.error = e
+            with self._lock:
+                self.failures += 1
+            raise
+        except Exception as e:
+            flight.error = GenerationError(f"LLM generation failed: {type(e).__name__}: {str(e)}")
+            with self._lock:
+                self.failures += 1
+            raise flight.error from e
+        finally:
+            if flight.result is None and flight.error is None:
+                flight.error = GenerationError('LLM generation was interrupted')  # followers must not see None
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+
+    def _reused(self, started, **how):
+        return dict(how, backend=self.name, model=self.model, total_ms=_ms_since(started))
+
+    def _generate(self, key, body, started, on_file, check):
+        deadline = time.monotonic() + self.timeout
+        if not self._slots.acquire(timeout=self.timeout):
+            raise GenerationError(f"No LLM slot free within {self.timeout:g}s")
+        queue_ms = _ms_since(started)
+        with self._lock:
+            self.calls += 1
+            self.in_flight += 1
+        try:
+            files, deleted, metrics = self._complete(body, deadline, on_file)
+        finally:
+            self._slots.release()
+            with self._lock:
+                self.in_flight -= 1
+        error = check(files, deleted)
+        if error:
+            raise GenerationError(error)
+        metrics = dict(metrics, backend=self.name, model=self.model, queue_ms=queue_ms, total_ms=_ms_since(started))
+        with self._lock:
+            self.completion_tokens += metrics['completion_tokens']
+            self.stream_seconds += metrics['generate_ms'] / 1000
+        self._cache_put(key, {'files': files, 'deleted': deleted, 'metrics': metrics})
+        return files, deleted, metrics
+
+    def _complete(self, body, deadline, on_file):
+        """Stream one completion; returns (files, deleted paths, metrics)"""
+        parser = FileStreamParser(on_file)
+        headers = {'Authorization': f"Bearer {self.api_key}"} if self.api_key else {}
+        request_started = time.perf_counter()
+        first_token_ms = None
+        chunks = 0
+        usage = None
+        try:
+            response = self._session.post(
+                f"{self.api_url}/chat/completions",
+                json=dict(body, stream=True, stream_options={'include_usage': True}),
+                headers=headers, stream=True, timeout=(5, max(deadline - time.monotonic(), 0.1))
+            )
+            with response:
+                if response.status_code != 200:
+                    raise GenerationError(f"LLM API returned {response.status_code}: {response.text[:200]}")
+                for line in response.iter_lines(decode_unicode=True):
+                    if time.monotonic() > deadline:
+                        raise GenerationError(f"LLM generation took longer than {self.timeout:g}s")
+                    if not line or not line.startswith('data:'):
+                        continue
+                    data = line[5:].strip()
+                    if data == '[DONE]':
+                        break
+                    chunk = json.loads(data)
+                    usage = chunk.get('usage') or usage
+                    for choice in chunk.get('choices') or ():
+                        text = (choice.get('delta') or {}).get('content')
+                        if text:
+                            if first_token_ms is None:
+                                first_token_ms = _ms_since(request_started)
+                            chunks += 1
+                            parser.feed(text)
+        except requests.RequestException as e:
+            raise GenerationError(f"LLM request failed: {str(e)}")
+        except ValueError as e:
+            raise GenerationError(f"LLM stream was not valid JSON: {str(e)}")
+        except GenerationError:
+            raise
+        except Exception as e:
+            # A chunk shaped unlike the API's (a list, a string delta, ...) is a provider error too
+            raise GenerationError(f"LLM stream could not be read: {type(e).__name__}: {str(e)}")
+
+        generate_ms = _ms_since(request_started)
+        # Servers that ignore include_usage still send roughly one token per chunk
+        completion_tokens = (usage or {}).get('completion_tokens') or chunks
+        streaming_seconds = (generate_ms - (first_token_ms or 0)) / 1000
+        return parser.close(), parser.deleted, {
+            'first_token_ms': first_token_ms,
+            'generate_ms': generate_ms,
+            'prompt_tokens': (usage or {}).get('prompt_tokens'),
+            'completion_tokens': completion_tokens,
+            'tokens_per_second': round(completion_tokens / streaming_seconds, 1) if streaming_seconds > 0 else None
+        }
+
+    def _cache_path(self, key):
+        return os.path.join(self.cache_dir, key[:2], f"{key}.json")
+
+    def _cache_get(self, key):
+        try:
+            with open(self._cache_path(key), encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _cache_put(self, key, entry):
+        path = self._cache_path(key)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(entry, f)
+            os.replace(tmp, path)  # readers in other workers never see half a file
+        except OSError as e:
+            print(f"⚠️  Could not cache LLM completion: {str(e)}")
+
+    def stats(self):
+        with self._lock:
+            return {
+                'model': self.model,
+                'calls': self.calls,
+                'cache_hits': self.cache_hits,
+                'coalesced': self.coalesced,
+                'failures': self.failures,
+                'in_flight': self.in_flight,
+                'completion_tokens': self.completion_tokens,
+                'tokens_per_second': round(self.completion_tokens / self.stream_seconds, 1)
+                if self.stream_seconds else None
+            }
+
+
+def _ms_since(started):
+    return round((time.perf_counter() - started) * 1000, 1)
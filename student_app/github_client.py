@@ -0,0 +1,146 @@
+import os
+import threading
+import time
+
+import requests
+from github import Github
+from github.Requester import Requester, RequestsResponse
+
+from rate_limiter import github_scheduler
+
+# Configuration
+GITHUB_LOGIN_TTL = int(os.getenv('GITHUB_LOGIN_TTL', '3600'))
+GITHUB_POOL_SIZE = int(os.getenv('GITHUB_POOL_SIZE', '0'))  # 0 = derive from executor concurrency
+
+_sessions = {}
+_sessions_lock = threading.Lock()
+
+
+def _session(protocol, pool_size, retry):
+    """One keep-alive session per scheme per process, sized for every thread that talks to GitHub"""
+    key = (protocol, pool_size)
+    with _sessions_lock:
+        session = _sessions.get(key)
+        if session is None:
+            session = requests.Session()
+            adapter = requests.adapters.HTTPAdapter(
+                max_retries=requests.adapters.DEFAULT_RETRIES if retry is None else retry,
+                pool_connections=pool_size,
+                pool_maxsize=pool_size
+            )
+            session.mount(f"{protocol}://", adapter)
+            _sessions[key] = session
+        return session
+
+
+class PooledConnection:
+    """Connection class handed to PyGithub that sends every request over a shared pooled session
+
+    PyGithub's own connection object keeps the pending request on itself, so a
+    single Github instance is not safe to share between threads. With these
+    classes injected PyGithub builds a throwaway connection per request, and
+    all of them reuse the same sockets.
+    """
+
+    protocol = None
+    default_port = None
+
+    def __init__(self, host, port=None, strict=False, timeout=None, retry=None, pool_size=None, **kwargs):
+        self.host = host
+        self.port = port if port else self.default_port
+        self.timeout = timeout
+        self.verify = kwargs.get('verify', True)
+        self.session = _session(self.protocol, pool_size or requests.adapters.DEFAULT_POOLSIZE, retry)
+
+    def request(self, verb, url, input, headers):
+        self.verb = verb
+        self.url = url
+        self.input = input
+        self.headers = headers
+
+    def getresponse(self):
+        # Every GitHub call funnels through here, so this is where rate limits are enforced
+        waited = 0.0
+        while True:
+            waited += github_scheduler.before_request(self.verb)
+            response = self.session.request(
+                self.verb,
+                f"{self.protocol}://{self.host}:{self.port}{self.url}",
+                headers=self.headers,
+                data=self.input,
+                timeout=self.timeout,
+                verify=self.verify,
+                allow_redirects=False
+            )
+            retry_in = github_scheduler.after_response(response.status_code, response.headers, response.text)
+            # A rate-limited request was never applied, so resending it is safe
+            if retry_in is None or waited + retry_in > github_scheduler.max_wait:
+                return RequestsResponse(response)
+
+    def close(self):
+        return
+
+
+class PooledHTTPSConnection(PooledConnection):
+    protocol = 'https'
+    default_port = 443
+
+
+class PooledHTTPConnection(PooledConnection):
+    protocol = 'http'
+    default_port = 80
+
+
+class GitHubClientRegistry:
+    """Per-process Github clients and cached authenticated logins
+
+    Clients are rebuilt in a forked child (gunicorn workers) rather than
+    inherited, since sockets and locks must not be shared across processes.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._clients = {}
+        self._logins = {}
+        self._pid = os.getpid()
+
+    def _check_fork(self):
+        if self._pid != os.getpid():
+            self.reset()
+
+    def reset(self):
+        """Forget clients and sessions; safe to call in a freshly forked child"""
+        global _sessions_lock
+        # Another thread may have held a lock at fork time, so replace them outright
+        self._lock = threading.Lock()
+        self._clients = {}
+        self._logins = {}
+        self._pid = os.getpid()
+        _sessions_lock = threading.Lock()
+        _sessions.clear()
+
+    def client(self, token, base_url, pool_size):
+        self._check_fork()
+        key = (token, base_url)
+        with self._lock:
+            client = self._clients.get(key)
+            if client is None:
+                Requester.injectConnectionClasses(PooledHTTPConnection, PooledHTTPSConnection)
+                client = self._clients[key] = Github(token, base_url=base_url, pool_size=pool_size)
+            return client
+
+    def login(self, token, base_url, pool_size):
+        """Authenticated user's login, resolved lazily and cached for GITHUB_LOGIN_TTL seconds"""
+        self._check_fork()
+        key = (token, base_url)
+        cached = self._logins.get(key)
+        if cached is not None and cached[1] > time.monotonic():
+            return cached[0]
+        login = self.client(token, base_url, pool_size).get_user().login
+        with self._lock:
+            self._logins[key] = (login, time.monotonic() + GITHUB_LOGIN_TTL)
+        return login
+
+
+github_clients = GitHubClientRegistry()
+os.register_at_fork(after_in_child=github_clients.reset)
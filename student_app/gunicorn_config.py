@@ -1,6 +1,16 @@
+import os
+
 bind = "0.0.0.0:5000"
 workers = 2
 timeout = 120
-worker_class = "sync"
+# Threads, not processes, per request: an open /status/<task_id>/events stream holds one thread
+worker_class = "gthread"
+threads = int(os.getenv('GUNICORN_THREADS', '32'))
+# Event streams and long-polls are capped per process (same defaults as events.py and app.py);
+# what they leave is all POST / and /health get
+_held = (int(os.getenv('SSE_MAX_STREAMS', str(threads // 2)))
+         + int(os.getenv('STATUS_MAX_WAITERS', str(threads // 4))))
+if _held >= threads:
+    print(f"⚠️  SSE_MAX_STREAMS + STATUS_MAX_WAITERS ({_held}) can hold all {threads} threads; deployments may starve")
 worker_connections = 1000
-keepalive = 2
\ No newline at end of file
+keepalive = 2
@@ -0,0 +1,166 @@
+import json
+import os
+import socket
+import threading
+import time
+from collections import namedtuple
+
+from db import get_database
+
+# Configuration
+JOB_LEASE_SECONDS = int(os.getenv('JOB_LEASE_SECONDS', '300'))
+JOB_MAX_ATTEMPTS = int(os.getenv('JOB_MAX_ATTEMPTS', '3'))
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    job_key TEXT NOT NULL UNIQUE,
+    payload TEXT NOT NULL,
+    state TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    lease_owner TEXT,
+    lease_expires REAL,
+    error TEXT,
+    result TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS jobs_state_id ON jobs (state, id);
+CREATE INDEX IF NOT EXISTS jobs_state_lease ON jobs (state, lease_expires);
+'''
+
+
+# What enqueue found or created; ``result`` is the handler's return value once the job is done,
+# ``error`` why a failed job gave up
+Enqueued = namedtuple('Enqueued', 'job_id position created state result error', defaults=(None,))
+
+
+def job_key(data):
+    """Deduplication key for a deployment request: one job per (task, round, nonce)"""
+    return f"{data.get('task')}:{data.get('round', 1)}:{data.get('nonce')}"
+
+
+class JobQueue:
+    """Durable job queue on SQLite with leases so crashed workers' jobs get re-driven
+
+    Jobs move pending -> running -> done/failed. A running job holds a lease
+    that its worker keeps extending; once the lease lapses (worker killed,
+    process recycled) the job goes back to pending, up to JOB_MAX_ATTEMPTS.
+    A done job whose result reports ``status: failed`` is queued again when
+    its key is resubmitted; one that ran out of attempts stays failed.
+    """
+
+    def __init__(self, db=None, lease_seconds=JOB_LEASE_SECONDS, max_attempts=JOB_MAX_ATTEMPTS):
+        self.db = db or get_database()
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.db.register_schema(SCHEMA)
+        self.db.add_column('jobs', 'result', 'TEXT')
+
+    @staticmethod
+    def worker_id():
+        return f"{socket.gethostname()}:{os.getpid()}:{threading.get_ident()}"
+
+    def enqueue(self, key, data, max_pending=None):
+        """Persist a job unless one with this key exists. Returns Enqueued, or None when the queue is full"""
+        now = time.time()
+        with self.db.transaction() as conn:
+            row = conn.execute('SELECT id, state, result, error FROM jobs WHERE job_key = ?', (key,)).fetchone()
+            result = json.loads(row['result']) if row is not None and row['result'] else None
+            retry = row is not None and row['state'] == 'done' and (result or {}).get('status') == 'failed'
+            if row is not None and not retry:
+                return Enqueued(row['id'], self._position(conn, row['id'], row['state']), False, row['state'], result,
+                                row['error'])
+            if max_pending is not None:
+                pending = conn.execute("SELECT COUNT(*) FROM jobs WHERE state = 'pending'").fetchone()[0]
+                if pending >= max_pending:
+                    return None
+            if retry:
+                # The last run ended in a failed deployment; a resubmission gets a fresh run
+                conn.execute(
+                    "UPDATE jobs SET payload = ?, state = 'pending', attempts = 0, error = NULL, result = NULL, "
+                    "updated_at = ? WHERE id = ?",
+                    (json.dumps(data), now, row['id'])
+                )
+                job_id = row['id']
+            else:
+                cursor = conn.execute(
+                    'INSERT INTO jobs (job_key, payload, created_at, updated_at) VALUES (?, ?, ?, ?)',
+                    (key, json.dumps(data), now, now)
+                )
+                job_id = cursor.lastrowid
+            return Enqueued(job_id, self._position(conn, job_id, 'pending'), True, 'pending', None)
+
+    @staticmethod
+    def _position(conn, job_id, state):
+        if state != 'pending':
+            return 0
+        # Jobs are claimed in id order, so the distance from the oldest pending job is
+        # the position (re-driven jobs can make it an overestimate, which is harmless)
+        oldest = conn.execute("SELECT MIN(id) FROM jobs WHERE state = 'pending'").fetchone()[0]
+        return job_id - (oldest or job_id) + 1
+
+    def claim(self, owner):
+        """Lease the oldest pending job. Returns (job_id, data) or None"""
+        now = time.time()
+        with self.db.transaction() as conn:
+            row = conn.execute(
+                "SELECT id, payload FROM jobs WHERE state = 'pending' ORDER BY id LIMIT 1"
+            ).fetchone()
+            if row is None:
+                return None
+            conn.execute(
+                "UPDATE jobs SET state = 'running', attempts = attempts + 1, lease_owner = ?, "
+                "lease_expires = ?, updated_at = ? WHERE id = ?",
+                (owner, now + self.lease_seconds, now, row['id'])
+            )
+        return row['id'], json.loads(row['payload'])
+
+    def extend_lease(self, job_ids, owner):
+        if not job_ids:
+            return
+        now = time.time()
+        with self.db.transaction() as conn:
+            conn.executemany(
+                "UPDATE jobs SET lease_expires = ?, updated_at = ? "
+                "WHERE id = ? AND state = 'running' AND lease_owner = ?",
+                [(now + self.lease_seconds, now, job_id, owner) for job_id in job_ids]
+            )
+
+    def ack(self, job_id, result=None):
+        """Mark a job done, keeping its JSON-serializable result for duplicate submissions"""
+        self._finish(job_id, 'done', None, result)
+
+    def fail(self, job_id, error):
+        self._finish(job_id, 'failed', error, None)
+
+    def _finish(self, job_id, state, error, result):
+        with self.db.transaction() as conn:
+            conn.execute(
+                'UPDATE jobs SET state = ?, error = ?, result = ?, lease_owner = NULL, lease_expires = NULL, '
+                'updated_at = ? WHERE id = ?',
+                (state, error, json.dumps(result) if result is not None else None, time.time(), job_id)
+            )
+
+    def requeue_expired(self):
+        """Return jobs with lapsed leases to pending (or fail them once out of attempts)"""
+        now = time.time()
+        with self.db.transaction() as conn:
+            failed = conn.execute(
+                "UPDATE jobs SET state = 'failed', error = 'lease expired too many times', "
+                "lease_owner = NULL, lease_expires = NULL, updated_at = ? "
+                "WHERE state = 'running' AND lease_expires < ? AND attempts >= ?",
+                (now, now, self.max_attempts)
+            ).rowcount
+            requeued = conn.execute(
+                "UPDATE jobs SET state = 'pending', lease_owner = NULL, lease_expires = NULL, "
+                "updated_at = ? WHERE state = 'running' AND lease_expires < ?",
+                (now, now)
+            ).rowcount
+        if requeued or failed:
+            print(f"♻️  Re-driving {requeued} stale job(s), {failed} gave up after {self.max_attempts} attempts")
+        return requeued
+
+    def stats(self):
+        rows = self.db.connection().execute('SELECT state, COUNT(*) FROM jobs GROUP BY state').fetchall()
+        return {state: count for state, count in rows}
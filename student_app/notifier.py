@@ -0,0 +1,330 @@
+import heapq
+import json
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlparse
+
+import requests
+
+from db import get_database
+from job_queue import JobQueue
+
+# Configuration
+NOTIFY_MAX_ATTEMPTS = int(os.getenv('NOTIFY_MAX_ATTEMPTS', '8'))
+NOTIFY_TIMEOUT = float(os.getenv('NOTIFY_TIMEOUT', '10'))
+NOTIFY_CONCURRENCY = int(os.getenv('NOTIFY_CONCURRENCY', '4'))
+NOTIFY_BACKOFF_BASE = float(os.getenv('NOTIFY_BACKOFF_BASE', '1'))
+NOTIFY_BACKOFF_MAX = float(os.getenv('NOTIFY_BACKOFF_MAX', '300'))
+NOTIFY_POLL_SECONDS = float(os.getenv('NOTIFY_POLL_SECONDS', '5'))
+# How often a held (gated) notification's gate is checked again
+NOTIFY_GATE_POLL_SECONDS = float(os.getenv('NOTIFY_GATE_POLL_SECONDS', '5'))
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS notifications (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    dedupe_key TEXT NOT NULL UNIQUE,
+    task_id TEXT NOT NULL,
+    url TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    state TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt_at REAL NOT NULL,
+    lease_owner TEXT,
+    lease_expires REAL,
+    last_error TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS notifications_due ON notifications (state, next_attempt_at);
+'''
+
+RETRYABLE_STATUS = (408, 425, 429)
+
+
+def retry_after_seconds(value):
+    """Parse a Retry-After header (delta seconds or HTTP date)"""
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        try:
+            return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+        except (TypeError, ValueError):
+            return None
+
+
+class NotificationDispatcher:
+    """Delivers evaluation notifications from a persistent outbox
+
+    ``enqueue`` only writes an outbox row, so deployment workers are free as
+    soon as it returns. A dispatcher thread per process claims due rows
+    under a lease and posts them on a small sender pool with one keep-alive
+    session per evaluation host. Failures are rescheduled with jittered
+    exponential backoff (or the server's Retry-After) and the next wake-up
+    is kept in a priority queue, so nothing sleeps on a worker thread.
+    Rows are keyed by (task, round, nonce): re-sending the same key is a no-op.
+
+    A row enqueued with a ``gate`` is held (state ``gated``) until
+    ``release`` is called, ``gate_check(task_id, gate)`` returns True when the
+    dispatcher polls it, or its hold time passes, so a restart never loses it.
+    """
+
+    def __init__(self, db=None, on_result=None, max_attempts=NOTIFY_MAX_ATTEMPTS, gate_check=None):
+        self.db = db or get_database()
+        self.db.register_schema(SCHEMA)
+        self.db.add_column('notifications', 'gate', 'TEXT')
+        self.db.add_column('notifications', 'gate_deadline', 'REAL')
+        self.on_result = on_result  # (task_id, info, payload) -> None
+        self.gate_check = gate_check  # (task_id, gate) -> True once a held row may be sent
+        self.max_attempts = max_attempts
+        self.lease_seconds = NOTIFY_TIMEOUT * 3
+        self._wakeups = []
+        self._cond = threading.Condition()
+        self._pid = None
+        self._senders = None
+        self._sessions = {}
+        self._in_flight = 0
+        self._delivered = 0
+        self._failed = 0
+
+    def _ensure_thread(self):
+        if self._pid == os.getpid():
+            return
+        with self._cond:
+            if self._pid == os.getpid():
+                return
+            self._wakeups = []
+            self._sessions = {}
+            self._in_flight = 0
+            self._senders = ThreadPoolExecutor(max_workers=NOTIFY_CONCURRENCY, thread_name_prefix='notify')
+            worker = threading.Thread(target=self._run, name='notify-dispatcher')
+            worker.daemon = True
+            worker.start()
+            self._pid = os.getpid()
+
+    def start(self):
+        """Start dispatching now so rows left by a previous process are delivered"""
+        self._ensure_thread()
+
+    def enqueue(self, key, task_id, url, payload, gate=None, hold=0):
+        """Write a notification to the outbox; returns False if the key was already queued
+
+        With ``gate`` (any JSON value) the row is held for at most ``hold``
+        seconds, see the class docstring.
+        """
+        self._ensure_thread()
+        now = time.time()
+        state, due, deadline = 'pending', now, None
+        if gate is not None:
+            state, due, deadline = 'gated', min(now + NOTIFY_GATE_POLL_SECONDS, now + hold), now + hold
+        with self.db.transaction() as conn:
+            created = conn.execute(
+                'INSERT OR IGNORE INTO notifications (dedupe_key, task_id, url, payload, state, next_attempt_at, '
+                'gate, gate_deadline, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                (key, task_id, url, json.dumps(payload), state, due,
+                 json.dumps(gate) if gate is not None else None, deadline, now, now)
+            ).rowcount == 1
+        if created:
+            self._wake_at(due)
+        else:
+            print(f"ℹ️  Notification {key} already queued, skipping duplicate")
+        return created
+
+    def release(self, key):
+        """Send a held notification now; returns False if it was not held"""
+        now = time.time()
+        with self.db.transaction() as conn:
+            released = conn.execute(
+                "UPDATE notifications SET state = 'pending', gate = NULL, next_attempt_at = ?, updated_at = ? "
+                "WHERE dedupe_key = ? AND state = 'gated'",
+                (now, now, key)
+            ).rowcount == 1
+        if released:
+            self._wake_at(now)
+        return released
+
+    def _wake_at(self, when):
+        with self._cond:
+            heapq.heappush(self._wakeups, when)
+            self._cond.notify()
+
+    def _claim_due(self, owner, limit):
+        now = time.time()
+        with self.db.transaction() as conn:
+            rows = conn.execute(
+                "SELECT id, task_id, url, payload, attempts, gate, gate_deadline FROM notifications "
+                "WHERE (state IN ('pending', 'gated') AND next_attempt_at <= ?) "
+                "OR (state = 'sending' AND lease_expires < ?) ORDER BY next_attempt_at LIMIT ?",
+                (now, now, limit)
+            ).fetchall()
+            # Checking a gate is not a delivery attempt
+            conn.executemany(
+                "UPDATE notifications SET state = 'sending', attempts = attempts + (gate IS NULL), lease_owner = ?, "
+                "lease_expires = ?, updated_at = ? WHERE id = ?",
+                [(owner, now + self.lease_seconds, now, row['id']) for row in rows]
+            )
+        return rows
+
+    def _next_due(self):
+        row = self.db.connection().execute(
+            "SELECT MIN(next_attempt_at) FROM notifications WHERE state IN ('pending', 'gated')"
+        ).fetchone()
+        return row[0]
+
+    def _run(self):
+        owner = JobQueue.worker_id()
+        while True:
+            try:
+                with self._cond:
+                    capacity = NOTIFY_CONCURRENCY - self._in_flight
+                rows = self._claim_due(owner, capacity) if capacity > 0 else []
+                for row in rows:
+                    with self._cond:
+                        self._in_flight += 1
+                    self._senders.submit(self._deliver if row['gate'] is None else self._check_gate, row)
+                next_due = self._next_due()
+                if next_due is not None:
+                    self._wake_at(next_due)
+            except Exception as e:
+                print(f"⚠️  Notification dispatcher error: {str(e)}")
+
+            # Sleep until the earliest known retry, a local enqueue, or the poll interval
+            # (other processes write to the outbox too)
+            with self._cond:
+                deadline = time.time() + NOTIFY_POLL_SECONDS
+                while self._wakeups and self._wakeups[0] <= time.time():
+                    heapq.heappop(self._wakeups)
+                if self._wakeups:
+                    deadline = min(deadline, self._wakeups[0])
+                timeout = deadline - time.time()
+                if timeout > 0:
+                    self._cond.wait(timeout)
+
+    def _session(self, url):
+        host = urlparse(url).netloc
+        with self._cond:
+            session = self._sessions.get(host)
+            if session is None:
+                session = self._sessions[host] = requests.Session()
+                adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=NOTIFY_CONCURRENCY)
+                session.mount('http://', adapter)
+                session.mount('https://', adapter)
+            return session
+
+    def _check_gate(self, row):
+        """Send a held row once its gate opens or its hold time passes; otherwise hold it again"""
+        try:
+            opened = time.time() >= row['gate_deadline'] or (
+                self.gate_check is not None and self.gate_check(row['task_id'], json.loads(row['gate'])))
+        except Exception as e:
+            print(f"⚠️  Gate check for {row['task_id']} notification failed: {str(e)}")
+            opened = False
+        if opened:
+            with self.db.transaction() as conn:
+                conn.execute(
+                    'UPDATE notifications SET gate = NULL, attempts = attempts + 1, updated_at = ? WHERE id = ?',
+                    (time.time(), row['id'])
+                )
+            self._deliver(row)  # releases the in-flight slot
+            return
+        next_check = min(time.time() + NOTIFY_GATE_POLL_SECONDS, row['gate_deadline'])
+        try:
+            with self.db.transaction() as conn:
+                conn.execute(
+                    "UPDATE notifications SET state = 'gated', next_attempt_at = ?, lease_owner = NULL, "
+                    "lease_expires = NULL, updated_at = ? WHERE id = ?",
+                    (next_check, time.time(), row['id'])
+                )
+        finally:
+            with self._cond:
+                self._in_flight -= 1
+                self._cond.notify()
+        self._wake_at(next_check)
+
+    def _deliver(self, row):
+        attempt = row['attempts'] + 1
+        retry_after = None
+        delivered = False
+        try:
+            print(f"📤 Attempt {attempt} to notify evaluation URL for {row['task_id']}...")
+            response = self._session(row['url']).post(
+                row['url'],
+                data=row['payload'],
+                headers={'Content-Type': 'application/json'},
+                timeout=NOTIFY_TIMEOUT
+            )
+            delivered = 200 <= response.status_code < 300
+            error = f"HTTP {response.status_code}"
+            retryable = response.status_code >= 500 or response.status_code in RETRYABLE_STATUS
+            retry_after = retry_after_seconds(response.headers.get('Retry-After'))
+        except requests.exceptions.RequestException as e:
+            error = str(e)
+            retryable = True
+        except Exception as e:
+            error = str(e)
+            retryable = False
+        finally:
+            with self._cond:
+                self._in_flight -= 1
+                self._cond.notify()
+
+        # Bookkeeping stays outside the try: only the POST itself can fail a delivery
+        if delivered:
+            self._finish(row, 'delivered', attempt, None)
+            return
+        print(f"⚠️  Notification for {row['task_id']} failed (attempt {attempt}): {error}")
+        if not retryable or attempt >= self.max_attempts:
+            self._finish(row, 'failed', attempt, error)
+            return
+        if retry_after is None:
+            backoff = min(NOTIFY_BACKOFF_BASE * 2 ** (attempt - 1), NOTIFY_BACKOFF_MAX)
+            retry_after = backoff * random.uniform(0.5, 1.5)
+        next_attempt = time.time() + retry_after
+        with self.db.transaction() as conn:
+            conn.execute(
+                "UPDATE notifications SET state = 'pending', next_attempt_at = ?, last_error = ?, "
+                "lease_owner = NULL, lease_expires = NULL, updated_at = ? WHERE id = ?",
+                (next_attempt, error, time.time(), row['id'])
+            )
+        self._wake_at(next_attempt)
+        print(f"⏳ Retrying notification for {row['task_id']} in {retry_after:.1f}s")
+
+    def _finish(self, row, state, attempts, error):
+        with self.db.transaction() as conn:
+            conn.execute(
+                "UPDATE notifications SET state = ?, last_error = ?, lease_owner = NULL, "
+                "lease_expires = NULL, updated_at = ? WHERE id = ?",
+                (state, error, time.time(), row['id'])
+            )
+        with self._cond:
+            if state == 'delivered':
+                self._delivered += 1
+            else:
+                self._failed += 1
+        if state == 'delivered':
+            print(f"✅ Successfully notified evaluation URL for {row['task_id']}")
+        else:
+            print(f"❌ Failed to notify evaluation URL for {row['task_id']}: {error}")
+        if self.on_result is not None:
+            try:
+                self.on_result(row['task_id'], {'status': state, 'attempts': attempts, 'error': error},
+                               json.loads(row['payload']))
+            except Exception as e:
+                print(f"⚠️  Recording notification result for {row['task_id']} failed: {str(e)}")
+
+    def stats(self):
+        rows = self.db.connection().execute(
+            'SELECT state, COUNT(*) FROM notifications GROUP BY state'
+        ).fetchall()
+        with self._cond:
+            return {
+                'outbox': {state: count for state, count in rows},
+                'in_flight': self._in_flight,
+                'delivered': self._delivered,
+                'failed': self._failed
+            }
@@ -0,0 +1,141 @@
+import heapq
+import itertools
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+# Configuration
+PAGES_POLL_INITIAL = float(os.getenv('PAGES_POLL_INITIAL', '2'))
+PAGES_POLL_MAX = float(os.getenv('PAGES_POLL_MAX', '30'))
+PAGES_READY_TIMEOUT = float(os.getenv('PAGES_READY_TIMEOUT', '600'))
+PAGES_HEAD_CHECK = os.getenv('PAGES_HEAD_CHECK', 'true').lower() == 'true'
+
+
+class PagesCheck:
+    """One deployment waiting for its Pages site to serve a given commit"""
+
+    def __init__(self, task_id, repo_name, pages_url, commit_sha, on_ready):
+        self.task_id = task_id
+        self.repo_name = repo_name
+        self.pages_url = pages_url
+        self.commit_sha = commit_sha
+        self.on_ready = on_ready
+        self.started = time.monotonic()
+        self.delay = PAGES_POLL_INITIAL
+        self.checks = 0
+
+
+class PagesReadinessTracker:
+    """Polls GitHub Pages for deployed commits on one background thread
+
+    Each tracked deployment is checked with adaptive backoff: first the
+    latest Pages build must be ``built`` for the pushed commit, then (if
+    PAGES_HEAD_CHECK) a HEAD of the site must answer 200. When that happens,
+    or PAGES_READY_TIMEOUT passes, ``on_ready(live, seconds)`` runs on a
+    small callback pool so slow callbacks never stall the polling loop.
+    """
+
+    def __init__(self, fetch_build, record):
+        self.fetch_build = fetch_build  # (repo_name) -> latest build dict or None
+        self.record = record  # (task_id, pages_info) -> None
+        self._heap = []
+        self._tracking = set()  # (task_id, commit_sha) being watched by this process
+        self._counter = itertools.count()
+        self._lock = threading.Condition()
+        self._pid = None
+        self._callbacks = None
+        self._session = None
+
+    def _ensure_thread(self):
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._heap = []
+            self._tracking = set()
+            self._callbacks = ThreadPoolExecutor(max_workers=2, thread_name_prefix='pages-ready')
+            self._session = requests.Session()
+            worker = threading.Thread(target=self._run, name='pages-tracker')
+            worker.daemon = True
+            worker.start()
+            self._pid = os.getpid()
+
+    def track(self, task_id, repo_name, pages_url, commit_sha, on_ready=None):
+        """Start watching a deployment; returns immediately (a commit already watched is left alone)"""
+        self._ensure_thread()
+        with self._lock:
+            if (task_id, commit_sha) in self._tracking:
+                return
+            self._tracking.add((task_id, commit_sha))
+        check = PagesCheck(task_id, repo_name, pages_url, commit_sha, on_ready)
+        self.record(task_id, {'status': 'building', 'commit_sha': commit_sha})
+        self._schedule(check, PAGES_POLL_INITIAL)
+
+    def _schedule(self, check, delay):
+        with self._lock:
+            heapq.heappush(self._heap, (time.monotonic() + delay, next(self._counter), check))
+            self._lock.notify()
+
+    def _run(self):
+        while True:
+            with self._lock:
+                while not self._heap or self._heap[0][0] > time.monotonic():
+                    timeout = self._heap[0][0] - time.monotonic() if self._heap else None
+                    self._lock.wait(timeout)
+                _, _, check = heapq.heappop(self._heap)
+            try:
+                self._check(check)
+            except Exception as e:
+                print(f"⚠️  Pages check failed for {check.task_id}: {str(e)}")
+                self._reschedule(check)
+
+    def _check(self, check):
+        check.checks += 1
+        build = self.fetch_build(check.repo_name)
+        live = (
+            build is not None
+            and build.get('status') == 'built'
+            and build.get('commit') in (None, check.commit_sha)
+        )
+        if live and PAGES_HEAD_CHECK:
+            try:
+                response = self._session.head(check.pages_url, timeout=10, allow_redirects=True)
+                live = response.status_code == 200
+            except requests.exceptions.RequestException:
+                live = False
+        if live:
+            self._finish(check, True)
+        else:
+            self._reschedule(check)
+
+    def _reschedule(self, check):
+        if time.monotonic() - check.started >= PAGES_READY_TIMEOUT:
+            self._finish(check, False)
+            return
+        check.delay = min(check.delay * 1.5, PAGES_POLL_MAX)
+        self._schedule(check, check.delay)
+
+    def _finish(self, check, live):
+        elapsed = round(time.monotonic() - check.started, 1)
+        with self._lock:
+            self._tracking.discard((check.task_id, check.commit_sha))
+        if live:
+            print(f"🌐 Pages live for {check.task_id} after {elapsed}s ({check.checks} checks)")
+        else:
+            print(f"⚠️  Pages not live for {check.task_id} after {elapsed}s, giving up")
+        self.record(check.task_id, {
+            'status': 'live' if live else 'timeout',
+            'commit_sha': check.commit_sha,
+            'time_to_live': elapsed if live else None,
+            'checks': check.checks
+        })
+        if check.on_ready is not None:
+            self._callbacks.submit(check.on_ready, live, elapsed)
+
+    def stats(self):
+        with self._lock:
+            return {'tracking': len(self._heap)}
@@ -0,0 +1,111 @@
+import os
+import time
+from collections import namedtuple
+
+from db import get_database
+from generation_cache import git_blob_sha
+
+# Configuration
+# Text files up to this size are kept so later rounds can revise them; larger ones keep only their SHA
+PUSHED_CONTENT_LIMIT = int(os.getenv('PUSHED_CONTENT_LIMIT', str(256 * 1024)))
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS pushed_commits (
+    task_id TEXT PRIMARY KEY,
+    backend TEXT NOT NULL,
+    commit_sha TEXT NOT NULL,
+    tree_sha TEXT,
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS pushed_files (
+    task_id TEXT NOT NULL,
+    path TEXT NOT NULL,
+    sha TEXT NOT NULL,
+    PRIMARY KEY (task_id, path)
+);
+CREATE INDEX IF NOT EXISTS pushed_files_sha ON pushed_files (sha);
+CREATE TABLE IF NOT EXISTS pushed_blobs (
+    sha TEXT PRIMARY KEY,
+    content TEXT NOT NULL
+);
+'''
+
+
+class Snapshot(namedtuple('Snapshot', 'task_id backend commit_sha tree_sha blob_shas attachments')):
+    """What the last successful push of a task left on its default branch"""
+
+    __slots__ = ()
+
+    def generated(self):
+        """Paths the generator produced; a later round may delete these but never attachments"""
+        return set(self.blob_shas) - self.attachments
+
+
+class PushedFiles:
+    """Local record of the files each task's repository holds, so later rounds need not ask
+
+    After every successful push the commit, its tree and each file's blob
+    SHA are stored; text contents go into a content-addressed table, so the
+    many apps that share template files store them once. A later round
+    diffs against the snapshot and revises the stored contents instead of
+    reading the repository back from GitHub. Attachments are flagged, and
+    stay in the snapshot until a later push replaces them, as they do in
+    the repository.
+    """
+
+    def __init__(self, db=None):
+        self.db = db or get_database()
+        self.db.register_schema(SCHEMA)
+        self.db.add_column('pushed_files', 'attachment', 'INTEGER NOT NULL DEFAULT 0')
+        self._pruned_at = 0.0
+
+    def record(self, task_id, backend, files, commit_sha, tree_sha=None):
+        """Store files ({path: content}, optionally with ``blob_shas``) as pushed in commit_sha"""
+        known = getattr(files, 'blob_shas', {})
+        attachments = getattr(files, 'attachments', ())
+        shas = {path: known.get(path) or git_blob_sha(content) for path, content in files.items()}
+        blobs = [
+            (shas[path], content) for path, content in files.items()
+            if isinstance(content, str) and len(content) <= PUSHED_CONTENT_LIMIT
+        ]
+        now = time.time()
+        with self.db.transaction() as conn:
+            conn.execute(
+                'INSERT INTO pushed_commits (task_id, backend, commit_sha, tree_sha, updated_at) VALUES (?, ?, ?, ?, ?) '
+                'ON CONFLICT (task_id) DO UPDATE SET backend = excluded.backend, commit_sha = excluded.commit_sha, '
+                'tree_sha = excluded.tree_sha, updated_at = excluded.updated_at',
+                (task_id, backend, commit_sha, tree_sha, now)
+            )
+            # Earlier attachments are never deleted by a later round, so they remain unless replaced
+            conn.execute('DELETE FROM pushed_files WHERE task_id = ? AND attachment = 0', (task_id,))
+            conn.executemany(
+                'INSERT OR REPLACE INTO pushed_files (task_id, path, sha, attachment) VALUES (?, ?, ?, ?)',
+                [(task_id, path, sha, path in attachments) for path, sha in shas.items()]
+            )
+            conn.executemany('INSERT OR IGNORE INTO pushed_blobs (sha, content) VALUES (?, ?)', blobs)
+            if now - self._pruned_at > 3600:
+                self._pruned_at = now
+                conn.execute('DELETE FROM pushed_blobs WHERE sha NOT IN (SELECT sha FROM pushed_files)')
+
+    def get(self, task_id, backend=None):
+        """Snapshot of the task's last push (by backend, if given), or None"""
+        conn = self.db.connection()
+        row = conn.execute('SELECT * FROM pushed_commits WHERE task_id = ?', (task_id,)).fetchone()
+        if row is None or (backend is not None and row['backend'] != backend):
+            return None
+        files = conn.execute('SELECT path, sha, attachment FROM pushed_files WHERE task_id = ?', (task_id,)).fetchall()
+        return Snapshot(task_id, row['backend'], row['commit_sha'], row['tree_sha'],
+                        {f['path']: f['sha'] for f in files}, {f['path'] for f in files if f['attachment']})
+
+    def contents(self, snapshot):
+        """{path: text} for the snapshot's files whose contents were kept"""
+        rows = self.db.connection().execute(
+            'SELECT f.path, f.sha, b.content FROM pushed_files f JOIN pushed_blobs b ON b.sha = f.sha '
+            'WHERE f.task_id = ?',
+            (snapshot.task_id,)
+        ).fetchall()
+        # Rows recorded after the snapshot was read belong to a newer push
+        return {row['path']: row['content'] for row in rows if snapshot.blob_shas.get(row['path']) == row['sha']}
+
+
+pushed_files = PushedFiles()
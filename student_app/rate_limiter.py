@@ -0,0 +1,159 @@
+import os
+import threading
+import time
+
+# Configuration
+GITHUB_RATE_RESERVE = int(os.getenv('GITHUB_RATE_RESERVE', '50'))
+GITHUB_WRITE_RATE = float(os.getenv('GITHUB_WRITE_RATE', '1.0'))
+GITHUB_WRITE_BURST = int(os.getenv('GITHUB_WRITE_BURST', '20'))
+GITHUB_MAX_RATE_WAIT = float(os.getenv('GITHUB_MAX_RATE_WAIT', '900'))
+
+WRITE_METHODS = ('POST', 'PUT', 'PATCH', 'DELETE')
+SECONDARY_LIMIT_DEFAULT_WAIT = 60  # GitHub: wait at least a minute when no Retry-After is given
+
+
+class TokenBucket:
+    """Classic token bucket; acquire() blocks until a token is available"""
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self):
+        """Take one token, returning the seconds spent waiting for it"""
+        waited = 0.0
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self._refill(now)
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return waited
+                delay = (1 - self.tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+    def available(self):
+        with self.lock:
+            self._refill(time.monotonic())
+            return self.tokens
+
+
+class RateLimitScheduler:
+    """Paces every GitHub request in the process against GitHub's rate limits
+
+    Primary limit: X-RateLimit-* headers from each response; once fewer than
+    GITHUB_RATE_RESERVE requests remain, callers wait for the reset.
+    Secondary limits: 403/429 responses carrying Retry-After (or a secondary
+    limit message) pause all callers for that long.
+    Content creation: POST/PUT/PATCH/DELETE go through a token bucket of
+    GITHUB_WRITE_RATE per second with bursts of GITHUB_WRITE_BURST.
+
+    Callers queue instead of failing; only a wait longer than
+    GITHUB_MAX_RATE_WAIT lets the rate-limit response through as an error.
+    """
+
+    def __init__(self, reserve=GITHUB_RATE_RESERVE, write_rate=GITHUB_WRITE_RATE,
+                 write_burst=GITHUB_WRITE_BURST, max_wait=GITHUB_MAX_RATE_WAIT):
+        self.reserve = reserve
+        self.max_wait = max_wait
+        self.writes = TokenBucket(write_rate, write_burst)
+        self._lock = threading.Lock()
+        self.limit = None
+        self.remaining = None
+        self.reset_at = None  # epoch seconds, as sent by GitHub
+        self.blocked_until = 0.0  # epoch seconds
+        self.waiting = 0
+        self.requests = 0
+        self.throttled = 0
+        self.total_wait = 0.0
+
+    def _reserve_slot(self):
+        """Claim one request from the primary budget, or return how long to wait for one"""
+        now = time.time()
+        with self._lock:
+            pause = self.blocked_until - now
+            if self.remaining is not None and self.remaining <= self.reserve and self.reset_at:
+                pause = max(pause, self.reset_at - now)
+            if pause <= 0 and self.remaining is not None:
+                # Count it now so concurrent callers see the budget shrink before headers arrive
+                self.remaining -= 1
+        return pause
+
+    def before_request(self, method):
+        """Block until the request may be sent; returns seconds waited"""
+        waited = 0.0
+        with self._lock:
+            self.waiting += 1
+        try:
+            pause = self._reserve_slot()
+            while pause > 0 and waited + pause <= self.max_wait:
+                print(f"⏳ GitHub rate limit: holding request for {pause:.1f}s")
+                time.sleep(pause)
+                waited += pause
+                pause = self._reserve_slot()
+            if method in WRITE_METHODS:
+                waited += self.writes.acquire()
+        finally:
+            with self._lock:
+                self.waiting -= 1
+                self.requests += 1
+                self.total_wait += waited
+        return waited
+
+    def after_response(self, status, headers, body=''):
+        """Record rate-limit headers; returns seconds to wait before retrying, or None"""
+        headers = {k.lower(): v for k, v in headers.items()}
+        now = time.time()
+        with self._lock:
+            if 'x-ratelimit-limit' in headers:
+                self.limit = int(headers['x-ratelimit-limit'])
+            if 'x-ratelimit-remaining' in headers:
+                remaining = int(headers['x-ratelimit-remaining'])
+                reset_at = float(headers.get('x-ratelimit-reset', 0)) or self.reset_at
+                if self.remaining is None or reset_at != self.reset_at:
+                    self.remaining = remaining  # first response, or a new window
+                else:
+                    # Responses to requests sent earlier carry older counts; keep the lowest
+                    self.remaining = min(self.remaining, remaining)
+                self.reset_at = reset_at
+
+            if status not in (403, 429):
+                return None
+            if 'retry-after' in headers:
+                delay = float(headers['retry-after'])
+            elif self.remaining == 0 and self.reset_at:
+                delay = max(self.reset_at - now, 1.0)
+            elif 'rate limit' in body.lower():
+                delay = SECONDARY_LIMIT_DEFAULT_WAIT
+            else:
+                return None  # an ordinary permission error
+            self.blocked_until = max(self.blocked_until, now + delay)
+            self.throttled += 1
+        print(f"⚠️  GitHub rate limited (HTTP {status}), backing off {delay:.0f}s")
+        return delay
+
+    def stats(self):
+        now = time.time()
+        with self._lock:
+            return {
+                'limit': self.limit,
+                'remaining': self.remaining,
+                'reset_in': max(0, int(self.reset_at - now)) if self.reset_at else None,
+                'blocked_for': max(0.0, round(self.blocked_until - now, 1)),
+                'write_tokens': round(self.writes.available(), 1),
+                'waiting': self.waiting,
+                'requests': self.requests,
+                'throttled': self.throttled,
+                'total_wait_seconds': round(self.total_wait, 1)
+            }
+
+
+github_scheduler = RateLimitScheduler()
@@ -0,0 +1,238 @@
+import os
+import secrets
+import threading
+import time
+from collections import deque
+
+from db import get_database
+from rate_limiter import github_scheduler
+
+# Configuration
+REPO_POOL_SIZE = int(os.getenv('REPO_POOL_SIZE', '0'))
+REPO_POOL_PREFIX = os.getenv('REPO_POOL_PREFIX', 'llm-pool-')
+REPO_POOL_REFILL_SECONDS = float(os.getenv('REPO_POOL_REFILL_SECONDS', '30'))
+REPO_POOL_MIN_WRITE_TOKENS = float(os.getenv('REPO_POOL_MIN_WRITE_TOKENS', '10'))
+REPO_POOL_STALE_SECONDS = float(os.getenv('REPO_POOL_STALE_SECONDS', '600'))
+# Longest wait between retries of a repository whose provisioning failed
+REPO_POOL_RETRY_MAX = float(os.getenv('REPO_POOL_RETRY_MAX', '1800'))
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS repo_pool (
+    name TEXT PRIMARY KEY,
+    state TEXT NOT NULL,
+    head_sha TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS repo_pool_state ON repo_pool (state, created_at);
+'''
+
+
+class RepoPool:
+    """Keeps REPO_POOL_SIZE empty repositories with Pages enabled, ready to claim
+
+    Repositories are tracked in SQLite so every worker process draws from one
+    pool: rows go creating -> ready -> claimed and are deleted once renamed to
+    their task. A filler thread per process tops the pool up after claims and
+    every REPO_POOL_REFILL_SECONDS, but only while the rate-limit scheduler
+    has budget to spare (REPO_POOL_MIN_WRITE_TOKENS write tokens and more
+    than the reserve of primary requests), so deployments are never paced
+    behind pool maintenance.
+
+    A row whose provisioning failed, or that was left creating or claimed for
+    REPO_POOL_STALE_SECONDS (a process died mid-call), becomes ``broken``
+    rather than being forgotten: the repository may exist on GitHub, so the
+    same name is provisioned again (``provision`` must be safe to retry) with
+    exponential backoff up to REPO_POOL_RETRY_MAX. Broken rows count towards
+    the pool size, so failures never lead to creating more repositories.
+    """
+
+    def __init__(self, provision, size=REPO_POOL_SIZE, db=None, scheduler=github_scheduler):
+        self.provision = provision  # (name) -> head commit SHA of the new repository
+        self.size = size
+        self.db = db or get_database()
+        self.db.register_schema(SCHEMA)
+        self.db.add_column('repo_pool', 'attempts', 'INTEGER NOT NULL DEFAULT 0')
+        self.db.add_column('repo_pool', 'retry_at', 'REAL')
+        self.db.add_column('repo_pool', 'last_error', 'TEXT')
+        self.scheduler = scheduler
+        self.enabled = False
+        self._cond = threading.Condition()
+        self._pid = None
+        self._stats_lock = threading.Lock()
+        self._claim_seconds = deque(maxlen=100)
+        self.hits = 0
+        self.misses = 0
+        self.provisioned = 0
+        self.provision_errors = 0
+
+    def _ensure_thread(self):
+        if self._pid == os.getpid():
+            return
+        with self._cond:
+            if self._pid == os.getpid():
+                return
+            worker = threading.Thread(target=self._run, name='repo-pool')
+            worker.daemon = True
+            worker.start()
+            self._pid = os.getpid()
+
+    def start(self):
+        """Start filling the pool in the background (no-op when REPO_POOL_SIZE is 0)"""
+        if self.size > 0:
+            self.enabled = True
+            self._ensure_thread()
+
+    def _wake(self):
+        with self._cond:
+            self._cond.notify()
+
+    def _run(self):
+        while True:
+            try:
+                self.refill()
+            except Exception as e:
+                print(f"⚠️  Repository pool refill failed: {str(e)}")
+            with self._cond:
+                self._cond.wait(REPO_POOL_REFILL_SECONDS)
+
+    def _has_budget(self):
+        scheduler = self.scheduler
+        if scheduler.writes.available() < REPO_POOL_MIN_WRITE_TOKENS:
+            return False
+        # A few calls per repository on top of the reserve deployments may dip into
+        return scheduler.remaining is None or scheduler.remaining > scheduler.reserve + 10
+
+    def _reserve_slot(self):
+        """Name to provision next: a broken row due for a retry, else a new 'creating' row if the pool is short"""
+        now = time.time()
+        with self.db.transaction() as conn:
+            conn.execute(
+                "UPDATE repo_pool SET state = 'broken', retry_at = ?, last_error = 'abandoned', updated_at = ? "
+                "WHERE state IN ('creating', 'claimed') AND updated_at < ?",
+                (now, now, now - REPO_POOL_STALE_SECONDS)
+            )
+            row = conn.execute(
+                "SELECT name FROM repo_pool WHERE state = 'broken' AND retry_at <= ? ORDER BY retry_at LIMIT 1", (now,)
+            ).fetchone()
+            if row is not None:
+                conn.execute(
+                    "UPDATE repo_pool SET state = 'creating', updated_at = ? WHERE name = ?", (now, row['name'])
+                )
+                return row['name']
+            count = conn.execute("SELECT COUNT(*) FROM repo_pool WHERE state != 'claimed'").fetchone()[0]
+            if count >= self.size:
+                return None
+            name = f"{REPO_POOL_PREFIX}{secrets.token_hex(5)}"
+            conn.execute(
+                "INSERT INTO repo_pool (name, state, created_at, updated_at) VALUES (?, 'creating', ?, ?)",
+                (name, now, now)
+            )
+        return name
+
+    def refill(self):
+        """Provision repositories until the pool is full or the rate-limit budget is low"""
+        while self._has_budget():
+            name = self._reserve_slot()
+            if name is None:
+                return
+            try:
+                head_sha = self.provision(name)
+            except Exception as e:
+                delay = self._mark_broken(name, e)
+                with self._stats_lock:
+                    self.provision_errors += 1
+                print(f"⚠️  Could not provision pooled repository {name}, retrying in {delay:.0f}s: {str(e)}")
+                return
+            with self.db.transaction() as conn:
+                conn.execute(
+                    "UPDATE repo_pool SET state = 'ready', head_sha = ?, updated_at = ? WHERE name = ?",
+                    (head_sha, time.time(), name)
+                )
+            with self._stats_lock:
+                self.provisioned += 1
+            print(f"🏊 Pooled repository {name} ready")
+
+    def _mark_broken(self, name, error):
+        """Keep a failed row for a later retry of the same name; returns the backoff in seconds"""
+        now = time.time()
+        with self.db.transaction() as conn:
+            attempts = conn.execute('SELECT attempts FROM repo_pool WHERE name = ?', (name,)).fetchone()[0] + 1
+            delay = min(REPO_POOL_REFILL_SECONDS * 2 ** (attempts - 1), REPO_POOL_RETRY_MAX)
+            conn.execute(
+                "UPDATE repo_pool SET state = 'broken', attempts = ?, retry_at = ?, last_error = ?, updated_at = ? "
+                "WHERE name = ?",
+                (attempts, now + delay, str(error)[:500], now, name)
+            )
+        return delay
+
+    def claim(self, adopt):
+        """Take the oldest ready repository and pass (name, head_sha) to adopt
+
+        Returns adopt's result, or None when the pool is empty or adopt raised
+        (a repository that is gone, status 404, is dropped; others go back).
+        """
+        if self.size <= 0:
+            return None
+        if self.enabled:
+            self._ensure_thread()
+        started = time.monotonic()
+        now = time.time()
+        with self.db.transaction() as conn:
+            row = conn.execute(
+                "SELECT name, head_sha FROM repo_pool WHERE state = 'ready' ORDER BY created_at LIMIT 1"
+            ).fetchone()
+            if row is not None:
+                conn.execute(
+                    "UPDATE repo_pool SET state = 'claimed', updated_at = ? WHERE name = ?", (now, row['name'])
+                )
+        if row is None:
+            with self._stats_lock:
+                self.misses += 1
+            self._wake()
+            return None
+
+        try:
+            result = adopt(row['name'], row['head_sha'])
+        except Exception as e:
+            with self.db.transaction() as conn:
+                if getattr(e, 'status', None) == 404:
+                    conn.execute('DELETE FROM repo_pool WHERE name = ?', (row['name'],))
+                else:
+                    conn.execute(
+                        "UPDATE repo_pool SET state = 'ready', updated_at = ? WHERE name = ?",
+                        (time.time(), row['name'])
+                    )
+            with self._stats_lock:
+                self.misses += 1
+            print(f"⚠️  Could not claim pooled repository {row['name']}: {str(e)}")
+            return None
+
+        with self.db.transaction() as conn:
+            conn.execute('DELETE FROM repo_pool WHERE name = ?', (row['name'],))
+        with self._stats_lock:
+            self.hits += 1
+            self._claim_seconds.append(time.monotonic() - started)
+        self._wake()
+        return result
+
+    def stats(self):
+        states = dict(self.db.connection().execute(
+            'SELECT state, COUNT(*) FROM repo_pool GROUP BY state'
+        ).fetchall())
+        with self._stats_lock:
+            claims = sorted(self._claim_seconds)
+            attempts = self.hits + self.misses
+            return {
+                'target_size': self.size,
+                'ready': states.get('ready', 0),
+                'creating': states.get('creating', 0),
+                'broken': states.get('broken', 0),
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / attempts, 3) if attempts else None,
+                'claim_ms_p50': round(claims[len(claims) // 2] * 1000, 1) if claims else None,
+                'claim_ms_max': round(claims[-1] * 1000, 1) if claims else None,
+                'provisioned': self.provisioned,
+                'provision_errors': self.provision_errors
+            }
@@ -0,0 +1,154 @@
+import math
+import os
+from collections import Counter
+
+import numpy as np
+
+from classifier import Classification, WORD_BREAKS
+
+# Configuration
+# Cosine similarity a brief needs with its best template before the default app is used instead
+SIMILARITY_MIN_SCORE = float(os.getenv('SIMILARITY_MIN_SCORE', '0.1'))
+SIMILARITY_TOP_K = int(os.getenv('SIMILARITY_TOP_K', '5'))
+
+# Function words carry no signal about which app is wanted
+STOP_WORDS = frozenset(
+    'a an and any app application are as at be build by can create for from have i in into is it its make me '
+    'my of on or page should simple so some that the their them then this to use user web website which with '
+    'will would you your'.split()
+)
+
+
+def _stem(word):
+    # Fold plain plurals so "tasks" meets "task"; both sides are folded the same way
+    return word[:-1] if len(word) > 3 and word.endswith('s') and not word.endswith('ss') else word
+
+
+def terms(text):
+    """Unigrams and bigrams of a text, lower-cased and with plurals folded"""
+    words = [_stem(word) for word in (text or '').lower().translate(WORD_BREAKS).split() if word not in STOP_WORDS]
+    return words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+
+
+class SimilarityClassifier:
+    """Ranks templates by TF-IDF cosine similarity between a brief and each template's text
+
+    ``documents`` is a list of ``(generator, priority, description,
+    {keyword: weight})``; a template's text is its name, description and
+    keywords (each counted ``weight`` times). At load time every template
+    becomes an L2-normalized TF-IDF vector of unigrams and bigrams, stored
+    term-major as three NumPy arrays (a CSC sparse matrix), so the index
+    grows with the words templates actually use rather than templates x
+    vocabulary. A brief is vectorized once; scoring it against every
+    template is a single sparse matrix-vector product (``np.bincount``
+    over the postings of the brief's terms), followed by top-k selection
+    with ``np.argpartition``. Ties go to the lower priority number, and
+    briefs scoring below ``min_score`` fall back to ``default``.
+    """
+
+    def __init__(self, documents, default, min_score=SIMILARITY_MIN_SCORE, top_k=SIMILARITY_TOP_K):
+        self.default = default
+        self.min_score = min_score
+        self.top_k = top_k
+        self.generators = []
+        priorities = []
+        self.vocabulary = {}  # term -> row of the matrix
+        term_ids, doc_ids, counts = [], [], []
+        for doc, (generator, priority, description, keywords) in enumerate(documents):
+            self.generators.append(generator)
+            priorities.append(priority)
+            tf = Counter(terms(f"{generator} {description}"))
+            for keyword, weight in keywords.items():
+                for term in terms(keyword):
+                    tf[term] += weight
+            for term, count in tf.items():
+                if count > 0:
+                    term_ids.append(self.vocabulary.setdefault(term, len(self.vocabulary)))
+                    doc_ids.append(doc)
+                    counts.append(count)
+
+        self.priorities = np.asarray(priorities, dtype=np.float64)
+        n_docs, n_terms = len(self.generators), len(self.vocabulary)
+        term_ids = np.asarray(term_ids, dtype=np.int32)
+        doc_ids = np.asarray(doc_ids, dtype=np.int32)
+        counts = np.asarray(counts, dtype=np.float32)
+
+        df = np.bincount(term_ids, minlength=n_terms)
+        self.idf = (np.log((1.0 + n_docs) / (1.0 + df)) + 1.0).astype(np.float32)
+        weights = counts * self.idf[term_ids]
+        norms = np.sqrt(np.bincount(doc_ids, weights=weights * weights, minlength=n_docs)).astype(np.float32)
+        weights /= norms[doc_ids]
+
+        # Sort postings by term, then document: each term's documents are one contiguous, sorted slice
+        order = np.lexsort((doc_ids, term_ids))
+        self.doc_ids = doc_ids[order]
+        self.weights = weights[order]
+        self.term_ptr = np.zeros(n_terms + 1, dtype=np.int64)
+        np.cumsum(np.bincount(term_ids, minlength=n_terms), out=self.term_ptr[1:])
+
+    def _query(self, brief):
+        """(term names, row ids, L2-normalized weights) of the brief's known terms"""
+        tf = Counter(term for term in terms(brief) if term in self.vocabulary)
+        names = sorted(tf)
+        ids = np.fromiter((self.vocabulary[term] for term in names), dtype=np.int64, count=len(names))
+        weights = np.fromiter((tf[term] for term in names), dtype=np.float32, count=len(names)) * self.idf[ids]
+        norm = math.sqrt(float(weights @ weights)) if len(names) else 0.0
+        return names, ids, weights / norm if norm else weights
+
+    def scores(self, brief):
+        """Cosine similarity of the brief with every template, as one array"""
+        _, ids, query = self._query(brief)
+        return self._scores(ids, query)
+
+    def _scores(self, ids, query):
+        starts, ends = self.term_ptr[ids], self.term_ptr[ids + 1]
+        lengths = ends - starts
+        # Positions of every posting of every query term, without a Python loop
+        positions = np.repeat(starts - np.cumsum(lengths) + lengths, lengths) + np.arange(lengths.sum())
+        return np.bincount(self.doc_ids[positions], weights=self.weights[positions] * np.repeat(query, lengths),
+                           minlength=len(self.generators))
+
+    def rank(self, brief, k=None):
+        """Top-k (generator, score) pairs, best first"""
+        scores = self.scores(brief)
+        return [(self.generators[i], float(scores[i])) for i in self._top(scores, k or self.top_k)]
+
+    def _top(self, scores, k):
+        k = min(k, len(scores))
+        if k <= 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k] if k < len(scores) else np.arange(len(scores))
+        return top[np.lexsort((self.priorities[top], -scores[top]))]
+
+    def classify(self, brief):
+        """Return the best Classification for a brief"""
+        names, ids, query = self._query(brief)
+        scores = self._scores(ids, query)
+        top = self._top(scores, self.top_k)
+        if not len(top) or scores[top[0]] <= 0:
+            return Classification(self.default, 0.0, 0.0, [])
+        best = top[0]
+        score = round(float(scores[best]), 3)
+        matches = self._matches(names, ids, best)
+        if score < self.min_score:
+            return Classification(self.default, score, 0.0, matches)
+        confidence = round(float(scores[best] / scores[top].sum()), 3)
+        return Classification(self.generators[best], score, confidence, matches)
+
+    def _matches(self, names, ids, doc):
+        """The query terms that also occur in template ``doc``"""
+        found = []
+        for name, term in zip(names, ids):
+            postings = self.doc_ids[self.term_ptr[term]:self.term_ptr[term + 1]]
+            i = np.searchsorted(postings, doc)
+            if i < len(postings) and postings[i] == doc:
+                found.append(name)
+        return found
+
+    def stats(self):
+        return {
+            'templates': len(self.generators),
+            'terms': len(self.vocabulary),
+            'postings': int(len(self.doc_ids)),
+            'matrix_bytes': int(self.doc_ids.nbytes + self.weights.nbytes + self.term_ptr.nbytes + self.idf.nbytes)
+        }
@@ -0,0 +1,239 @@
+import json
+import os
+import threading
+import time
+
+from db import get_database
+
+# Configuration
+STATUS_STORE = os.getenv('STATUS_STORE', 'sqlite')
+# How often long-polls check for status writes made by other worker processes
+STATUS_WATCH_SECONDS = float(os.getenv('STATUS_WATCH_SECONDS', '0.1'))
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS deployments (
+    task_id TEXT PRIMARY KEY,
+    record TEXT NOT NULL,
+    version INTEGER NOT NULL DEFAULT 1,
+    updated_at REAL NOT NULL
+);
+'''
+
+
+class StatusStore:
+    """Deployment status records keyed by task id
+
+    Behaves like the dict it replaces (``store[task_id] = record``,
+    ``store.get(task_id)``, ``task_id in store``) so call sites stay the same.
+    ``get_raw`` returns the stored JSON text for handlers that only forward it.
+    """
+
+    def __init__(self):
+        self._changed = threading.Condition()
+        self._generation = 0  # bumped on every write this process sees
+        self._waiters = 0
+
+    def get_raw(self, task_id):
+        version_raw = self.get_versioned(task_id)
+        return version_raw[1] if version_raw is not None else None
+
+    def get_versioned(self, task_id):
+        """(version, raw JSON) for a task, or None; version grows with every write"""
+        raise NotImplementedError
+
+    def _notify_changed(self):
+        with self._changed:
+            self._generation += 1
+            self._changed.notify_all()
+
+    def _watch(self):
+        """Make sure writes from other processes wake waiters (no-op for per-process stores)"""
+
+    def wait_for_change(self, task_id, since, timeout):
+        """Block until the task's version differs from ``since`` or timeout passes
+
+        Returns get_versioned's result at that point. Waiters sleep on a
+        condition that every write notifies, so nothing spins.
+        """
+        deadline = time.monotonic() + timeout
+        self._watch()
+        with self._changed:
+            self._waiters += 1
+        try:
+            while True:
+                with self._changed:
+                    generation = self._generation
+                current = self.get_versioned(task_id)
+                if current is not None and current[0] != since:
+                    return current
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return current
+                with self._changed:
+                    if self._generation == generation:
+                        self._changed.wait(remaining)
+        finally:
+            with self._changed:
+                self._waiters -= 1
+
+    def set(self, task_id, record):
+        raise NotImplementedError
+
+    def update(self, task_id, fields):
+        """Merge fields into a record atomically (background trackers write concurrently)"""
+        raise NotImplementedError
+
+    def get(self, task_id, default=None):
+        raw = self.get_raw(task_id)
+        return json.loads(raw) if raw is not None else default
+
+    def __getitem__(self, task_id):
+        record = self.get(task_id)
+        if record is None:
+            raise KeyError(task_id)
+        return record
+
+    def __setitem__(self, task_id, record):
+        self.set(task_id, record)
+
+    def __contains__(self, task_id):
+        return self.get_raw(task_id) is not None
+
+
+class MemoryStatusStore(StatusStore):
+    """Per-process store, for tests and single-process development servers"""
+
+    def __init__(self):
+        super().__init__()
+        self._records = {}  # task_id -> (version, raw)
+        self._lock = threading.Lock()
+
+    def get_versioned(self, task_id):
+        return self._records.get(task_id)
+
+    def set(self, task_id, record):
+        raw = json.dumps(record)
+        with self._lock:
+            version = self._records.get(task_id, (0, None))[0] + 1
+            self._records[task_id] = (version, raw)
+        self._notify_changed()
+
+    def update(self, task_id, fields):
+        with self._lock:
+            version, raw = self._records.get(task_id, (0, None))
+            record = json.loads(raw) if raw is not None else {}
+            record.update(fields)
+            self._records[task_id] = (version + 1, json.dumps(record))
+        self._notify_changed()
+
+
+class SQLiteStatusStore(StatusStore):
+    """Store shared by all worker processes through the SQLite database
+
+    Reads are served from a per-process cache that is dropped whenever
+    another connection commits (``PRAGMA data_version`` changes), so every
+    worker sees the latest committed record without a table lookup per poll.
+    Each drop bumps a cache epoch; a row read before a drop is not cached
+    after it, since a newer commit may already have replaced it.
+    """
+
+    def __init__(self, db=None):
+        super().__init__()
+        self.db = db or get_database()
+        self.db.register_schema(SCHEMA)
+        self._cache = {}
+        self._epoch = 0  # bumped whenever the cache is dropped
+        self._lock = threading.Lock()
+        self._seen = threading.local()
+        self._watcher_pid = None
+
+    def _check_data_version(self, conn):
+        data_version = conn.execute('PRAGMA data_version').fetchone()[0]
+        seen = self._seen
+        if getattr(seen, 'pid', None) != os.getpid() or seen.data_version != data_version:
+            with self._lock:
+                self._cache.clear()
+                self._epoch += 1
+            seen.pid = os.getpid()
+            seen.data_version = data_version
+
+    def _cache_put(self, task_id, version, raw, epoch):
+        with self._lock:
+            if epoch != self._epoch:
+                return  # the cache was dropped while this row was read; it may be stale already
+            cached = self._cache.get(task_id)
+            # Never let a slower reader replace a newer record with an older one
+            if cached is None or cached[0] <= version:
+                self._cache[task_id] = (version, raw)
+
+    def get_versioned(self, task_id):
+        conn = self.db.connection()
+        self._check_data_version(conn)
+        epoch = self._epoch
+        cached = self._cache.get(task_id)
+        if cached is not None:
+            return cached
+        row = conn.execute('SELECT record, version FROM deployments WHERE task_id = ?', (task_id,)).fetchone()
+        if row is None:
+            return None
+        self._cache_put(task_id, row['version'], row['record'], epoch)
+        return row['version'], row['record']
+
+    def _watch(self):
+        if self._watcher_pid == os.getpid():
+            return
+        with self._changed:
+            if self._watcher_pid == os.getpid():
+                return
+            watcher = threading.Thread(target=self._watch_commits, name='status-watcher')
+            watcher.daemon = True
+            watcher.start()
+            self._watcher_pid = os.getpid()
+
+    def _watch_commits(self):
+        """Wake waiters when any connection commits, polling only while someone waits"""
+        conn = self.db.connection()
+        data_version = None
+        while True:
+            with self._changed:
+                while not self._waiters:
+                    self._changed.wait()
+            version = conn.execute('PRAGMA data_version').fetchone()[0]
+            if data_version is not None and version != data_version:
+                self._notify_changed()
+            data_version = version
+            time.sleep(STATUS_WATCH_SECONDS)
+
+    def set(self, task_id, record):
+        self._write(task_id, lambda conn: record)
+
+    def update(self, task_id, fields):
+        def merge(conn):
+            row = conn.execute('SELECT record FROM deployments WHERE task_id = ?', (task_id,)).fetchone()
+            record = json.loads(row['record']) if row is not None else {}
+            record.update(fields)
+            return record
+        self._write(task_id, merge)
+
+    def _write(self, task_id, build):
+        epoch = self._epoch
+        with self.db.transaction() as conn:
+            raw = json.dumps(build(conn))
+            conn.execute(
+                'INSERT INTO deployments (task_id, record, updated_at) VALUES (?, ?, ?) '
+                'ON CONFLICT (task_id) DO UPDATE SET record = excluded.record, '
+                'version = deployments.version + 1, updated_at = excluded.updated_at',
+                (task_id, raw, time.time())
+            )
+            version = conn.execute('SELECT version FROM deployments WHERE task_id = ?', (task_id,)).fetchone()[0]
+        self._cache_put(task_id, version, raw, epoch)
+        self._notify_changed()
+
+
+def create_status_store(backend=STATUS_STORE):
+    """Build the configured status store ('sqlite' or 'memory')"""
+    if backend == 'memory':
+        return MemoryStatusStore()
+    if backend == 'sqlite':
+        return SQLiteStatusStore()
+    raise ValueError(f"Unknown status store backend: {backend}")
@@ -0,0 +1,116 @@
+"""Single-file template packs: a JSON index followed by every file body.
+
+    python template_pack.py app_templates -o templates.pack
+    TEMPLATES_PACK=templates.pack gunicorn -c gunicorn_config.py wsgi:app
+
+Layout: MAGIC, a little-endian u32 format version and u32 index length, the
+UTF-8 JSON index, zero padding to an 8-byte boundary, then the bodies. The
+index holds the registry version, each template's manifest fields and, per
+file, ``[offset, length, blob_sha, slots]`` into the body area. Identical
+bodies (the shared LICENSE, files copied between templates) are stored once.
+"""
+import argparse
+import json
+import mmap
+import os
+import struct
+import time
+
+from generation_cache import git_blob_sha
+
+MAGIC = b'TMPLPACK'
+FORMAT_VERSION = 1
+HEADER = struct.Struct('<8sII')
+ALIGN = 8
+
+
+class TemplatePackError(ValueError):
+    """The file is not a template pack this code can read"""
+
+
+def _source(compiled):
+    """Template text of a CompiledFile, slots written back as ``{{ name }}``"""
+    return ''.join(part if i % 2 == 0 else f"{{{{ {part} }}}}" for i, part in enumerate(compiled.parts))
+
+
+def write_pack(registry, path):
+    """Compile a loaded TemplateRegistry into a pack at path; returns its size in bytes"""
+    bodies = []
+    offsets = {}  # blob sha -> offset of the stored body
+    size = 0
+    templates = {}
+    for name, template in registry.templates.items():
+        files = {}
+        for file_path, compiled in template.files.items():
+            data = _source(compiled).encode('utf-8')
+            sha = compiled.blob_sha or git_blob_sha(data)
+            if sha not in offsets:
+                offsets[sha] = size
+                bodies.append(data)
+                size += len(data)
+            files[file_path] = [offsets[sha], len(data), sha, sorted(compiled.slots)]
+        templates[name] = {
+            'priority': template.priority,
+            'keywords': dict(template.keywords),
+            'description': template.description,
+            'files': files
+        }
+    index = json.dumps({'version': registry.version, 'templates': templates},
+                       separators=(',', ':'), sort_keys=True).encode('utf-8')
+    padding = -(HEADER.size + len(index)) % ALIGN
+
+    # Write beside the target and rename, so running workers keep mapping a complete file
+    tmp = f"{path}.tmp{os.getpid()}"
+    with open(tmp, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, FORMAT_VERSION, len(index)))
+        f.write(index)
+        f.write(b'\0' * padding)
+        for data in bodies:
+            f.write(data)
+    os.replace(tmp, path)
+    return HEADER.size + len(index) + padding + size
+
+
+def read_pack(path):
+    """(index, body memoryview) of a pack, the bodies memory-mapped read-only
+
+    The mapping is shared with every process that maps the same file (the
+    page cache), so workers only pay for the pages they touch.
+    """
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size < HEADER.size:
+            raise TemplatePackError(f"Not a template pack: {path}")
+        buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    magic, version, index_length = HEADER.unpack_from(buffer)
+    if magic != MAGIC:
+        raise TemplatePackError(f"Not a template pack: {path}")
+    if version != FORMAT_VERSION:
+        raise TemplatePackError(f"Unsupported template pack version {version}: {path}")
+    start = HEADER.size + index_length
+    index = json.loads(buffer[HEADER.size:start].decode('utf-8'))
+    body = memoryview(buffer)[start + (-start % ALIGN):]
+    end = max((offset + length for t in index['templates'].values() for offset, length, _, _ in t['files'].values()),
+              default=0)
+    if end > len(body):
+        raise TemplatePackError(f"Truncated template pack: {path}")
+    return index, body
+
+
+def main():
+    from template_registry import TemplateRegistry
+
+    parser = argparse.ArgumentParser(description='Compile a templates directory into a template pack')
+    parser.add_argument('directory', nargs='?', default=os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                                                     'app_templates'))
+    parser.add_argument('-o', '--output', default='templates.pack')
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    registry = TemplateRegistry(args.directory)
+    size = write_pack(registry, args.output)
+    print(f"📦 Packed {len(registry.templates)} templates (version {registry.version}) into {args.output}: "
+          f"{size / 1024:.1f} KiB in {time.perf_counter() - started:.2f}s")
+
+
+if __name__ == '__main__':
+    main()
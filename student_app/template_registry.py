@@ -0,0 +1,197 @@
+import hashlib
+import html
+import json
+import os
+import re
+from types import MappingProxyType
+
+from generation_cache import GeneratedFiles, git_blob_sha
+
+# Configuration
+TEMPLATES_DIR = os.getenv('TEMPLATES_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'app_templates'))
+# A pack built by template_pack.py; when set, templates are memory-mapped from it instead of read from TEMPLATES_DIR
+TEMPLATES_PACK = os.getenv('TEMPLATES_PACK', '')
+
+MANIFEST = 'template.json'
+SHARED_FILES = ('LICENSE',)  # top-level files every generated app gets
+SLOT = re.compile(r'\{\{\s*(\w+)\s*\}\}')
+
+
+class CompiledFile:
+    """A template file split once into literal text and ``{{ slot }}`` names
+
+    Files without slots render to the very same string object every time, so
+    static bodies are shared by all deployments instead of copied, and carry
+    their git ``blob_sha`` (None for files with slots).
+    """
+
+    __slots__ = ('path', 'parts', 'slots', 'escape', 'blob_sha')
+
+    def __init__(self, path, text):
+        pieces = SLOT.split(text)
+        self.path = path
+        self.parts = tuple(pieces)  # literal, slot, literal, slot, ..., literal
+        self.slots = frozenset(pieces[1::2])
+        self.escape = path.endswith('.html')
+        self.blob_sha = None if self.slots else git_blob_sha(text)
+
+    def render(self, values):
+        if not self.slots:
+            return self.parts[0]
+        out = list(self.parts)
+        for i in range(1, len(out), 2):
+            value = str(values[out[i]])
+            out[i] = html.escape(value) if self.escape else value
+        return ''.join(out)
+
+
+class PackedFile(CompiledFile):
+    """A CompiledFile whose text stays in the memory-mapped pack until first rendered
+
+    Slots and blob SHA come from the pack index, so loading decodes nothing;
+    ``parts`` is split from the mapped bytes on first use and kept.
+    """
+
+    __slots__ = ('_view',)
+
+    def __init__(self, path, view, slots, blob_sha):
+        self.path = path
+        self._view = view
+        self.slots = frozenset(slots)
+        self.escape = path.endswith('.html')
+        self.blob_sha = None if self.slots else blob_sha
+
+    def __getattr__(self, name):
+        # Only reached while ``parts`` is still unset
+        if name != 'parts':
+            raise AttributeError(name)
+        self.parts = tuple(SLOT.split(str(self._view, 'utf-8')))
+        return self.parts
+
+
+class AppTemplate:
+    """One generator: its compiled files plus classifier priority, keywords and description"""
+
+    __slots__ = ('name', 'priority', 'keywords', 'files', 'description')
+
+    def __init__(self, name, priority, keywords, files, description=''):
+        self.name = name
+        self.priority = priority
+        self.description = description
+        self.keywords = MappingProxyType(dict(keywords))
+        self.files = MappingProxyType(dict(files))
+
+    @property
+    def slots(self):
+        return frozenset().union(*(f.slots for f in self.files.values()))
+
+    def render(self, **values):
+        """Return {path: content} for one deployment, with static files' ``blob_shas`` filled in"""
+        return GeneratedFiles(
+            ((path, compiled.render(values)) for path, compiled in self.files.items()),
+            ((path, compiled.blob_sha) for path, compiled in self.files.items() if compiled.blob_sha),
+            self.name
+        )
+
+
+class TemplateRegistry:
+    """Generator templates loaded once from package data
+
+    Each subdirectory of ``directory`` is a generator: its files are the app's
+    files, and an optional ``template.json`` holds ``priority``,
+    ``keywords`` and a ``description`` for the brief classifiers. Top-level SHARED_FILES (the MIT
+    LICENSE) are added to every generator unless it ships its own.
+    ``version`` is a digest of everything loaded, for keying cached output.
+
+    With ``pack`` (see template_pack) the same templates come from one
+    memory-mapped file instead: only the index is parsed at load, file
+    bodies are sliced from the mapping and decoded when first rendered, and
+    all workers share the pages. A pack keeps the version of the directory
+    it was built from.
+    """
+
+    def __init__(self, directory=TEMPLATES_DIR, pack=None):
+        self.directory = directory
+        self.pack = pack
+        if pack:
+            self._load_pack(pack)
+            return
+        self._digest = hashlib.sha1()
+        shared = {}
+        for name in SHARED_FILES:
+            path = os.path.join(directory, name)
+            if os.path.exists(path):
+                shared[name] = CompiledFile(name, self._read(path))
+
+        templates = {}
+        for name in sorted(os.listdir(directory)):
+            root = os.path.join(directory, name)
+            if os.path.isdir(root):
+                templates[name] = self._load(name, root, shared)
+        self.templates = MappingProxyType(templates)
+        self.version = self._digest.hexdigest()[:12]
+
+    def _read(self, path):
+        # newline='' keeps files byte-for-byte, so blob SHAs match what was pushed before
+        with open(path, encoding='utf-8', newline='') as f:
+            text = f.read()
+        self._digest.update(os.path.relpath(path, self.directory).encode() + b'\0' + text.encode('utf-8'))
+        return text
+
+    def _load(self, name, root, shared):
+        manifest = {}
+        files = dict(shared)
+        for dirpath, dirnames, filenames in os.walk(root):
+            dirnames.sort()  # stable order keeps ``version`` stable
+            for filename in sorted(filenames):
+                full = os.path.join(dirpath, filename)
+                path = os.path.relpath(full, root).replace(os.sep, '/')
+                if path == MANIFEST:
+                    manifest = json.loads(self._read(full))
+                else:
+                    files[path] = CompiledFile(path, self._read(full))
+        return AppTemplate(name, manifest.get('priority', 100), manifest.get('keywords', {}), files,
+                           manifest.get('description', ''))
+
+    def _load_pack(self, path):
+        from template_pack import read_pack
+
+        index, body = read_pack(path)
+        templates = {}
+        packed = {}  # one PackedFile per stored body and path, like the shared files of a directory
+        for name, entry in index['templates'].items():
+            files = {}
+            for file_path, (offset, length, sha, slots) in entry['files'].items():
+                key = (file_path, offset)
+                if key not in packed:
+                    packed[key] = PackedFile(file_path, body[offset:offset + length], slots, sha)
+                files[file_path] = packed[key]
+            templates[name] = AppTemplate(name, entry['priority'], entry['keywords'], files, entry['description'])
+        self.templates = MappingProxyType(templates)
+        self.version = index['version']
+
+    def get(self, name):
+        template = self.templates.get(name)
+        if template is None:
+            raise KeyError(f"Unknown app template: {name}")
+        return template
+
+    def render(self, name, **values):
+        return self.get(name).render(**values)
+
+    def rules(self):
+        """Classifier rules for every template that declares keywords"""
+        return [
+            (t.name, t.priority, dict(t.keywords))
+            for t in sorted(self.templates.values(), key=lambda t: t.priority) if t.keywords
+        ]
+
+    def documents(self):
+        """(generator, priority, description, {keyword: weight}) for the similarity classifier"""
+        return [
+            (t.name, t.priority, t.description, dict(t.keywords))
+            for t in sorted(self.templates.values(), key=lambda t: t.priority) if t.keywords or t.description
+        ]
+
+
+template_registry = TemplateRegistry(pack=TEMPLATES_PACK or None)
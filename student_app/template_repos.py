@@ -0,0 +1,114 @@
+import hashlib
+import os
+import threading
+import time
+
+from github import GithubException
+
+from asset_optimizer import asset_optimizer
+from generation_cache import git_blob_sha
+from template_registry import template_registry
+
+# Configuration
+TEMPLATE_REPO_PREFIX = os.getenv('TEMPLATE_REPO_PREFIX', 'llm-template-')
+TEMPLATE_READY_TIMEOUT = float(os.getenv('TEMPLATE_READY_TIMEOUT', '30'))
+
+
+class TemplateRepo:
+    """A template repository known to hold a generator's current files"""
+
+    __slots__ = ('full_name', 'content_hash', 'tree', 'blobs')
+
+    def __init__(self, full_name, content_hash, tree, blobs):
+        self.full_name = full_name
+        self.content_hash = content_hash
+        self.tree = tree  # GitTree of the head commit; generated repos get the same tree SHA
+        self.blobs = blobs  # {path: blob_sha}
+
+
+def content_hash(blob_shas):
+    """Digest of a file set, from its paths and blob SHAs"""
+    digest = hashlib.sha1()
+    for path, sha in sorted(blob_shas.items()):
+        digest.update(f"{path}\0{sha}\n".encode('utf-8'))
+    return digest.hexdigest()
+
+
+def wait_for_ref(repo, timeout=TEMPLATE_READY_TIMEOUT):
+    """Default branch ref of a freshly generated repository
+
+    GitHub copies template contents asynchronously, so the ref can be missing
+    (404/409) for a moment after the generate call returns.
+    """
+    deadline = time.monotonic() + timeout
+    delay = 0.25
+    while True:
+        try:
+            return repo.get_git_ref(f"heads/{repo.default_branch or 'main'}")
+        except GithubException as e:
+            if e.status not in (404, 409) or time.monotonic() + delay > deadline:
+                raise
+        time.sleep(delay)
+        delay = min(delay * 2, 5.0)
+
+
+class TemplateRepositories:
+    """One GitHub template repository per static generator, synced on demand
+
+    A generator qualifies when none of its files have slots, so every round-1
+    repository it produces starts from identical content. The first use in
+    a process (and any use after the templates change) compares the
+    registry's content hash with what was last synced, creates the template
+    repository if needed and commits only the files that differ.
+    """
+
+    def __init__(self, prefix=TEMPLATE_REPO_PREFIX):
+        self.prefix = prefix
+        self._synced = {}
+        self._locks = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def supports(generator):
+        template = template_registry.templates.get(generator)
+        return template is not None and not template.slots
+
+    def get(self, manager, generator):
+        """TemplateRepo for generator, synced with the registry"""
+        files = asset_optimizer.optimize(template_registry.render(generator))  # what deployments push
+        blob_shas = {path: files.blob_shas.get(path) or git_blob_sha(content) for path, content in files.items()}
+        digest = content_hash(blob_shas)
+        with self._lock:
+            lock = self._locks.setdefault(generator, threading.Lock())
+        with lock:
+            synced = self._synced.get(generator)
+            if synced is None or synced.content_hash != digest:
+                synced = self._synced[generator] = self._sync(manager, generator, files, digest)
+        return synced
+
+    def _sync(self, manager, generator, files, digest):
+        name = f"{self.prefix}{generator}"
+        try:
+            repo = manager.g.get_repo(f"{manager.login}/{name}")
+        except GithubException as e:
+            if e.status != 404:
+                raise
+            repo = manager.user.create_repo(
+                name=name,
+                description=f"Template for generated {generator} apps",
+                private=False,
+                auto_init=True
+            )
+            print(f"✅ Template repository created: {repo.html_url}")
+        if not repo.is_template:
+            # PyGithub 1.59's Repository.edit has no is_template argument
+            repo._requester.requestJsonAndCheck("PATCH", repo.url, input={'is_template': True})
+
+        commit_sha, _, _ = manager._commit_changed_files(repo, files, f"Sync {generator} template ({digest[:7]})")
+        tree = repo.get_git_tree(commit_sha, recursive=True)
+        blobs = {item.path: item.sha for item in tree.tree if item.type == 'blob'}
+        print(f"🧩 Template repository {repo.full_name} in sync ({digest[:7]})")
+        return TemplateRepo(repo.full_name, digest, tree, blobs)
+
+
+template_repositories = TemplateRepositories()